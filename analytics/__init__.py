@@ -0,0 +1,9 @@
+# Public names are imported from their submodule on first access (see `utils.lazy_exports`)
+from utils.lazy_imports import lazy_exports
+
+_EXPORTS = {
+    "compute_match_stats": ".match_stats", "MatchStats": ".match_stats",
+    "detect_ball_hits": ".match_stats", "player_track_array": ".match_stats", "rolling_mean": ".match_stats",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,278 @@
+import numpy as np
+
+from court_geometry import CourtGeometry, box_positions
+from utils import DetectionTable
+from trackers.ball_interpolation import boxes_from_detections
+
+# Meters per second to kilometers per hour
+MS_TO_KMH = 3.6
+
+
+def player_track_array(player_detections, player_ids=None):
+    """
+    Converts per-frame player detections into one box array indexed by frame and player.
+
+    Parameters:
+    player_detections (list of dict or DetectionTable): Per-frame dictionaries mapping track IDs to [x1, y1, x2, y2].
+    player_ids (list): The track IDs to keep, in column order, or None for every ID in ascending order.
+
+    Returns:
+    tuple: The (P,) player IDs and an (F, P, 4) float array, with NaN boxes where a player is not detected.
+    """
+    if not isinstance(player_detections, DetectionTable):
+        # One pass over the frames per player (there are only a few once players are chosen),
+        # which is faster than building a `DetectionTable` from the dicts
+        ids = np.array(sorted(set().union(*player_detections)) if player_ids is None else player_ids, dtype=np.int64)
+        tracks = np.full((len(player_detections), len(ids), 4), np.nan)
+        missing = (np.nan,) * 4
+        for column, player_id in enumerate(ids.tolist()):
+            tracks[:, column] = [frame_detections.get(player_id, missing) for frame_detections in player_detections]
+        return ids, tracks
+
+    table = player_detections
+    ids = np.unique(table.track_id) if player_ids is None else np.asarray(player_ids, dtype=np.int64)
+    tracks = np.full((len(table), len(ids), 4), np.nan)
+    if len(ids):
+        columns = np.searchsorted(ids, table.track_id) if player_ids is None else \
+            np.argmax(table.track_id[:, None] == ids[None, :], axis=1)
+        kept = np.isin(table.track_id, ids)
+        tracks[table.frame_index[kept] - table.first_frame, columns[kept]] = table.boxes[kept]
+    return ids, tracks
+
+
+def rolling_mean(values, window):
+    """
+    Centered moving average along the first axis that ignores NaN values.
+
+    Parameters:
+    values (numpy array): An (F, ...) array.
+    window (int): The number of frames averaged; 1 returns the values unchanged.
+
+    Returns:
+    numpy array: The averaged array, NaN where the whole window is NaN.
+    """
+    if window <= 1:
+        return values
+    valid = ~np.isnan(values)
+    # Cumulative sums of the values and of the number of valid values, padded so every window has full width
+    padded_shape = (len(values) + window,) + values.shape[1:]
+    sums = np.zeros(padded_shape)
+    counts = np.zeros(padded_shape)
+    np.cumsum(np.where(valid, values, 0.0), axis=0, out=sums[1:len(values) + 1])
+    np.cumsum(valid, axis=0, out=counts[1:len(values) + 1])
+    sums[len(values) + 1:] = sums[len(values)]
+    counts[len(values) + 1:] = counts[len(values)]
+
+    half = window // 2
+    stop = np.minimum(np.arange(len(values)) + window - half, len(values))
+    start = np.maximum(np.arange(len(values)) - half, 0)
+    window_counts = counts[stop] - counts[start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(window_counts > 0, (sums[stop] - sums[start]) / window_counts, np.nan)
+
+
+def detect_ball_hits(ball_y, smoothing=5, min_persistence=5, min_gap=15):
+    """
+    Finds the frames where the ball is hit, from sign changes of its vertical image velocity.
+
+    A shot moves the ball away from or towards the camera, i.e. up or down in the image, so a
+    hit (or a bounce) reverses the ball's vertical velocity. The ball position is smoothed,
+    and a reversal only counts when the velocity keeps its sign for `min_persistence` frames
+    on both sides; of reversals closer than `min_gap` frames, the first is kept.
+
+    Parameters:
+    ball_y (numpy array): The (F,) vertical image position of the ball center (e.g. interpolated).
+    smoothing (int): The window of the moving average applied to the positions, in frames.
+    min_persistence (int): How long the velocity must keep its sign before and after a hit.
+    min_gap (int): The minimum number of frames between two hits.
+
+    Returns:
+    numpy array: The frame indices of the hits, ascending.
+    """
+    ball_y = np.asarray(ball_y, dtype=np.float64)
+    if len(ball_y) < 2 * min_persistence + 2:
+        return np.zeros(0, dtype=np.int64)
+
+    # Sign of the velocity between frames i and i + 1, 0 where it is flat or unknown
+    velocity_sign = np.sign(np.nan_to_num(np.diff(rolling_mean(ball_y, smoothing)), nan=0.0))
+
+    # Runs of the same sign over `min_persistence` steps starting at every step
+    windows = np.lib.stride_tricks.sliding_window_view(velocity_sign, min_persistence)
+    steady = np.where((windows == windows[:, :1]).all(axis=1), windows[:, 0], 0)
+
+    # A hit at frame i ends a steady run over steps [i - k, i) and starts one over [i, i + k) of opposite sign
+    before = steady[:-min_persistence]
+    after = steady[min_persistence:]
+    candidates = np.flatnonzero((before != 0) & (after == -before)) + min_persistence
+
+    # Keep the first of reversals closer than `min_gap`; candidates are few, so this loop is cheap
+    hits = []
+    for frame in candidates:
+        if not hits or frame - hits[-1] >= min_gap:
+            hits.append(frame)
+    return np.asarray(hits, dtype=np.int64)
+
+
+class MatchStats:
+    """
+    Per-frame and per-shot statistics of a rally or a match.
+
+    Attributes:
+    table (numpy structured array): One row per frame with the columns `frame`, `time_s`,
+        `ball_hit` (the ball is hit on this frame), `shot` (index of the current shot, -1
+        before the first hit), `hitter` (track ID of the player who hit the current shot,
+        -1 if unknown), `ball_shot_speed_kmh` (mean speed of the current shot), and
+        `player_<id>_speed_kmh` / `player_<id>_distance_m` (smoothed speed and distance
+        covered so far) for every player.
+    shots (numpy structured array): One row per shot: `start_frame`, `end_frame`, `hitter`,
+        `distance_m` and `speed_kmh`.
+    player_ids (numpy array): The track IDs of the players.
+    """
+
+    def __init__(self, table, shots, player_ids, fps):
+        self.table = table
+        self.shots = shots
+        self.player_ids = player_ids
+        self.fps = fps
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def hit_frames(self):
+        """The frame indices of the ball hits"""
+        return self.table["frame"][self.table["ball_hit"]]
+
+    def summary(self):
+        """
+        Returns the totals of the match.
+
+        Returns:
+        dict: The number of "shots", the mean and max ball speed over shots, and per player
+              the "distance_m", "mean_speed_kmh", "max_speed_kmh", "shots" hit and "mean_shot_speed_kmh".
+        """
+        shot_speeds = self.shots["speed_kmh"]
+        summary = {
+            "frames": len(self.table),
+            "shots": len(self.shots),
+            "mean_shot_speed_kmh": float(np.nanmean(shot_speeds)) if np.isfinite(shot_speeds).any() else float("nan"),
+            "max_shot_speed_kmh": float(np.nanmax(shot_speeds)) if np.isfinite(shot_speeds).any() else float("nan"),
+            "players": {},
+        }
+        for player_id in self.player_ids:
+            speeds = self.table[f"player_{player_id}_speed_kmh"]
+            player_shots = self.shots["speed_kmh"][self.shots["hitter"] == player_id]
+            finite = np.isfinite(speeds).any()
+            summary["players"][int(player_id)] = {
+                "distance_m": float(self.table[f"player_{player_id}_distance_m"][-1]) if len(self.table) else 0.0,
+                "mean_speed_kmh": float(np.nanmean(speeds)) if finite else float("nan"),
+                "max_speed_kmh": float(np.nanmax(speeds)) if finite else float("nan"),
+                "shots": len(player_shots),
+                "mean_shot_speed_kmh": float(np.nanmean(player_shots)) if np.isfinite(player_shots).any() else float("nan"),
+            }
+        return summary
+
+    def to_csv(self, path):
+        """Writes the per-frame table as CSV"""
+        names = self.table.dtype.names
+        formats = ["%d" if np.issubdtype(self.table.dtype[name], np.integer) or self.table.dtype[name] == np.bool_
+                   else "%.3f" for name in names]
+        columns = np.column_stack([self.table[name].astype(np.float64) for name in names])
+        np.savetxt(path, columns, fmt=formats, delimiter=",", header=",".join(names), comments="")
+
+
+def compute_match_stats(player_detections, ball_detections, court_keypoints, fps, player_ids=None,
+                        geometry=None, speed_smoothing=None, max_hit_distance=1.5, hit_kwargs=None):
+    """
+    Computes player movement and ball shot statistics with whole-array operations.
+
+    Player positions are their feet (box bottom centers) projected onto the court in meters,
+    so speeds and distances are real-world values. The ball is projected from its box center,
+    which treats it as if it were on the ground: shot speeds are the ground distance between
+    consecutive hits over the time between them, which is what broadcast "average shot speed"
+    estimates from a single camera amount to.
+
+    Parameters:
+    player_detections (list of dict or DetectionTable): Filtered per-frame player detections
+                                                        (see `PlayerTracker.choose_and_filter_players`).
+    ball_detections (list of dict): Interpolated per-frame ball detections (see `BallTracker.interpolate_ball_positions`).
+    court_keypoints (numpy array): The keypoints of the video (28,) or of every frame (F, 28).
+    fps (float): The frame rate of the video.
+    player_ids (list): The track IDs of the players, or None for every ID in `player_detections`.
+    geometry (CourtGeometry): The geometry whose cached homographies are used, or None for a new one.
+    speed_smoothing (int): The window of the moving average of player speeds, in frames (default: fps / 5).
+    max_hit_distance (float): A velocity reversal only counts as a hit when the ball is within this many
+                              player heights of a player's box center (which rules out bounces and the
+                              top of lobs), or None to count every reversal.
+    hit_kwargs (dict): Keyword arguments of `detect_ball_hits`.
+
+    Returns:
+    MatchStats: The per-frame table and the shots.
+    """
+    geometry = geometry or CourtGeometry()
+    if speed_smoothing is None:
+        speed_smoothing = max(1, int(round(fps / 5)))
+    court_keypoints = np.asarray(court_keypoints, dtype=np.float64)
+    player_ids, player_boxes = player_track_array(player_detections, player_ids)
+    ball_boxes = boxes_from_detections(ball_detections)
+    num_frames = len(ball_boxes)
+    if len(player_boxes) != num_frames:
+        raise ValueError(f"Got {len(player_boxes)} frames of player detections and {num_frames} of ball detections")
+
+    # Court positions in meters: (F, P, 2) for the players' feet, (F, 2) for the ball
+    player_positions = geometry.pixels_to_meters(box_positions(player_boxes, "bottom"), court_keypoints)
+    ball_positions = geometry.pixels_to_meters(box_positions(ball_boxes, "center"), court_keypoints)
+
+    # Player displacement between consecutive frames; frames after a gap get no displacement
+    steps = np.zeros(player_positions.shape[:2])
+    steps[1:] = np.linalg.norm(np.diff(player_positions, axis=0), axis=-1)
+    steps[0] = np.nan
+    distances = np.cumsum(np.nan_to_num(steps, nan=0.0), axis=0)
+    speeds = rolling_mean(steps * fps * MS_TO_KMH, speed_smoothing)
+
+    # Hits: ball velocity reversals, attributed to the player closest to the ball (in the image)
+    hit_frames = detect_ball_hits(box_positions(ball_boxes, "center")[:, 1], **(hit_kwargs or {}))
+    hitters = np.full(len(hit_frames), -1, dtype=np.int64)
+    if len(hit_frames) and len(player_ids):
+        hit_boxes = player_boxes[hit_frames]
+        ball_centers = box_positions(ball_boxes[hit_frames], "center")
+        ball_distances = np.linalg.norm(box_positions(hit_boxes, "center") - ball_centers[:, None], axis=-1)
+        found = np.isfinite(ball_distances).any(axis=1)
+        closest = np.nanargmin(np.where(found[:, None], ball_distances, np.inf), axis=1)
+        hitters[found] = player_ids[closest[found]]
+        if max_hit_distance is not None:
+            rows = np.arange(len(hit_frames))
+            player_heights = hit_boxes[rows, closest, 3] - hit_boxes[rows, closest, 1]
+            near = found & (ball_distances[rows, closest] <= max_hit_distance * player_heights)
+            hit_frames, hitters = hit_frames[near], hitters[near]
+
+    # Shots run from one hit to the next (the last one to the end of the video)
+    shot_ends = np.append(hit_frames[1:], num_frames - 1)
+    shot_distances = np.linalg.norm(ball_positions[shot_ends] - ball_positions[hit_frames], axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shot_speeds = shot_distances / ((shot_ends - hit_frames) / fps) * MS_TO_KMH
+
+    shots = np.zeros(len(hit_frames), dtype=[("start_frame", np.int64), ("end_frame", np.int64), ("hitter", np.int64),
+                                             ("distance_m", np.float32), ("speed_kmh", np.float32)])
+    shots["start_frame"], shots["end_frame"], shots["hitter"] = hit_frames, shot_ends, hitters
+    shots["distance_m"], shots["speed_kmh"] = shot_distances, shot_speeds
+
+    # Per-frame table: every frame belongs to the last shot started at or before it
+    columns = [("frame", np.int32), ("time_s", np.float32), ("ball_hit", np.bool_), ("shot", np.int16),
+               ("hitter", np.int32), ("ball_shot_speed_kmh", np.float32)]
+    for player_id in player_ids:
+        columns += [(f"player_{player_id}_speed_kmh", np.float32), (f"player_{player_id}_distance_m", np.float32)]
+    table = np.zeros(num_frames, dtype=columns)
+    table["frame"] = np.arange(num_frames)
+    table["time_s"] = table["frame"] / fps
+    table["ball_hit"][hit_frames] = True
+    shot_index = np.searchsorted(hit_frames, np.arange(num_frames), side="right") - 1
+    table["shot"] = shot_index
+    in_shot = shot_index >= 0
+    table["hitter"] = np.where(in_shot, hitters[shot_index] if len(hitters) else -1, -1)
+    table["ball_shot_speed_kmh"] = np.where(in_shot, shot_speeds[shot_index] if len(shot_speeds) else np.nan, np.nan)
+    for column, player_id in enumerate(player_ids):
+        table[f"player_{player_id}_speed_kmh"] = speeds[:, column]
+        table[f"player_{player_id}_distance_m"] = distances[:, column]
+
+    return MatchStats(table, shots, player_ids, fps)
@@ -0,0 +1,6 @@
+# Public names are imported from their submodule on first access (see `utils.lazy_exports`)
+from utils.lazy_imports import lazy_exports
+
+_EXPORTS = {"BatchRunner": ".runner", "find_jobs": ".runner"}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,38 @@
+"""
+Batch runner CLI: processes a directory or manifest of videos on a pool of workers.
+
+Usage (from the repository root):
+    python -m batch data/matches --output-dir data/output_videos --workers 4
+"""
+import argparse
+
+from .runner import BatchRunner, find_jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="A directory of videos or a manifest (.txt/.csv lines or .json list)")
+    parser.add_argument("--output-dir", default="data/output_videos")
+    parser.add_argument("--workers", type=int, default=1, help="Number of videos processed at once")
+    parser.add_argument("--threads-per-worker", type=int, default=None)
+    parser.add_argument("--render-workers", type=int, default=0)
+    parser.add_argument("--player-model", default=None)
+    parser.add_argument("--ball-model", default=None)
+    parser.add_argument("--court-model", default=None)
+    args = parser.parse_args()
+
+    from main import MODEL_PATHS
+    model_paths = dict(MODEL_PATHS)
+    for key, path in (("player", args.player_model), ("ball", args.ball_model), ("court", args.court_model)):
+        if path is not None:
+            model_paths[key] = path
+
+    runner = BatchRunner(args.output_dir, model_paths, num_workers=args.workers,
+                         threads_per_worker=args.threads_per_worker, render_workers=args.render_workers)
+    records = runner.run(find_jobs(args.source, args.output_dir))
+    failed = [record for record in records if record["status"] != "done"]
+    print(f"Summary written to {runner.summary_path}" + (f", {len(failed)} failed" if failed else ""))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+import csv
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+# Extensions picked up when the batch input is a directory
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+
+CHECKPOINT_FILE = "batch_checkpoint.jsonl"
+SUMMARY_FILE = "batch_summary.csv"
+
+# Models and settings of the current worker process, loaded once by `_init_worker`
+_worker_state = {}
+
+
+def find_jobs(source, output_dir, suffix="_annotated.mp4"):
+    """
+    Lists the (input, output) video pairs of a batch.
+
+    Parameters:
+    source (str): A directory of videos, or a manifest: a text file with one input path per
+                  line, optionally followed by a comma and an output path, or a JSON list of
+                  paths or of {"input": ..., "output": ...} objects. Relative paths in a
+                  manifest are relative to the manifest.
+    output_dir (str): The directory of the outputs that are not given by the manifest.
+    suffix (str): Appended to the input name (without extension) to name default outputs.
+
+    Returns:
+    list of tuple: The (input path, output path) pairs, in order.
+    """
+    def default_output(input_path):
+        return os.path.join(output_dir, os.path.splitext(os.path.basename(input_path))[0] + suffix)
+
+    if os.path.isdir(source):
+        inputs = sorted(os.path.join(source, name) for name in os.listdir(source)
+                        if name.lower().endswith(VIDEO_EXTENSIONS))
+        return [(path, default_output(path)) for path in inputs]
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source) as f:
+        if source.lower().endswith(".json"):
+            entries = [entry if isinstance(entry, dict) else {"input": entry} for entry in json.load(f)]
+        else:
+            entries = []
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    fields = [field.strip() for field in line.split(",")]
+                    entries.append({"input": fields[0], "output": fields[1] if len(fields) > 1 else None})
+
+    jobs = []
+    for entry in entries:
+        input_path = os.path.join(base_dir, entry["input"])
+        output_path = entry.get("output")
+        jobs.append((input_path, os.path.join(base_dir, output_path) if output_path else default_output(input_path)))
+    return jobs
+
+
+def _init_worker(model_paths, threads_per_worker, render_workers):
+    """Loads the models once per worker process"""
+    # Keep each process on its share of the cores instead of oversubscribing the machine
+    import cv2
+    import torch
+    torch.set_num_threads(threads_per_worker)
+    cv2.setNumThreads(threads_per_worker)
+
+    from main import load_models
+    start_time = time.perf_counter()
+    _worker_state["models"] = load_models(model_paths)
+    _worker_state["load_time"] = time.perf_counter() - start_time
+    _worker_state["render_workers"] = render_workers
+
+
+def _process_job(input_path, output_path):
+    """Processes one video in a worker, returning its checkpoint record"""
+    from main import process_video
+
+    record = {"input": input_path, "output": output_path, "worker": os.getpid(),
+              "model_load_seconds": _worker_state.pop("load_time", 0.0)}
+    start_time = time.perf_counter()
+    try:
+        timings = process_video(input_path, output_path, _worker_state["models"],
+                                render_workers=_worker_state["render_workers"])
+        record.update(status="done", **{f"{step}_seconds" if step != "frames" else step: value
+                                        for step, value in timings.items()})
+    except Exception as e:
+        record.update(status="failed", error=f"{type(e).__name__}: {e}")
+    record["seconds"] = time.perf_counter() - start_time
+    return record
+
+
+class BatchRunner:
+    """
+    Processes many videos on a pool of worker processes, each loading the models once.
+
+    Every finished video is appended to a checkpoint file in the output directory, so a
+    run that is interrupted (or re-run on a grown directory) skips the videos already
+    done. Failed videos are recorded and retried on the next run. A per-video timing
+    summary is written as CSV at the end of every run.
+    """
+
+    def __init__(self, output_dir, model_paths=None, num_workers=1, threads_per_worker=None, render_workers=0):
+        """
+        Parameters:
+        output_dir (str): The directory of the outputs, checkpoint and summary.
+        model_paths (dict): The "player", "ball" and "court" model paths (defaults to `main.MODEL_PATHS`).
+        num_workers (int): The number of worker processes (videos processed at once).
+        threads_per_worker (int): The torch/OpenCV threads per worker, defaulting to cores / workers.
+        render_workers (int): The annotation threads per video (see `main.process_video`).
+        """
+        if model_paths is None:
+            from main import MODEL_PATHS
+            model_paths = MODEL_PATHS
+        self.output_dir = output_dir
+        self.model_paths = model_paths
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // num_workers)
+        self.render_workers = render_workers
+        self.checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILE)
+        self.summary_path = os.path.join(output_dir, SUMMARY_FILE)
+
+    def completed(self):
+        """Returns the checkpoint records of the videos already done, by input path"""
+        records = {}
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # A line cut short by an interruption
+                    if record.get("status") == "done" and os.path.exists(record["output"]):
+                        records[record["input"]] = record
+        return records
+
+    def run(self, jobs):
+        """
+        Processes the (input, output) pairs that are not done yet.
+
+        If a worker dies (e.g. killed for running out of memory), the pool cannot run any
+        more jobs: its unfinished jobs are recorded as failed, to be retried by the next run.
+        The summary is written even when the run is interrupted.
+
+        Parameters:
+        jobs (list of tuple): The (input path, output path) pairs, e.g. from `find_jobs`.
+
+        Returns:
+        list of dict: The checkpoint records of this run, in completion order.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        done = self.completed()
+        pending = [(input_path, output_path) for input_path, output_path in jobs if input_path not in done]
+        print(f"{len(jobs)} videos, {len(jobs) - len(pending)} already done, {len(pending)} to process")
+
+        records = []
+        try:
+            if pending:
+                self._run_pending(pending, records)
+        finally:
+            self.write_summary(list(done.values()) + records)
+        return records
+
+    def _run_pending(self, pending, records):
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(self.num_workers, len(pending)), mp_context=context,
+                                 initializer=_init_worker,
+                                 initargs=(self.model_paths, self.threads_per_worker, self.render_workers)) as executor, \
+                open(self.checkpoint_path, "a") as checkpoint:
+            futures = {executor.submit(_process_job, input_path, output_path): (input_path, output_path)
+                       for input_path, output_path in pending}
+            for future in as_completed(futures):
+                try:
+                    record = future.result()
+                except BrokenProcessPool as e:
+                    # Every job still queued or running fails the same way once a worker died
+                    input_path, output_path = futures[future]
+                    record = {"input": input_path, "output": output_path, "status": "failed", "seconds": 0.0,
+                              "error": f"{type(e).__name__}: {e}"}
+                checkpoint.write(json.dumps(record) + "\n")
+                checkpoint.flush()
+                os.fsync(checkpoint.fileno())
+                records.append(record)
+                print(f"[{len(records)}/{len(pending)}] {record['status']:<6} {record['seconds']:8.1f}s  {record['input']}")
+
+    def write_summary(self, records):
+        """Writes the timing of every video as CSV (one row per video, one column per step)"""
+        columns = ["input", "output", "status", "frames", "seconds", "fps", "model_load_seconds"]
+        for record in records:
+            columns += [key for key in record if key.endswith("_seconds") and key not in columns]
+
+        with open(self.summary_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns + ["error"], extrasaction="ignore")
+            writer.writeheader()
+            for record in records:
+                fps = record["frames"] / record["seconds"] if record.get("frames") and record.get("seconds") else None
+                writer.writerow(dict(record, fps=fps))
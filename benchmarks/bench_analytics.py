@@ -0,0 +1,93 @@
+"""
+Benchmark of the match analytics (`analytics.compute_match_stats`).
+
+Builds synthetic tracks of a long match directly as detections (no video): two players
+moving along the baselines of a broadcast view, and a ball going back and forth between
+them with a small arc, hit at known frames. Reports the time to compute the statistics
+(including the conversion of the per-frame dicts to arrays), and the precision and recall
+of the detected hits against the true hit frames.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_analytics --minutes 180
+"""
+import argparse
+import time
+
+import numpy as np
+
+from analytics import compute_match_stats
+from benchmarks.synthetic import court_image_keypoints
+from court_geometry import COURT_KEYPOINTS_METERS, apply_homography
+
+
+def make_match(num_frames, fps, width=1280, height=720, seed=0):
+    """Returns player detections, ball detections, court keypoints and true hit frames of a synthetic match"""
+    rng = np.random.default_rng(seed)
+    keypoints, homography = court_image_keypoints(width, height)
+    court_width, court_length = COURT_KEYPOINTS_METERS[3]
+    frames = np.arange(num_frames)
+
+    # Shots last 0.8 to 1.6 s; the ball alternates between the far (player 1) and near (player 2) baselines
+    shot_lengths = rng.integers(int(0.8 * fps), int(1.6 * fps), num_frames // int(0.8 * fps) + 1)
+    hit_frames = np.cumsum(shot_lengths)
+    hit_frames = np.concatenate([[0], hit_frames[hit_frames < num_frames]])
+    shot = np.searchsorted(hit_frames, frames, side="right") - 1
+    shot_end = np.append(hit_frames[1:], num_frames)[shot]
+    phase = (frames - hit_frames[shot]) / (shot_end - hit_frames[shot])
+
+    player_court = np.stack([
+        np.stack([court_width / 2 + 3 * np.sin(frames / 23), np.full(num_frames, -0.5)], axis=1),
+        np.stack([court_width / 2 + 3 * np.sin(frames / 17 + 1), np.full(num_frames, court_length + 0.5)], axis=1),
+    ], axis=1)
+    player_feet = apply_homography(homography, player_court)
+    player_heights = height * (0.08 + 0.1 * (player_feet[..., 1] / height - 0.28) / 0.6)
+
+    # Even shots go from the near player to the far one, odd shots back; the ball is hit at chest height
+    from_player = np.where(shot % 2 == 0, 1, 0)
+    chest = player_feet.copy()
+    chest[..., 1] -= 0.6 * player_heights
+    start, end = chest[frames, from_player], chest[frames, 1 - from_player]
+    ball = start + (end - start) * phase[:, None]
+    ball[:, 1] -= 0.03 * height * 4 * phase * (1 - phase)
+    ball += rng.normal(0, 1.0, ball.shape)
+
+    player_detections = [
+        {player_id: [x - h / 5, y - h, x + h / 5, y] for player_id, ((x, y), h) in
+         enumerate(zip(feet.tolist(), heights.tolist()), start=1)}
+        for feet, heights in zip(player_feet, player_heights)
+    ]
+    ball_detections = [{1: [x - 4, y - 4, x + 4, y + 4]} for x, y in ball.tolist()]
+    return player_detections, ball_detections, keypoints.ravel(), hit_frames[1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=180.0, help="Length of the synthetic match")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--tolerance", type=int, default=3, help="Frames between a detected and a true hit")
+    args = parser.parse_args()
+
+    num_frames = int(args.minutes * 60 * args.fps)
+    player_detections, ball_detections, court_keypoints, true_hits = make_match(num_frames, args.fps)
+
+    start = time.perf_counter()
+    stats = compute_match_stats(player_detections, ball_detections, court_keypoints, args.fps)
+    elapsed = time.perf_counter() - start
+
+    detected = stats.hit_frames
+    distances = np.abs(detected[:, None] - true_hits[None, :]) if len(detected) else np.zeros((0, len(true_hits)))
+    precision = (distances.min(axis=1) <= args.tolerance).mean() if len(detected) else 0.0
+    recall = (distances.min(axis=0) <= args.tolerance).mean() if len(detected) else 0.0
+
+    summary = stats.summary()
+    print(f"{num_frames} frames ({args.minutes:.0f} min at {args.fps:.0f} fps) in {1000 * elapsed:.0f} ms "
+          f"({num_frames / elapsed / 1e6:.2f} M frames/s)")
+    print(f"hits: {len(detected)} detected, {len(true_hits)} true, precision {precision:.3f}, recall {recall:.3f}")
+    print(f"shots: mean {summary['mean_shot_speed_kmh']:.1f} km/h, max {summary['max_shot_speed_kmh']:.1f} km/h")
+    for player_id, player in summary["players"].items():
+        print(f"player {player_id}: {player['distance_m'] / 1000:.2f} km, mean {player['mean_speed_kmh']:.1f} km/h, "
+              f"max {player['max_speed_kmh']:.1f} km/h, {player['shots']} shots")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark of ball interpolation: the original pandas implementation against the
+NumPy `BallTracker.interpolate_ball_positions` and `StreamingBallInterpolator`.
+
+Generates a synthetic trajectory (bouncing ball with missed detections and a few
+jump outliers), checks that the NumPy version matches pandas, and reports how many
+of the injected outliers the velocity test rejects.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_ball_interpolation --frames 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from trackers import BallTracker, StreamingBallInterpolator
+from trackers.ball_interpolation import boxes_from_detections, interpolate_boxes, reject_outliers
+
+
+def make_detections(num_frames, missing_rate, outlier_rate, seed=0):
+    """Returns synthetic ball detections and the indices of the injected outliers"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(num_frames)
+    x = 960 + 700 * np.sin(t / 60.0)
+    y = 540 + 400 * np.abs(np.sin(t / 23.0))
+    boxes = np.stack([x - 8, y - 8, x + 8, y + 8], axis=1)
+
+    outliers = np.flatnonzero(rng.random(num_frames) < outlier_rate)
+    jumps = rng.uniform(300, 900, (len(outliers), 2)) * rng.choice([-1, 1], (len(outliers), 2))
+    boxes[outliers] += np.tile(jumps, 2)
+
+    detected = rng.random(num_frames) >= missing_rate
+    detected[outliers] = True
+    detections = [{1: box} if keep else {} for box, keep in zip(boxes.tolist(), detected)]
+    return detections, outliers
+
+
+def interpolate_pandas(ball_positions):
+    """The original pandas implementation, as a reference"""
+    ball_positions = [x.get(1, []) for x in ball_positions]
+    df_ball_positions = pd.DataFrame(ball_positions, columns=["x1", "y1", "x2", "y2"])
+    df_ball_positions = df_ball_positions.interpolate()
+    df_ball_positions = df_ball_positions.bfill()
+    return [{1: x} for x in df_ball_positions.to_numpy().tolist()]
+
+
+def interpolate_streaming(ball_positions, lookahead, max_speed):
+    interpolator = StreamingBallInterpolator(lookahead=lookahead, max_speed=max_speed)
+    interpolated = []
+    for ball_dict in ball_positions:
+        interpolated.extend(interpolator.push(ball_dict))
+    interpolated.extend(interpolator.flush())
+    return interpolated
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=1000000)
+    parser.add_argument("--missing-rate", type=float, default=0.3)
+    parser.add_argument("--outlier-rate", type=float, default=0.001)
+    parser.add_argument("--max-speed", type=float, default=100.0, help="Outlier threshold in pixels per frame")
+    parser.add_argument("--lookahead", type=int, default=30)
+    args = parser.parse_args()
+
+    detections, outliers = make_detections(args.frames, args.missing_rate, args.outlier_rate)
+    # `interpolate_ball_positions` does not use the model, so skip loading it
+    tracker = BallTracker.__new__(BallTracker)
+
+    reference, pandas_time = timed(interpolate_pandas, detections)
+    numpy_result, numpy_time = timed(tracker.interpolate_ball_positions, detections)
+    filtered, filtered_time = timed(tracker.interpolate_ball_positions, detections, max_speed=args.max_speed)
+    streamed, streaming_time = timed(interpolate_streaming, detections, args.lookahead, args.max_speed)
+
+    # Most of the time above goes into converting to and from the list-of-dicts format
+    boxes = boxes_from_detections(detections)
+    _, array_time = timed(lambda: interpolate_boxes(reject_outliers(boxes, args.max_speed)))
+
+    assert np.allclose([x[1] for x in numpy_result], [x[1] for x in reference])
+
+    print(f"{args.frames} frames, {args.missing_rate:.0%} missing, {len(outliers)} outliers")
+    print(f"{'implementation':<32} {'seconds':>8}")
+    print(f"{'pandas (original)':<32} {pandas_time:>8.3f}")
+    print(f"{'numpy':<32} {numpy_time:>8.3f}")
+    print(f"{'numpy + outlier rejection':<32} {filtered_time:>8.3f}")
+    print(f"{f'streaming (lookahead={args.lookahead})':<32} {streaming_time:>8.3f}")
+    print(f"{'numpy + outliers, arrays only':<32} {array_time:>8.3f}")
+
+    clean, _ = make_detections(args.frames, 0.0, 0.0)
+    truth = np.array([x[1] for x in clean])
+    for name, result in [("numpy", numpy_result), ("numpy + outliers", filtered), ("streaming", streamed)]:
+        error = np.abs(np.array([x[1] for x in result]) - truth)[outliers].max(axis=1)
+        print(f"{name:<20} mean error at outlier frames: {error.mean():8.1f} px")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark of Kalman-scheduled ball detection (`BallMotionPredictor`).
+
+The detector is simulated from recorded detections (by default the ball stub in
+tracker_stubs/): a call returns the recorded box of the frame if its center lies
+inside the searched region, and nothing otherwise. Each configuration is scored
+against the recorded detections, together with the detector cost relative to
+running the model on every full frame (in pixels processed).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_ball_motion --roi-sizes 192 320 --detect-every 1 2 3
+"""
+import argparse
+import pickle as pkl
+
+import numpy as np
+
+from trackers import BallMotionPredictor
+
+
+class RecordedBallDetector:
+    """Replays recorded ball detections, restricted to the searched region"""
+
+    def __init__(self, ball_detections):
+        self.ball_detections = ball_detections
+
+    def __call__(self, frame_index, roi):
+        ball_dict = self.ball_detections[frame_index]
+        if 1 not in ball_dict or roi is None:
+            return dict(ball_dict)
+        x1, y1, x2, y2 = ball_dict[1]
+        center_x, center_y = (x1 + x2) / 2, (y1 + y2) / 2
+        if roi[0] <= center_x < roi[2] and roi[1] <= center_y < roi[3]:
+            return dict(ball_dict)
+        return {}
+
+
+def score(predicted, recorded, tolerance):
+    """
+    Returns (precision, recall) of predicted ball boxes against the recorded ones.
+
+    A predicted box is correct when its center is within `tolerance` box diagonals of
+    the recorded center of the same frame.
+    """
+    true_positives = predicted_count = recorded_count = 0
+    for predicted_dict, recorded_dict in zip(predicted, recorded):
+        predicted_count += 1 in predicted_dict
+        recorded_count += 1 in recorded_dict
+        if 1 in predicted_dict and 1 in recorded_dict:
+            p, r = np.asarray(predicted_dict[1]), np.asarray(recorded_dict[1])
+            distance = np.linalg.norm((p[:2] + p[2:]) / 2 - (r[:2] + r[2:]) / 2)
+            true_positives += distance <= tolerance * np.linalg.norm(r[2:] - r[:2])
+    return true_positives / max(predicted_count, 1), true_positives / max(recorded_count, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stub", default="tracker_stubs/ball_detections.pkl")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--roi-sizes", type=int, nargs="+", default=[128, 192, 320])
+    parser.add_argument("--detect-every", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--max-missed", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=1.0, help="Match distance, in box diagonals")
+    args = parser.parse_args()
+
+    with open(args.stub, "rb") as f:
+        recorded = pkl.load(f)
+    detector = RecordedBallDetector(recorded)
+    print(f"{len(recorded)} frames, {sum(1 in d for d in recorded)} with a recorded ball, "
+          f"{args.width}x{args.height}")
+
+    print(f"{'roi':>5} {'every':>5} {'precision':>9} {'recall':>7} {'full':>5} {'roi':>5} {'skip':>5} {'cost':>6}")
+    for roi_size in args.roi_sizes:
+        for detect_every in args.detect_every:
+            predictor = BallMotionPredictor(roi_size=roi_size, detect_every=detect_every, max_missed=args.max_missed)
+            predicted = list(predictor.track(range(len(recorded)), detector, frame_size=(args.width, args.height)))
+            precision, recall = score(predicted, recorded, args.tolerance)
+            stats = predictor.summary()
+            print(f"{roi_size:>5} {detect_every:>5} {precision:>9.3f} {recall:>7.3f} {stats['full_frame_calls']:>5} "
+                  f"{stats['roi_calls']:>5} {stats['skipped']:>5} {stats['relative_cost']:>6.3f}")
+
+
+if __name__ == "__main__":
+    main()
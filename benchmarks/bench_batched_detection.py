@@ -0,0 +1,71 @@
+"""
+Benchmark of batched YOLO inference for `PlayerTracker` and `BallTracker`.
+
+Runs `detect_frames` on the same frames with several batch sizes on the CPU and
+reports the throughput (frames/sec) of each configuration.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_batched_detection --video data/input_video.mp4
+"""
+import argparse
+import os
+import time
+from itertools import islice
+
+# Benchmark on the CPU even when a GPU is available
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import numpy as np
+
+from utils import read_video
+from trackers import PlayerTracker, BallTracker
+
+
+def load_frames(video_path, num_frames, width, height):
+    """Reads the first `num_frames` frames of `video_path`, or generates random frames if no video is given"""
+    if video_path is not None:
+        return list(islice(read_video(video_path), num_frames))
+
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(num_frames)]
+
+
+def benchmark_tracker(tracker_cls, model_path, frames, batch_size, warmup_frames):
+    """Returns the frames/sec of `tracker_cls.detect_frames` on `frames` with the given batch size"""
+    # A fresh tracker per run so player track state does not leak between runs
+    tracker = tracker_cls(model_path=model_path)
+    tracker.detect_frames(frames[:warmup_frames], batch_size=batch_size)
+
+    start = time.perf_counter()
+    tracker.detect_frames(frames, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+
+    return len(frames) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", default=None, help="Input video; random 1280x720 frames are used if omitted")
+    parser.add_argument("--player-model", default="yolov8x.pt")
+    parser.add_argument("--ball-model", default="models/yolov5_last.pt")
+    parser.add_argument("--frames", type=int, default=64)
+    parser.add_argument("--warmup-frames", type=int, default=16)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames, args.width, args.height)
+
+    print(f"{'model':<8} {'batch':>5} {'frames/s':>10} {'speedup':>8}")
+    for name, tracker_cls, model_path in [("player", PlayerTracker, args.player_model),
+                                          ("ball", BallTracker, args.ball_model)]:
+        baseline = None
+        for batch_size in args.batch_sizes:
+            fps = benchmark_tracker(tracker_cls, model_path, frames, batch_size, args.warmup_frames)
+            baseline = baseline or fps
+            print(f"{name:<8} {batch_size:>5} {fps:>10.2f} {fps / baseline:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
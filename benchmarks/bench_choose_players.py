@@ -0,0 +1,121 @@
+"""
+Benchmark of player selection: the original per-track Python loops against the
+vectorized `PlayerTracker.choose_and_filter_players`.
+
+Generates synthetic detections with hundreds of tracks over a long video (tracks
+appear for a few hundred frames each) and times selection on the first frame, and
+sliding-window re-selection on a `DetectionTable`, checking both against per-track
+reference loops.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_choose_players --frames 100000 --tracks 300
+"""
+import argparse
+import time
+
+import numpy as np
+
+from utils import DetectionTable, measure_distance, get_center_of_bbox
+from trackers import PlayerTracker
+
+
+def make_detections(num_frames, num_tracks, seed=0):
+    """Returns synthetic per-frame detections where each track is visible over a random frame range"""
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(0, num_frames, num_tracks)
+    lengths = rng.integers(100, 1000, num_tracks)
+    # Whole-pixel positions, exactly representable in the float32 columns of DetectionTable
+    positions = rng.integers([0, 0], [1800, 1000], (num_tracks, 2)).astype(float)
+
+    # Tracks 1 and 2 are the players and are visible in every frame
+    starts[:2] = 0
+    lengths[:2] = num_frames
+
+    detections = [{} for _ in range(num_frames)]
+    for track_id in range(num_tracks):
+        x, y = positions[track_id]
+        for frame_index in range(starts[track_id], min(starts[track_id] + lengths[track_id], num_frames)):
+            detections[frame_index][track_id + 1] = [x, y, x + 60.0, y + 120.0]
+    return detections
+
+
+def choose_and_filter_players_loop(court_keypoints, player_detections):
+    """The original pure-Python implementation, as a reference"""
+    distances = []
+    for track_id, bbox in player_detections[0].items():
+        player_center = get_center_of_bbox(bbox)
+        min_distance = float('inf')
+        for i in range(0, len(court_keypoints), 2):
+            distance = measure_distance(player_center, (court_keypoints[i], court_keypoints[i + 1]))
+            min_distance = min(min_distance, distance)
+        distances.append((track_id, min_distance))
+    distances.sort(key=lambda x: x[1])
+    chosen_player = [distances[0][0], distances[1][0]]
+
+    return [{track_id: bbox for track_id, bbox in player_dict.items() if track_id in chosen_player}
+            for player_dict in player_detections]
+
+
+def reselect_players_loop(court_keypoints, player_detections, reselect_window):
+    """Per-window reference of re-selection: the two tracks with the smallest mean distance to the keypoints"""
+    keypoints = np.asarray(court_keypoints, dtype=float).reshape(-1, 2)
+    filtered = []
+    for start in range(0, len(player_detections), reselect_window):
+        window = player_detections[start:start + reselect_window]
+        distances = {}
+        for player_dict in window:
+            for track_id, bbox in player_dict.items():
+                center = np.array(get_center_of_bbox(bbox), dtype=float)
+                distances.setdefault(track_id, []).append(np.linalg.norm(keypoints - center, axis=1).min())
+        chosen_players = sorted(distances, key=lambda track_id: (np.mean(distances[track_id]), track_id))[:2]
+        filtered += [{track_id: bbox for track_id, bbox in player_dict.items() if track_id in chosen_players}
+                     for player_dict in window]
+    return filtered
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=100000)
+    parser.add_argument("--tracks", type=int, default=300)
+    parser.add_argument("--window", type=int, default=250, help="Frames per re-selection window")
+    args = parser.parse_args()
+
+    detections = make_detections(args.frames, args.tracks)
+    court_keypoints = np.random.default_rng(1).uniform(0, 1000, 28)
+
+    # `choose_and_filter_players` does not use the model, so skip loading it
+    tracker = PlayerTracker.__new__(PlayerTracker)
+
+    table, convert_time = timed(DetectionTable.from_dicts, detections)
+    print(f"{args.frames} frames, {args.tracks} tracks, {table.num_detections} detections")
+    print(f"{'implementation':<36} {'seconds':>8}")
+    print(f"{'dicts -> DetectionTable':<36} {convert_time:>8.3f}")
+
+    reference, loop_time = timed(choose_and_filter_players_loop, court_keypoints, detections)
+    print(f"{'loop, first frame (dicts)':<36} {loop_time:>8.3f}")
+
+    result, vector_time = timed(tracker.choose_and_filter_players, court_keypoints, detections)
+    assert result == reference
+    print(f"{'vectorized, first frame (dicts)':<36} {vector_time:>8.3f}")
+
+    _, table_time = timed(tracker.choose_and_filter_players, court_keypoints, table)
+    print(f"{'vectorized, first frame (table)':<36} {table_time:>8.3f}")
+
+    window_result, window_time = timed(tracker.choose_and_filter_players, court_keypoints, table,
+                                       reselect_window=args.window)
+    print(f"{f'vectorized, window={args.window} (table)':<36} {window_time:>8.3f}")
+
+    window_reference, window_loop_time = timed(reselect_players_loop, court_keypoints, detections, args.window)
+    assert [sorted(player_dict) for player_dict in window_result.to_dicts()] == \
+        [sorted(player_dict) for player_dict in window_reference]
+    print(f"{f'loop, window={args.window} (dicts)':<36} {window_loop_time:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
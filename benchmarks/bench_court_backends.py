@@ -0,0 +1,71 @@
+"""
+Accuracy and speed of the `CourtLineDetector` inference backends on the CPU.
+
+Every backend is compared against the FP32 PyTorch model: maximum and mean keypoint
+error in pixels, single-frame latency and batched throughput.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_court_backends --model models/keypoints_model_1.pth --video data/input_video.mp4
+"""
+import argparse
+import os
+import time
+from itertools import islice
+
+# Benchmark on the CPU even when a GPU is available
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import cv2
+import numpy as np
+
+from utils import read_video
+from court_line_detector import CourtLineDetector
+from court_line_detector.court_line_detector import BACKENDS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="models/keypoints_model_1.pth")
+    parser.add_argument("--video", default=None, help="Input video; smooth random 1920x1080 frames are used if omitted")
+    parser.add_argument("--frames", type=int, default=32)
+    parser.add_argument("--calibration-frames", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    args = parser.parse_args()
+
+    num_frames = args.calibration_frames + args.frames
+    if args.video is not None:
+        frames = list(islice(read_video(args.video), num_frames))
+    else:
+        rng = np.random.default_rng(0)
+        frames = [cv2.resize(rng.integers(0, 256, (54, 96, 3), dtype=np.uint8), (1920, 1080),
+                             interpolation=cv2.INTER_CUBIC)
+                  for _ in range(num_frames)]
+    # Calibrate on different frames than the ones that are evaluated
+    calibration_frames, frames = frames[:args.calibration_frames], frames[args.calibration_frames:]
+
+    reference = CourtLineDetector(args.model).predict_batch(frames)
+
+    print(f"{'backend':<12} {'max err px':>10} {'mean err px':>11} {'ms/frame (bs=1)':>16} "
+          f"{f'frames/s (bs={args.batch_size})':>16}")
+    for backend in args.backends:
+        detector = CourtLineDetector(args.model, backend=backend, calibration_frames=calibration_frames)
+        keypoints = np.concatenate([detector.predict_batch(frames[i:i + args.batch_size])
+                                    for i in range(0, len(frames), args.batch_size)])
+        errors = np.abs(keypoints - reference)
+
+        start = time.perf_counter()
+        for frame in frames:
+            detector.predict(frame)
+        latency = (time.perf_counter() - start) / len(frames) * 1000
+
+        start = time.perf_counter()
+        for i in range(0, len(frames), args.batch_size):
+            detector.predict_batch(frames[i:i + args.batch_size])
+        throughput = len(frames) / (time.perf_counter() - start)
+
+        print(f"{backend:<12} {errors.max():>10.2f} {errors.mean():>11.2f} {latency:>16.1f} {throughput:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
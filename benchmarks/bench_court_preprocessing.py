@@ -0,0 +1,138 @@
+"""
+Benchmark of the `CourtLineDetector` preprocessing: the original
+`cvtColor -> ToPILImage -> Resize -> ToTensor -> Normalize` path against the
+uint8/in-place path of `CourtLineDetector.preprocess_batch`.
+
+Reports the per-frame latency of preprocessing and of a full prediction on the CPU,
+the Python/NumPy allocations per frame (tracemalloc) and the maximum keypoint
+difference between the two paths in pixels.
+
+It also checks that both paths produce the same input tensor, within `PARITY_TOLERANCE`,
+for frames that are downscaled and upscaled (smaller than the model input) to the model
+input size, and exits with status 1 otherwise.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_court_preprocessing --model models/keypoints_model_1.pth
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from itertools import islice
+
+# Benchmark on the CPU even when a GPU is available
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import cv2
+import numpy as np
+import torch
+
+from utils import read_video
+from court_line_detector import CourtLineDetector
+from court_line_detector.court_line_detector import INPUT_SIZE
+
+# Frame sizes (width, height) of the parity check: downscaled on both sides at integer and non-integer
+# ratios, upscaled on both, and upscaled on one side only
+PARITY_SIZES = ((3840, 2160), (1920, 1080), (1280, 720), (640, 360), (450, 800),
+                (160, 120), (200, 100), (1000, 150), (100, 300))
+
+# Maximum difference between the two input tensors, in normalized units (one gray level)
+PARITY_TOLERANCE = 0.02
+
+
+def preprocess_pil(detector, image):
+    """The original single-image preprocessing through PIL"""
+    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return detector.transform(image_rgb).unsqueeze(0)
+
+
+def predict_pil(detector, image):
+    """The original single-image prediction"""
+    with torch.no_grad():
+        outputs = detector.model(preprocess_pil(detector, image))
+    keypoints = outputs.squeeze().cpu().numpy()
+    original_h, original_w = image.shape[:2]
+    keypoints[::2] *= original_w / float(INPUT_SIZE)
+    keypoints[1::2] *= original_h / float(INPUT_SIZE)
+    return keypoints
+
+
+def preprocessing_parity(detector, sizes=PARITY_SIZES):
+    """Returns the maximum difference between the PIL and `preprocess_batch` input tensors of smooth random frames of each size"""
+    rng = np.random.default_rng(0)
+    differences = {}
+    for width, height in sizes:
+        frame = cv2.resize(rng.integers(0, 256, (27, 48, 3), dtype=np.uint8), (width, height),
+                           interpolation=cv2.INTER_CUBIC)
+        reference = preprocess_pil(detector, frame)[0]
+        differences[(width, height)] = float((reference - detector.preprocess_batch([frame])[0]).abs().max())
+    return differences
+
+
+def measure(fn, frames):
+    """Returns the mean latency (ms), the allocated bytes and number of allocations per frame of `fn`"""
+    fn(frames[0])  # Warm-up, allocates the reusable buffers
+
+    start = time.perf_counter()
+    for frame in frames:
+        fn(frame)
+    latency = (time.perf_counter() - start) / len(frames) * 1000
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for frame in frames:
+        fn(frame)
+    stats = tracemalloc.take_snapshot().compare_to(before, 'lineno')
+    tracemalloc.stop()
+    # Count everything allocated during the loop, including what was freed again
+    allocated = sum(max(stat.size_diff, 0) for stat in stats)
+    count = sum(max(stat.count_diff, 0) for stat in stats)
+
+    return latency, allocated / len(frames), count / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="models/keypoints_model_1.pth")
+    parser.add_argument("--video", default=None, help="Input video; smooth random 1920x1080 frames are used if omitted")
+    parser.add_argument("--frames", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.video is not None:
+        frames = list(islice(read_video(args.video), args.frames))
+    else:
+        # Low-frequency content, closer to real footage than per-pixel noise
+        rng = np.random.default_rng(0)
+        frames = [cv2.resize(rng.integers(0, 256, (54, 96, 3), dtype=np.uint8), (1920, 1080),
+                             interpolation=cv2.INTER_CUBIC)
+                  for _ in range(args.frames)]
+
+    detector = CourtLineDetector(model_path=args.model)
+    torch.set_grad_enabled(False)
+
+    print(f"{'path':<28} {'ms/frame':>9} {'KiB/frame':>10} {'allocs/frame':>13}")
+    rows = [
+        ("preprocess (PIL)", lambda frame: preprocess_pil(detector, frame)),
+        ("preprocess (in place)", lambda frame: detector.preprocess_batch([frame])),
+        ("predict (PIL)", lambda frame: predict_pil(detector, frame)),
+        ("predict (in place)", detector.predict),
+    ]
+    for name, fn in rows:
+        latency, allocated, count = measure(fn, frames)
+        print(f"{name:<28} {latency:>9.2f} {allocated / 1024:>10.1f} {count:>13.1f}")
+
+    errors = [np.abs(predict_pil(detector, frame) - detector.predict(frame)).max() for frame in frames]
+    print(f"max keypoint difference: {max(errors):.3f} px (mean over frames {np.mean(errors):.3f} px)")
+
+    failures = 0
+    for (width, height), difference in preprocessing_parity(detector).items():
+        status = "" if difference <= PARITY_TOLERANCE else "  ABOVE TOLERANCE"
+        failures += bool(status)
+        print(f"input difference at {width}x{height}: {difference:.3f} (tolerance {PARITY_TOLERANCE}){status}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark of court-restricted player detection (`PlayerTracker.set_court_region`).
+
+Runs `PlayerTracker.detect_frames` on full frames and on the expanded court region,
+at 1080p and 4K, and reports the per-frame latency and the share of the frame sent
+to the model. Court keypoints are placed like in a broadcast view unless a video
+and keypoints model are given.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_court_region --model yolov8x.pt
+"""
+import argparse
+import os
+import time
+
+# Benchmark on the CPU even when a GPU is available
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import numpy as np
+
+from trackers import PlayerTracker
+
+# Corners of the doubles court in a typical broadcast view, as fractions of the frame size
+BROADCAST_COURT_CORNERS = np.array([[0.30, 0.27], [0.70, 0.27], [0.15, 0.81], [0.85, 0.81]])
+
+RESOLUTIONS = {"1080p": (1920, 1080), "4k": (3840, 2160)}
+
+
+def make_frames(num_frames, width, height, seed=0):
+    """Returns smooth random frames, so the model sees image-like content"""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (num_frames, height // 16, width // 16, 3), dtype=np.uint8)
+    return [np.ascontiguousarray(frame.repeat(16, axis=0).repeat(16, axis=1)) for frame in small]
+
+
+def benchmark(tracker, frames, warmup_frames):
+    """Returns the mean latency (ms per frame) of `tracker.detect_frames`"""
+    tracker.detect_frames(frames[:warmup_frames])
+    start = time.perf_counter()
+    tracker.detect_frames(frames)
+    return 1000 * (time.perf_counter() - start) / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="yolov8x.pt")
+    parser.add_argument("--frames", type=int, default=16)
+    parser.add_argument("--warmup-frames", type=int, default=4)
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    args = parser.parse_args()
+
+    print(f"{'input':<6} {'mode':<6} {'region':>22} {'pixels':>7} {'ms/frame':>9} {'speedup':>8}")
+    for resolution in args.resolutions:
+        width, height = RESOLUTIONS[resolution]
+        frames = make_frames(args.frames, width, height)
+        court_keypoints = (BROADCAST_COURT_CORNERS * [width, height]).ravel()
+
+        baseline = None
+        for mode in ("full", "court"):
+            # A fresh tracker per run so track state does not leak between runs
+            tracker = PlayerTracker(model_path=args.model)
+            if mode == "court":
+                tracker.set_court_region(court_keypoints)
+            region = tracker.court_region(frames[0].shape) or (0, 0, width, height)
+            pixels = (region[2] - region[0]) * (region[3] - region[1]) / (width * height)
+
+            latency = benchmark(tracker, frames, args.warmup_frames)
+            baseline = baseline or latency
+            print(f"{resolution:<6} {mode:<6} {str(region):>22} {pixels:>6.0%} {latency:>9.1f} {baseline / latency:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
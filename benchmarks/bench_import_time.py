@@ -0,0 +1,113 @@
+"""
+Import-time budget check of the package entry points.
+
+Imports each package (or runs `main.py --help`) in a fresh interpreter, keeps the fastest
+of `--repeat` runs, and checks it against its time budget. It also checks that importing a
+package does not load any heavy dependency (torch, torchvision, ultralytics, pandas): those
+must only be imported when a model is first used, including after
+`main.load_models(preload=False)`. Exits with status 1 when a check fails.
+
+The repository has no test suite and this check is not run by CI: run it by hand
+before merging changes to imports or to model loading.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --scale 2   # on a slower machine
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Dependencies that take seconds to import
+HEAVY_MODULES = ("torch", "torchvision", "ultralytics", "pandas")
+
+# Import statements and their budgets in seconds (the time of the statement itself, not of the interpreter start)
+IMPORT_BUDGETS = {
+    "import trackers": 0.05,
+    "import court_line_detector": 0.05,
+    "import mini_court": 0.05,
+    "import utils": 0.05,
+    "import pipeline": 0.05,
+    "import server": 0.05,
+    "import batch": 0.05,
+    "from trackers import PlayerTracker, BallTracker, DetectionCache, StreamingBallInterpolator": 0.4,
+    "from utils import measure_distances, DetectionTable": 0.25,
+    "from court_geometry import CourtGeometry": 0.4,
+    "from server import InferenceClient": 0.4,
+    "import main": 0.5,
+    "import main; main.load_models(preload=False)": 0.6,
+}
+
+# Budget of `python main.py --help`, including the interpreter start
+HELP_BUDGET = 1.0
+
+_MEASURE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def measure_import(statement, repeat):
+    """Returns the fastest import time of `statement` in fresh interpreters and the heavy modules it loaded"""
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _MEASURE_SCRIPT.format(statement=statement, heavy=HEAVY_MODULES)],
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+
+def measure_help(repeat):
+    """Returns the fastest wall time of `python main.py --help`"""
+    import time
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "main.py", "--help"], capture_output=True, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per import; the fastest is kept")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplies every budget, for slower machines")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'import':<90} {'ms':>8} {'budget':>8}")
+    for statement, budget in IMPORT_BUDGETS.items():
+        budget *= args.scale
+        result = measure_import(statement, args.repeat)
+        status = ""
+        if result["seconds"] > budget:
+            status = "  OVER BUDGET"
+            failures.append(statement)
+        if result["heavy"]:
+            status += f"  loads {', '.join(result['heavy'])}"
+            failures.append(statement)
+        print(f"{statement:<90} {1000 * result['seconds']:>8.1f} {1000 * budget:>8.0f}{status}")
+
+    elapsed = measure_help(args.repeat)
+    budget = HELP_BUDGET * args.scale
+    status = ""
+    if elapsed > budget:
+        status = "  OVER BUDGET"
+        failures.append("main.py --help")
+    print(f"{'python main.py --help':<90} {1000 * elapsed:>8.1f} {1000 * budget:>8.0f}{status}")
+
+    if failures:
+        print(f"{len(failures)} import check(s) failed")
+        sys.exit(1)
+    print("all imports within budget")
+
+
+if __name__ == '__main__':
+    main()
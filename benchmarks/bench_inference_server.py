@@ -0,0 +1,105 @@
+"""
+Load test of the inference server (`server.InferenceServer`).
+
+Starts a local server (unless `--url` points to a running one), then runs concurrent
+clients that each stream frames to the player, ball or court endpoint, one request
+per `--frames-per-request` frames. Reports the throughput, the request latency
+percentiles and the server's batching metrics (queue depth, batch sizes).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_inference_server --clients 1 4 8 --player-model yolov8n.yaml
+"""
+import argparse
+import os
+import threading
+import time
+
+# Benchmark on the CPU even when a GPU is available
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import numpy as np
+
+from server import InferenceServer, InferenceClient
+
+
+def run_clients(url, endpoint, num_clients, requests_per_client, frames_per_request, frame):
+    """Runs concurrent clients and returns (elapsed seconds, request latencies in ms)"""
+    latencies = []
+    lock = threading.Lock()
+    errors = []
+
+    def client_loop():
+        client = InferenceClient(url)
+        call = {"players": client.detect_players, "ball": client.detect_ball, "court": client.predict_court}[endpoint]
+        frames = [frame] * frames_per_request
+        try:
+            for _ in range(requests_per_client):
+                start = time.perf_counter()
+                call(frames)
+                with lock:
+                    latencies.append(1000 * (time.perf_counter() - start))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=client_loop) for _ in range(num_clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return time.perf_counter() - start, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="A running server; a local one is started if omitted")
+    parser.add_argument("--endpoints", nargs="+", default=["players", "ball", "court"])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--requests", type=int, default=8, help="Requests per client")
+    parser.add_argument("--frames-per-request", type=int, default=1)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-latency-ms", type=float, default=20.0)
+    parser.add_argument("--player-model", default="yolov8x.pt")
+    parser.add_argument("--ball-model", default="models/yolov5_last.pt")
+    parser.add_argument("--court-model", default="models/keypoints_model_1.pth")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        model_paths = {"player": args.player_model, "ball": args.ball_model, "court": args.court_model}
+        server = InferenceServer(model_paths, port=0, max_batch_size=args.max_batch_size,
+                                 max_latency_ms=args.max_latency_ms).start()
+        url = server.url
+
+    frame = np.random.default_rng(0).integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+    try:
+        # Warm up every model once
+        for endpoint in args.endpoints:
+            run_clients(url, endpoint, 1, 1, 1, frame)
+
+        print(f"{'endpoint':<8} {'clients':>7} {'frames/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean batch':>10}")
+        client = InferenceClient(url)
+        for endpoint in args.endpoints:
+            for num_clients in args.clients:
+                before = client.metrics()["models"][endpoint]
+                elapsed, latencies = run_clients(url, endpoint, num_clients, args.requests,
+                                                 args.frames_per_request, frame)
+                after = client.metrics()["models"][endpoint]
+                batches = after["batches"] - before["batches"]
+                mean_batch = (after["frames"] - before["frames"]) / batches if batches else 0.0
+                frames = num_clients * args.requests * args.frames_per_request
+                p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+                print(f"{endpoint:<8} {num_clients:>7} {frames / elapsed:>9.1f} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {mean_batch:>10.2f}")
+        print(client.metrics())
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Benchmark of the real-time live mode (`pipeline.run_live`).
+
+Replays a video at its native frame rate as a stand-in for a camera and processes it
+with several latency budgets. Reports the capture-to-output latency percentiles, the
+share of captured frames that were dropped, and how much work was skipped to keep up.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_live --video data/input_video.mp4 --budgets 50 100 200
+"""
+import argparse
+import os
+
+# Benchmark on the CPU even when a GPU is available
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+from main import load_models
+from pipeline import run_live
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", default="data/input_video.mp4")
+    parser.add_argument("--player-model", default="yolov8x.pt")
+    parser.add_argument("--ball-model", default="models/yolov5_last.pt")
+    parser.add_argument("--court-model", default="models/keypoints_model_1.pth")
+    parser.add_argument("--budgets", type=float, nargs="+", default=[50.0, 100.0, 200.0],
+                        help="Latency budgets to compare, in milliseconds")
+    args = parser.parse_args()
+
+    models = load_models({"player": args.player_model, "ball": args.ball_model, "court": args.court_model})
+    print(f"{'budget ms':>9} {'captured':>8} {'processed':>9} {'drop rate':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'ball skips':>10} {'court':>5}")
+    for budget in args.budgets:
+        report = run_live(args.video, models, latency_budget_ms=budget, realtime=True)
+        print(f"{budget:>9.0f} {report['captured']:>8} {report['processed']:>9} {report['drop_rate']:>9.1%} "
+              f"{report['latency_p50_ms']:>8.1f} {report['latency_p95_ms']:>8.1f} {report['latency_p99_ms']:>8.1f} "
+              f"{report['ball_detections_skipped']:>10} {report['court_updates']:>5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark of the per-frame cost of the mini court overlay at 1080p.
+
+Compares the original full-frame compositing (a full-frame canvas, boolean mask and
+`addWeighted` result per frame, then the court drawn from scratch) with the cached
+`MiniCourt.draw_court`, which blends only the rectangle's slice in place, and reports
+the cost of the moving markers separately.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_mini_court_overlay --frames 500
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from mini_court import MiniCourt
+
+
+def draw_court_full_frame(mini_court, frame, alpha=0.5):
+    """The original compositing (with its undefined output fixed), drawing the court lines every frame"""
+    shapes = np.zeros_like(frame, np.uint8)
+    cv2.rectangle(shapes, (mini_court.start_x, mini_court.start_y), (mini_court.end_x, mini_court.end_y),
+                  (255, 255, 255), cv2.FILLED)
+    mask = shapes.astype(bool)
+    out = frame.copy()
+    out[mask] = cv2.addWeighted(frame, alpha, shapes, 1 - alpha, 0)[mask]
+
+    key_points = mini_court.drawing_key_points
+    for start, end in mini_court.lines:
+        cv2.line(out, (key_points[2 * start], key_points[2 * start + 1]),
+                 (key_points[2 * end], key_points[2 * end + 1]), (0, 0, 0), 2)
+    for i in range(0, len(key_points), 2):
+        cv2.circle(out, (key_points[i], key_points[i + 1]), 5, (0, 0, 255), -1)
+    return out
+
+
+def timed_per_frame(fn, frames):
+    start = time.perf_counter()
+    for frame in frames:
+        fn(frame)
+    return 1000 * (time.perf_counter() - start) / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8) for _ in range(8)]
+    frames = [frames[i % len(frames)] for i in range(args.frames)]
+    mini_court = MiniCourt(frames[0])
+
+    players = {1: (mini_court.court_start_x + 60, mini_court.court_start_y + 10),
+               2: (mini_court.court_start_x + 150, mini_court.court_start_y + 440)}
+    ball = {1: (mini_court.court_start_x + 100, mini_court.court_start_y + 200)}
+
+    def markers(frame):
+        mini_court.draw_markers(frame, players, (0, 255, 0))
+        mini_court.draw_markers(frame, ball, (0, 255, 255))
+
+    full_frame = timed_per_frame(lambda frame: draw_court_full_frame(mini_court, frame), frames)
+    cached = timed_per_frame(mini_court.draw_court, frames)
+    marker_cost = timed_per_frame(markers, frames)
+
+    print(f"{args.width}x{args.height}, {args.frames} frames")
+    print(f"{'full-frame compositing':<24} {full_frame:>8.3f} ms/frame")
+    print(f"{'cached ROI blend':<24} {cached:>8.3f} ms/frame  ({full_frame / cached:.1f}x)")
+    print(f"{'markers':<24} {marker_cost:>8.3f} ms/frame")
+
+
+if __name__ == '__main__':
+    main()
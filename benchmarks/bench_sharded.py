@@ -0,0 +1,46 @@
+"""
+Benchmark of frame-sharded multi-process processing (`pipeline.process_video_sharded`).
+
+Processes the same video with an increasing number of worker processes and reports
+the wall time of every phase and the speedup over a single worker. Stand-in models
+(e.g. `--player-model yolov8n.yaml`) can be used to benchmark without the trained weights.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_sharded --video data/input_video.mp4 --workers 1 2 4 8
+"""
+import argparse
+import os
+import tempfile
+
+# Benchmark on the CPU even when a GPU is available
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+from pipeline import process_video_sharded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", default="data/input_video.mp4")
+    parser.add_argument("--player-model", default="yolov8x.pt")
+    parser.add_argument("--ball-model", default="models/yolov5_last.pt")
+    parser.add_argument("--court-model", default="models/keypoints_model_1.pth")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--overlap", type=int, default=30)
+    args = parser.parse_args()
+
+    model_paths = {"player": args.player_model, "ball": args.ball_model, "court": args.court_model}
+    print(f"{os.cpu_count()} cores")
+    print(f"{'workers':>7} {'detect':>8} {'render':>8} {'concat':>8} {'total':>8} {'speedup':>8}")
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_workers in args.workers:
+            output_path = os.path.join(tmp_dir, f"output_{num_workers}.mp4")
+            timings = process_video_sharded(args.video, output_path, model_paths,
+                                            num_workers=num_workers, overlap=args.overlap)
+            baseline = baseline or timings["total"]
+            print(f"{num_workers:>7} {timings['detect']:>8.1f} {timings['render']:>8.1f} "
+                  f"{timings['concatenate']:>8.1f} {timings['total']:>8.1f} {baseline / timings['total']:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+"""
+End-to-end benchmark suite on synthetic videos with stand-in models.
+
+Generates a synthetic tennis-like video (see `benchmarks.synthetic`) and measures every
+stage of the pipeline in isolation - decode, court keypoints, player detection, ball
+detection, ball interpolation, player selection, drawing and encoding - followed by the
+full `main.process_video` run. For each stage it reports the frames per second, the
+per-frame latency (mean and p95) and the peak resident memory reached during the stage.
+
+By default the models are tiny randomly initialized stand-ins with the same interfaces as
+the trained ones (`yolov8n.yaml` for players and ball, a random-weight keypoint model for the
+court), so the suite runs offline; pass the real model paths to benchmark them instead.
+Post-processing and drawing stages run on the ground truth of the synthetic video, so their
+workload does not depend on what the stand-in models happen to detect.
+
+Results are saved as JSON (by default under benchmarks/results/, named after the current
+commit) and can be compared with an earlier run; the script exits with status 1 when a
+stage got slower than `--max-regression` allows.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_suite --width 1280 --height 720 --frames 150
+    python -m benchmarks.bench_suite --compare benchmarks/results/<baseline>.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+# Benchmark on the CPU even when a GPU is available
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import numpy as np
+
+from benchmarks.synthetic import make_tennis_video
+from main import load_models, process_video
+from mini_court import MiniCourt
+from overlay import OverlayRenderer, frame_number_layer
+from profiling import max_rss_bytes
+from utils import read_video, save_video
+
+STAND_IN_MODEL_PATHS = {"player": "yolov8n.yaml", "ball": "yolov8n.yaml", "court": None}
+
+
+def reset_peak_rss():
+    """Resets the peak resident memory of the process (Linux only), so each stage reports its own peak"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_bytes():
+    """Returns the peak resident memory since the last `reset_peak_rss`, in bytes"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return max_rss_bytes()
+
+
+def measure(name, run, num_frames, per_frame=False):
+    """
+    Runs one stage and returns its measurements.
+
+    Parameters:
+    name (str): The stage name.
+    run (callable): Runs the stage and returns its output.
+    num_frames (int): The number of frames the stage processes.
+    per_frame (bool): Whether the output of `run` is the list of per-frame latencies in seconds;
+                      otherwise the mean latency is the total time divided by the frames.
+
+    Returns:
+    tuple: The stage's "seconds", "fps", "latency_mean_ms", "latency_p95_ms" and "peak_rss_mb", and the output of `run`.
+    """
+    reset_peak_rss()
+    start = time.perf_counter()
+    output = run()
+    elapsed = time.perf_counter() - start
+    result = {"seconds": elapsed, "fps": num_frames / elapsed}
+    if per_frame:
+        latencies = output
+        latencies = 1000 * np.asarray(latencies)
+        result["latency_mean_ms"] = float(latencies.mean())
+        result["latency_p95_ms"] = float(np.percentile(latencies, 95))
+    else:
+        result["latency_mean_ms"] = result["latency_p95_ms"] = 1000 * elapsed / num_frames
+    result["peak_rss_mb"] = peak_rss_bytes() / 2 ** 20
+    print(f"{name:<16} {result['fps']:>9.1f} {result['latency_mean_ms']:>9.2f} "
+          f"{result['latency_p95_ms']:>9.2f} {result['peak_rss_mb']:>9.0f}", flush=True)
+    return result, output
+
+
+def timed_per_item(fn, items):
+    """Calls `fn` on every item and returns the latency of each call"""
+    latencies = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run_suite(video, models, tmp_dir):
+    """Measures every stage on the synthetic video and the full pipeline, and returns the results by stage"""
+    player_tracker = models["player_tracker"]
+    ball_tracker = models["ball_tracker"]
+    court_line_detector = models["court_line_detector"]
+    num_frames = video["num_frames"]
+    court_keypoints = video["court_keypoints"]
+    results = {}
+    frames = []
+
+    def decode():
+        latencies = []
+        frame_iter = read_video(video["path"])
+        while True:
+            start = time.perf_counter()
+            frame = next(frame_iter, None)
+            if frame is None:
+                return latencies
+            latencies.append(time.perf_counter() - start)
+            frames.append(frame)
+
+    print(f"{'stage':<16} {'frames/s':>9} {'mean ms':>9} {'p95 ms':>9} {'peak MB':>9}")
+    results["decode"], _ = measure("decode", decode, num_frames, per_frame=True)
+    results["court"], _ = measure("court", lambda: court_line_detector.predict_video(frames), num_frames)
+
+    player_tracker.set_court_region(court_keypoints)
+    player_tracker.reset_tracks()
+    results["detect_players"], _ = measure(
+        "detect_players", lambda: timed_per_item(player_tracker.detect_frame, frames), num_frames, per_frame=True)
+    results["detect_ball"], _ = measure(
+        "detect_ball", lambda: timed_per_item(ball_tracker.detect_frame, frames), num_frames, per_frame=True)
+
+    # Post-processing and drawing use the ground truth, with a few spurious people around the court
+    rng = np.random.default_rng(0)
+    player_detections = []
+    for players in video["player_boxes"]:
+        detections = dict(players)
+        for track_id in range(3, 3 + rng.integers(0, 4)):
+            x, y = rng.uniform(0, frames[0].shape[1] - 50), rng.uniform(0, frames[0].shape[0] - 100)
+            detections[int(track_id)] = [x, y, x + 50, y + 100]
+        player_detections.append(detections)
+
+    results["interpolate"], ball_detections = measure(
+        "interpolate", lambda: ball_tracker.interpolate_ball_positions(video["ball_boxes"]), num_frames)
+    results["select_players"], player_detections = measure(
+        "select_players", lambda: player_tracker.choose_and_filter_players(court_keypoints, player_detections), num_frames)
+
+    mini_court = MiniCourt(frames[0])
+    player_positions = mini_court.project_detections(player_detections, court_keypoints)
+    ball_positions = mini_court.project_detections(ball_detections, court_keypoints, anchor="center")
+    renderer = OverlayRenderer([
+        lambda i, overlay: player_tracker.add_to_overlay(overlay, player_detections[i]),
+        lambda i, overlay: ball_tracker.add_to_overlay(overlay, ball_detections[i]),
+        lambda i, overlay: court_line_detector.add_to_overlay(overlay, court_keypoints),
+        lambda i, overlay: mini_court.add_to_overlay(overlay, player_positions[i], ball_positions[i]),
+        frame_number_layer,
+    ])
+    results["draw"], _ = measure(
+        "draw", lambda: timed_per_item(lambda item: renderer.render_frame(*item), enumerate(frames)), num_frames,
+        per_frame=True)
+
+    def encode():
+        latencies = []
+
+        def timed_frames():
+            for frame in frames:
+                start = time.perf_counter()
+                yield frame
+                latencies.append(time.perf_counter() - start)
+
+        save_video(timed_frames(), os.path.join(tmp_dir, "encode.mp4"), fps=video["fps"])
+        return latencies
+
+    results["encode"], _ = measure("encode", encode, num_frames, per_frame=True)
+    frames.clear()
+
+    results["full_pipeline"], _ = measure(
+        "full_pipeline", lambda: process_video(video["path"], os.path.join(tmp_dir, "output.mp4"), models), num_frames)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, baseline, max_regression):
+    """Prints the fps change of every stage against a baseline and returns the stages that regressed"""
+    print(f"\ncompared with {baseline['metadata']['commit']} ({baseline['metadata']['timestamp']})")
+    print(f"{'stage':<16} {'baseline':>9} {'current':>9} {'change':>8}")
+    regressions = []
+    for name, stage in results["stages"].items():
+        if name not in baseline["stages"]:
+            continue
+        before, after = baseline["stages"][name]["fps"], stage["fps"]
+        change = after / before - 1
+        flag = ""
+        if change < -max_regression:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<16} {before:>9.1f} {after:>9.1f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--player-model", default=STAND_IN_MODEL_PATHS["player"])
+    parser.add_argument("--ball-model", default=STAND_IN_MODEL_PATHS["ball"])
+    parser.add_argument("--court-model", default=STAND_IN_MODEL_PATHS["court"],
+                        help="The keypoint model state dict; a random-weight stand-in if omitted")
+    parser.add_argument("--save", default=None,
+                        help="Where to save the results (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="Results of an earlier run to compare with")
+    parser.add_argument("--max-regression", type=float, default=0.1,
+                        help="Largest tolerated relative fps drop of a stage when comparing")
+    args = parser.parse_args()
+
+    model_paths = {"player": args.player_model, "ball": args.ball_model, "court": args.court_model}
+    models = load_models(model_paths)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        video = make_tennis_video(os.path.join(tmp_dir, "synthetic.mp4"), args.width, args.height,
+                                  args.frames, args.fps, args.seed)
+        print(f"{args.width}x{args.height}, {args.frames} frames, {os.cpu_count()} cores")
+        stages = run_suite(video, models, tmp_dir)
+
+    import torch
+    results = {
+        "metadata": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "width": args.width, "height": args.height, "frames": args.frames, "fps": args.fps, "seed": args.seed,
+            "model_paths": model_paths,
+            "cpu_count": os.cpu_count(),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+        },
+        "stages": stages,
+    }
+
+    save_path = args.save or os.path.join("benchmarks", "results", f"{results['metadata']['commit']}.json")
+    os.makedirs(os.path.dirname(save_path) or ".", exist_ok=True)
+    with open(save_path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results saved to {save_path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if any(baseline["metadata"][key] != results["metadata"][key] for key in ("width", "height", "frames", "model_paths")):
+            print("warning: the baseline was run with a different video size, length or models")
+        if compare(results, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark of video decoding and encoding with `utils.video_io`.
+
+Writes a synthetic clip with every available codec (OpenCV FourCCs, and ffmpeg
+encoders when ffmpeg is installed), in the foreground and on a background thread
+while a stand-in per-frame workload runs, and reports frames/sec and file size.
+Then reads the clip back in full, as a frame range and every Nth frame.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_video_io --frames 300 --width 1920 --height 1080
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from utils import VideoReader, VideoWriter, ffmpeg_available
+
+
+def make_frames(num_frames, width, height, seed=0):
+    """Returns a moving, textured synthetic clip (a panning noise background with a moving box)"""
+    rng = np.random.default_rng(seed)
+    background = cv2.resize(rng.integers(0, 256, (height // 8, width // 4, 3), dtype=np.uint8),
+                            (2 * width, height), interpolation=cv2.INTER_LINEAR)
+    frames = []
+    for i in range(num_frames):
+        offset = (4 * i) % width
+        frame = np.ascontiguousarray(background[:, offset:offset + width])
+        cv2.rectangle(frame, (100 + 5 * i % (width - 200), 200), (160 + 5 * i % (width - 200), 320), (0, 0, 255), -1)
+        frames.append(frame)
+    return frames
+
+
+def busy_work(frame, milliseconds):
+    """Stands in for per-frame processing between writes (model inference, which releases the GIL)"""
+    time.sleep(milliseconds / 1000)
+
+
+def benchmark_write(frames, path, codec, backend, background, work_ms):
+    start = time.perf_counter()
+    with VideoWriter(path, fps=30.0, codec=codec, backend=backend, background=background) as writer:
+        for frame in frames:
+            busy_work(frame, work_ms)
+            writer.write(frame)
+    elapsed = time.perf_counter() - start
+    return len(frames) / elapsed, os.path.getsize(path)
+
+
+def benchmark_read(path, **kwargs):
+    start = time.perf_counter()
+    count = sum(1 for _ in VideoReader(path, **kwargs))
+    return count, 1000 * (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--work-ms", type=float, default=5.0, help="Stand-in processing time per frame")
+    args = parser.parse_args()
+
+    frames = make_frames(args.frames, args.width, args.height)
+    configurations = [(".avi", "MJPG", "opencv"), (".avi", "XVID", "opencv"), (".mp4", "mp4v", "opencv")]
+    if ffmpeg_available():
+        configurations += [(".mp4", "libx264", "ffmpeg"), (".mp4", "mpeg4", "ffmpeg")]
+    else:
+        print("ffmpeg not found, skipping the ffmpeg backend")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{args.width}x{args.height}, {args.frames} frames, {args.work_ms} ms of work per frame")
+        print(f"{'codec':<8} {'backend':<7} {'thread':<10} {'frames/s':>9} {'size MB':>8}")
+        for extension, codec, backend in configurations:
+            path = os.path.join(tmp_dir, f"out_{codec}{extension}")
+            for background in (False, True):
+                fps, size = benchmark_write(frames, path, codec, backend, background, args.work_ms)
+                thread = "background" if background else "inline"
+                print(f"{codec:<8} {backend:<7} {thread:<10} {fps:>9.1f} {size / 1e6:>8.2f}")
+
+        path = os.path.join(tmp_dir, "out_mp4v.mp4")
+        half = args.frames // 2
+        print(f"\n{'read':<24} {'frames':>6} {'total ms':>9}")
+        for name, kwargs in [("full", {}),
+                             (f"range [{half}, {half + 30})", {"start": half, "stop": half + 30}),
+                             ("every 2nd frame", {"step": 2}),
+                             ("every 5th frame", {"step": 5})]:
+            count, elapsed = benchmark_read(path, **kwargs)
+            print(f"{name:<24} {count:>6} {elapsed:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Synthetic tennis-like videos for benchmarks.
+
+A static broadcast-style view of a court (drawn through a perspective homography from the
+real court layout), two players moving along the baselines and a ball flying between them,
+with short gaps where the ball is hidden so that interpolation has work to do. The ground
+truth (court keypoints, player and ball boxes) is returned with the video.
+"""
+import cv2
+import numpy as np
+
+from court_geometry import COURT_KEYPOINTS_METERS, estimate_homography, apply_homography
+from utils import save_video
+
+# Court lines drawn between keypoints (see `COURT_KEYPOINTS_METERS`)
+COURT_LINES = [(0, 1), (2, 3), (0, 2), (1, 3), (4, 5), (6, 7), (8, 9), (10, 11), (12, 13)]
+
+
+def court_image_keypoints(width, height):
+    """Returns the (14, 2) pixel positions of the court keypoints in a broadcast view of the given size"""
+    corners = np.array([[0.36 * width, 0.28 * height], [0.64 * width, 0.28 * height],
+                        [0.18 * width, 0.88 * height], [0.82 * width, 0.88 * height]])
+    homography = estimate_homography(COURT_KEYPOINTS_METERS[:4], corners)
+    return apply_homography(homography, COURT_KEYPOINTS_METERS), homography
+
+
+def render_background(width, height, keypoints, homography, seed=0):
+    """Draws the static part of the scene: textured surroundings, court surface, lines and net"""
+    rng = np.random.default_rng(seed)
+    texture = rng.integers(-12, 13, (height // 8 + 1, width // 8 + 1, 1), dtype=np.int16)
+    texture = cv2.resize(texture.astype(np.float32), (width, height), interpolation=cv2.INTER_LINEAR)[..., None]
+    frame = np.clip(np.array([60, 120, 70], dtype=np.float32) + texture, 0, 255).astype(np.uint8)
+
+    points = keypoints.round().astype(np.int32)
+    cv2.fillConvexPoly(frame, points[[0, 1, 3, 2]], (140, 90, 40))
+    line_width = max(1, round(height / 360))
+    for start, end in COURT_LINES:
+        cv2.line(frame, tuple(points[start]), tuple(points[end]), (255, 255, 255), line_width, cv2.LINE_AA)
+
+    net = apply_homography(homography, np.array([[-0.9, 11.885], [11.87, 11.885]])).round().astype(int)
+    cv2.line(frame, tuple(net[0]), tuple(net[1]), (230, 230, 230), 2 * line_width, cv2.LINE_AA)
+    return frame
+
+
+def make_tennis_video(path, width=1280, height=720, num_frames=150, fps=30.0, seed=0):
+    """
+    Writes a synthetic tennis-like video.
+
+    Parameters:
+    path (str): The output video path.
+    width (int): The frame width.
+    height (int): The frame height.
+    num_frames (int): The number of frames.
+    fps (float): The frame rate.
+    seed (int): The seed of the background texture.
+
+    Returns:
+    dict: The "path", "fps", "num_frames", the (28,) "court_keypoints" and the per-frame
+          "player_boxes" ({1: box, 2: box}) and "ball_boxes" ({1: box}, empty while hidden).
+    """
+    keypoints, homography = court_image_keypoints(width, height)
+    background = render_background(width, height, keypoints, homography, seed)
+    court_width, court_length = COURT_KEYPOINTS_METERS[3]
+
+    frame_indices = np.arange(num_frames)
+    # Players shuffle along their baselines, in meters
+    player_court = np.stack([
+        np.stack([court_width / 2 + 3 * np.sin(frame_indices / 23), np.full(num_frames, -0.5)], axis=1),
+        np.stack([court_width / 2 + 3 * np.sin(frame_indices / 17 + 1), np.full(num_frames, court_length + 0.5)], axis=1),
+    ], axis=1)
+    player_feet = apply_homography(homography, player_court)
+    # Apparent size shrinks with the distance to the camera
+    player_heights = height * (0.08 + 0.1 * (player_feet[..., 1] / height - 0.28) / 0.6)
+
+    # The ball flies from one player to the other every rally period, with a parabolic arc in the image
+    rally_period = 40
+    phase = (frame_indices % rally_period) / rally_period
+    leg = (frame_indices // rally_period) % 2
+    ball_court = np.where((leg == 0)[:, None],
+                          player_court[:, 1] + (player_court[:, 0] - player_court[:, 1]) * phase[:, None],
+                          player_court[:, 0] + (player_court[:, 1] - player_court[:, 0]) * phase[:, None])
+    ball_center = apply_homography(homography, ball_court)
+    ball_center[:, 1] -= height * 0.25 * 4 * phase * (1 - phase)
+    ball_radius = max(2, round(height / 180))
+    # Hide the ball for a few frames every so often
+    ball_visible = frame_indices % 37 >= 3
+
+    player_boxes, ball_boxes = [], []
+
+    def frames():
+        for i in frame_indices:
+            frame = background.copy()
+            players = {}
+            for player_id, ((x, y), player_height) in enumerate(zip(player_feet[i], player_heights[i]), start=1):
+                half_width = player_height / 5
+                box = [float(x - half_width), float(y - player_height), float(x + half_width), float(y)]
+                cv2.rectangle(frame, (int(box[0]), int(box[1] + player_height / 5)), (int(box[2]), int(box[3])),
+                              (40, 40, 200) if player_id == 1 else (200, 200, 40), -1)
+                cv2.circle(frame, (int(x), int(box[1] + player_height / 10)), int(player_height / 10), (120, 160, 210), -1)
+                players[player_id] = box
+            player_boxes.append(players)
+
+            if ball_visible[i]:
+                x, y = ball_center[i].tolist()
+                cv2.circle(frame, (int(x), int(y)), ball_radius, (40, 240, 230), -1, cv2.LINE_AA)
+                ball_boxes.append({1: [x - ball_radius, y - ball_radius, x + ball_radius, y + ball_radius]})
+            else:
+                ball_boxes.append({})
+            yield frame
+
+    save_video(frames(), path, fps=fps)
+    return {"path": path, "fps": fps, "num_frames": num_frames, "court_keypoints": keypoints.ravel(),
+            "player_boxes": player_boxes, "ball_boxes": ball_boxes}
@@ -0,0 +1 @@
+from .court_geometry import CourtGeometry, COURT_KEYPOINTS_METERS, estimate_homography, apply_homography, box_positions
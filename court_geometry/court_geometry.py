@@ -0,0 +1,174 @@
+import cv2
+import numpy as np
+
+import constants
+
+# Real positions of the 14 keypoints predicted by `CourtLineDetector`, in meters.
+# x runs across the court from the left doubles sideline, y along the court from the far baseline:
+#  0, 1: far baseline, doubles corners      2, 3: near baseline, doubles corners
+#  4, 5: left singles sideline ends         6, 7: right singles sideline ends
+#  8, 9: far service line, singles ends    10, 11: near service line, singles ends
+# 12, 13: far and near center service marks (the "T"s)
+_COURT_LENGTH = 2 * constants.HALF_COURT_LINE_WIDTH
+_SINGLES_LEFT = constants.DOUBLE_ALLEY_DIFFERENCE
+_SINGLES_RIGHT = constants.DOUBLE_LINE_WIDTH - constants.DOUBLE_ALLEY_DIFFERENCE
+_CENTER = constants.DOUBLE_LINE_WIDTH / 2
+COURT_KEYPOINTS_METERS = np.array([
+    [0, 0], [constants.DOUBLE_LINE_WIDTH, 0],
+    [0, _COURT_LENGTH], [constants.DOUBLE_LINE_WIDTH, _COURT_LENGTH],
+    [_SINGLES_LEFT, 0], [_SINGLES_LEFT, _COURT_LENGTH],
+    [_SINGLES_RIGHT, 0], [_SINGLES_RIGHT, _COURT_LENGTH],
+    [_SINGLES_LEFT, constants.NO_MANS_LAND_HEIGHT], [_SINGLES_RIGHT, constants.NO_MANS_LAND_HEIGHT],
+    [_SINGLES_LEFT, _COURT_LENGTH - constants.NO_MANS_LAND_HEIGHT],
+    [_SINGLES_RIGHT, _COURT_LENGTH - constants.NO_MANS_LAND_HEIGHT],
+    [_CENTER, constants.NO_MANS_LAND_HEIGHT], [_CENTER, _COURT_LENGTH - constants.NO_MANS_LAND_HEIGHT],
+], dtype=np.float64)
+
+
+def estimate_homography(court_points, image_points, ransac_threshold=None):
+    """
+    Estimates the homography mapping court coordinates to image pixels.
+
+    Parameters:
+    court_points (numpy array): (N, 2) reference points, in meters (N >= 4).
+    image_points (numpy array): (N, 2) matching pixel positions.
+    ransac_threshold (float): Reprojection error in pixels above which a keypoint is
+                              treated as an outlier (RANSAC), or None for a least-squares fit of all points.
+
+    Returns:
+    numpy array: The 3x3 homography.
+    """
+    court_points = np.asarray(court_points, dtype=np.float64).reshape(-1, 2)
+    image_points = np.asarray(image_points, dtype=np.float64).reshape(-1, 2)
+    if ransac_threshold is None:
+        homography, _ = cv2.findHomography(court_points, image_points, 0)
+    else:
+        homography, _ = cv2.findHomography(court_points, image_points, cv2.RANSAC, ransac_threshold)
+    if homography is None:
+        raise ValueError("Could not estimate a homography from the court keypoints")
+    return homography
+
+
+def apply_homography(homography, points):
+    """
+    Applies one homography, or one per leading index, to an array of points.
+
+    Parameters:
+    homography (numpy array): A (3, 3) homography, or (F, 3, 3) homographies for points of shape (F, ..., 2).
+    points (numpy array): Points of shape (..., 2); NaN points stay NaN.
+
+    Returns:
+    numpy array: The transformed points, with the same shape as `points`.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    homography = np.asarray(homography, dtype=np.float64)
+    if homography.ndim == 2:
+        transformed = points @ homography[:, :2].T + homography[:, 2]
+    else:
+        # Broadcast each frame's homography over the points of that frame
+        homography = homography.reshape((len(homography),) + (1,) * (points.ndim - 2) + (3, 3))
+        transformed = np.einsum('...ij,...j->...i', homography[..., :2], points) + homography[..., 2]
+    return transformed[..., :2] / transformed[..., 2:]
+
+
+def box_positions(boxes, anchor="bottom"):
+    """
+    Returns the ground position of bounding boxes.
+
+    Parameters:
+    boxes (numpy array): Boxes of shape (..., 4) in [x1, y1, x2, y2] format.
+    anchor (str): "bottom" for the bottom center (a player's feet) or "center" for the box center (the ball).
+
+    Returns:
+    numpy array: The positions, of shape (..., 2).
+    """
+    boxes = np.asarray(boxes, dtype=np.float64)
+    x = (boxes[..., 0] + boxes[..., 2]) / 2
+    y = boxes[..., 3] if anchor == "bottom" else (boxes[..., 1] + boxes[..., 3]) / 2
+    return np.stack([x, y], axis=-1)
+
+
+class CourtGeometry:
+    """
+    Maps positions between image pixels, court meters and drawing (e.g. mini court) pixels.
+
+    Homographies are estimated from the 14 predicted court keypoints against their real
+    positions (`COURT_KEYPOINTS_METERS`) and cached per distinct keypoint set, so they are
+    only re-estimated when the keypoints change (e.g. on a camera cut). All transforms take
+    whole arrays, e.g. the positions of every frame at once.
+    """
+
+    def __init__(self, reference_keypoints=COURT_KEYPOINTS_METERS, ransac_threshold=None, cache_size=64):
+        """
+        Parameters:
+        reference_keypoints (numpy array): The (14, 2) real keypoint positions, in meters.
+        ransac_threshold (float): See `estimate_homography`.
+        cache_size (int): The maximum number of keypoint sets whose homographies are kept.
+        """
+        self.reference_keypoints = np.asarray(reference_keypoints, dtype=np.float64)
+        self.ransac_threshold = ransac_threshold
+        self.cache_size = cache_size
+        self._homographies = {}  # Keypoint bytes -> (court to image, image to court)
+
+    def homographies(self, court_keypoints):
+        """
+        Returns the (court to image, image to court) homographies of a set of keypoints.
+
+        Parameters:
+        court_keypoints (list or numpy array): The flat [x0, y0, x1, y1, ...] keypoints of one frame.
+
+        Returns:
+        tuple: Two 3x3 numpy arrays.
+        """
+        court_keypoints = np.ascontiguousarray(court_keypoints, dtype=np.float64).reshape(-1)
+        key = court_keypoints.tobytes()
+        if key not in self._homographies:
+            if len(self._homographies) >= self.cache_size:
+                self._homographies.pop(next(iter(self._homographies)))
+            to_image = estimate_homography(self.reference_keypoints, court_keypoints, self.ransac_threshold)
+            self._homographies[key] = (to_image, np.linalg.inv(to_image))
+        return self._homographies[key]
+
+    def _frame_homographies(self, court_keypoints, inverse):
+        """Returns one homography per keypoint row (or a single one), estimating each distinct row once"""
+        court_keypoints = np.asarray(court_keypoints, dtype=np.float64)
+        which = 1 if inverse else 0
+        if court_keypoints.ndim == 1:
+            return self.homographies(court_keypoints)[which]
+
+        # Keypoints are usually repeated between keyframes (see `CourtLineDetector.predict_video`)
+        unique_keypoints, frame_rows = np.unique(court_keypoints, axis=0, return_inverse=True)
+        homographies = np.stack([self.homographies(row)[which] for row in unique_keypoints])
+        return homographies[frame_rows.reshape(-1)]
+
+    def pixels_to_meters(self, points, court_keypoints):
+        """
+        Projects image positions onto the court plane.
+
+        Parameters:
+        points (numpy array): Pixel positions of shape (..., 2), or (F, ..., 2) with per-frame keypoints.
+        court_keypoints (numpy array): The keypoints of the video (28,) or of every frame (F, 28).
+
+        Returns:
+        numpy array: The court positions in meters, with the same shape as `points`.
+        """
+        return apply_homography(self._frame_homographies(court_keypoints, inverse=True), points)
+
+    def meters_to_pixels(self, points, court_keypoints):
+        """Projects court positions in meters into the image (the inverse of `pixels_to_meters`)"""
+        return apply_homography(self._frame_homographies(court_keypoints, inverse=False), points)
+
+    def pixels_to_drawing(self, points, court_keypoints, origin, pixels_per_meter):
+        """
+        Projects image positions into a court drawing, such as the mini court.
+
+        Parameters:
+        points (numpy array): Pixel positions of shape (..., 2), or (F, ..., 2) with per-frame keypoints.
+        court_keypoints (numpy array): The keypoints of the video (28,) or of every frame (F, 28).
+        origin (tuple): The drawing position of the far-left doubles corner (keypoint 0).
+        pixels_per_meter (float): The scale of the drawing.
+
+        Returns:
+        numpy array: The drawing positions, with the same shape as `points`.
+        """
+        return self.pixels_to_meters(points, court_keypoints) * pixels_per_meter + np.asarray(origin, dtype=np.float64)
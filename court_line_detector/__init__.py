@@ -1 +1,6 @@
-from .court_line_detector import CourtLineDetector
\ No newline at end of file
+# The detector (and torch) is only imported on first access (see `utils.lazy_exports`)
+from utils.lazy_imports import lazy_exports
+
+_EXPORTS = {"CourtLineDetector": ".court_line_detector"}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
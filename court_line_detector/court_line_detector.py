@@ -1,46 +1,252 @@
-import torch
-import torchvision.transforms as transforms
 import cv2
-from torchvision import models
 import numpy as np
+import os
+import tempfile
+import time
+
+from .export import build_model, export_torchscript, export_onnx, quantize_static
+from overlay import FrameOverlay, OverlayRenderer
+from profiling import get_profiler
+
+# Input resolution of the keypoint model and the ImageNet normalization it was trained with
+INPUT_SIZE = 224
+MEAN = [0.485, 0.456, 0.406]
+STD = [0.229, 0.224, 0.225]
+
+# Size of the grayscale thumbnails compared by the scene-change test
+SIGNATURE_SIZE = (64, 36)
+
+# Inference backends selectable with `CourtLineDetector(backend=...)`
+BACKENDS = ("torch", "torchscript", "onnx", "int8")
 
 class CourtLineDetector:
-    def __init__(self, model_path):
-        self.model = models.resnet50(pretrained=True)
-        self.model.fc = torch.nn.Linear(self.model.fc.in_features, 14*2) 
-        self.model.load_state_dict(torch.load(model_path, map_location='cpu'))
-        self.transform = transforms.Compose([
-            transforms.ToPILImage(),
-            transforms.Resize((224, 224)),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
-        ])
+    def __init__(self, model_path, backend="torch", calibration_frames=None):
+        """
+        Parameters:
+        model_path (str): Path to the trained keypoint model state dict, or None for a randomly initialized stand-in.
+        backend (str): The inference backend:
+            "torch"       - FP32 eager PyTorch (default).
+            "torchscript" - FP32 traced and frozen TorchScript.
+            "onnx"        - FP32 ONNX Runtime (requires the `onnxruntime` package).
+            "int8"        - Statically int8-quantized PyTorch model (fbgemm), calibrated on `calibration_frames`.
+        calibration_frames (list of numpy arrays): Representative BGR frames, required by the "int8" backend.
+
+        The model is built on first use (see `model`), except for the "int8" backend, which
+        is calibrated here so that the calibration frames need not be kept.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+        self.backend = backend
+        self.model_path = model_path
+        self._model = None
+        self._transform = None
+
+        # Reusable buffers of the preprocessing path (see `preprocess_batch`)
+        self._input_batch = None  # Tensors created on first use, so that torch is only imported then
+        self._scale = None
+        self._offset = None
+
+        if backend == "int8":
+            if not calibration_frames:
+                raise ValueError("The int8 backend needs calibration_frames to calibrate the quantized model")
+            calibration_batches = [self.preprocess_batch(calibration_frames[i:i + 8]).clone()
+                                   for i in range(0, len(calibration_frames), 8)]
+            self._model = quantize_static(model_path, calibration_batches)
+
+    @property
+    def model(self):
+        """The model of the selected backend (an ONNX Runtime session for "onnx"), built on first access"""
+        if self._model is None:
+            model = build_model(self.model_path)
+            if self.backend == "torchscript":
+                model = export_torchscript(model, input_size=INPUT_SIZE)
+            elif self.backend == "onnx":
+                try:
+                    import onnxruntime
+                except ImportError as e:
+                    raise ImportError("The onnx backend requires the onnxruntime package") from e
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    onnx_path = os.path.join(tmp_dir, "keypoints_model.onnx")
+                    export_onnx(model, onnx_path, input_size=INPUT_SIZE)
+                    model = onnxruntime.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+            self._model = model
+        return self._model
+
+    @property
+    def transform(self):
+        """The reference torchvision preprocessing (PIL resize) the model was trained with, see `preprocess_batch`"""
+        if self._transform is None:
+            import torchvision.transforms as transforms
+            self._transform = transforms.Compose([
+                transforms.ToPILImage(),
+                transforms.Resize((INPUT_SIZE, INPUT_SIZE)),
+                transforms.ToTensor(),
+                transforms.Normalize(mean=MEAN, std=STD)
+            ])
+        return self._transform
 
     def predict(self, image):
-    
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        image_tensor = self.transform(image_rgb).unsqueeze(0)
-        with torch.no_grad():
-            outputs = self.model(image_tensor)
-        keypoints = outputs.squeeze().cpu().numpy()
-        original_h, original_w = image.shape[:2]
-        keypoints[::2] *= original_w / 224.0
-        keypoints[1::2] *= original_h / 224.0
+        """Predicts the court keypoints of a single BGR frame as a flat [x0, y0, x1, y1, ...] array"""
+        return self.predict_batch([image])[0]
+
+    def preprocess_batch(self, images):
+        """
+        Converts BGR frames into a normalized input batch for the model, without going through PIL.
+
+        Each frame is resized as uint8 by torch's antialiased bilinear interpolation, which
+        implements the same filter as the PIL resize the model was trained with (within one
+        gray level, at any scale), then converted to RGB, scaled and normalized in place into
+        a preallocated input tensor, so the only per-frame copy is the small resized image.
+        The returned tensor is overwritten by the next call, and the detector should not be
+        shared between threads.
+
+        Parameters:
+        images (list of numpy arrays): BGR frames.
+
+        Returns:
+        torch.Tensor: A (N, 3, INPUT_SIZE, INPUT_SIZE) float tensor.
+        """
+        import torch
+        import torch.nn.functional as F
+
+        if self._input_batch is None:
+            # Normalization folded into one multiply-subtract: (x / 255 - mean) / std = x * scale - offset
+            self._scale = (1.0 / (255.0 * torch.tensor(STD))).view(3, 1, 1)
+            self._offset = (torch.tensor(MEAN) / torch.tensor(STD)).view(3, 1, 1)
+        if self._input_batch is None or len(images) > len(self._input_batch):
+            self._input_batch = torch.empty((len(images), 3, INPUT_SIZE, INPUT_SIZE))
+        batch = self._input_batch[:len(images)]
+
+        for image, image_tensor in zip(images, batch):
+            # An HWC frame viewed as a channels-last NCHW tensor, which has a fast uint8 path
+            image = torch.from_numpy(np.ascontiguousarray(image)).permute(2, 0, 1).unsqueeze(0)
+            resized = F.interpolate(image, size=(INPUT_SIZE, INPUT_SIZE), mode="bilinear", antialias=True,
+                                    align_corners=False)[0]
+            # BGR -> RGB while converting to float into the input tensor
+            for channel in range(3):
+                image_tensor[channel].copy_(resized[2 - channel])
+            image_tensor.mul_(self._scale).sub_(self._offset)
+
+        return batch
+
+    def predict_batch(self, images):
+        """
+        Predicts the court keypoints of several frames with a single forward pass.
+
+        Parameters:
+        images (list of numpy arrays): BGR frames.
 
+        Returns:
+        numpy array: A (N, 28) array of [x0, y0, x1, y1, ...] keypoints in each frame's pixel coordinates.
+        """
+        profiler = get_profiler()
+        with profiler.stage("court.predict"):
+            phase_start = time.perf_counter()
+            batch = self.preprocess_batch(images)
+            preprocessed = time.perf_counter()
+            keypoints = self.forward(batch).reshape(len(images), -1)
+            inferred = time.perf_counter()
+
+            sizes = np.array([image.shape[:2] for image in images], dtype=keypoints.dtype)
+            keypoints[:, ::2] *= sizes[:, 1:2] / float(INPUT_SIZE)
+            keypoints[:, 1::2] *= sizes[:, 0:1] / float(INPUT_SIZE)
+        profiler.record_model_speed("court", images=len(images),
+                                    preprocess=1000 * (preprocessed - phase_start),
+                                    inference=1000 * (inferred - preprocessed),
+                                    postprocess=1000 * (time.perf_counter() - inferred))
         return keypoints
 
+    def forward(self, batch):
+        """
+        Runs the selected backend on a preprocessed batch.
+
+        Parameters:
+        batch (torch.Tensor): A (N, 3, INPUT_SIZE, INPUT_SIZE) input batch (see `preprocess_batch`).
+
+        Returns:
+        numpy array: The (N, 28) raw model outputs, in input-resolution pixels.
+        """
+        if self.backend == "onnx":
+            return self.model.run(None, {"image": batch.numpy()})[0]
+        import torch
+        with torch.no_grad():
+            return self.model(batch).cpu().numpy()
+
+    def frame_signature(self, image):
+        """Returns a small grayscale thumbnail of the frame used by the scene-change test"""
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def predict_video(self, frames, batch_size=8, scene_change_threshold=12.0, refresh_interval=None, smoothing=0.0):
+        """
+        Predicts the court keypoints of every frame of a video.
+
+        The model only runs on keyframes: the first frame, every frame whose thumbnail
+        differs from the last keyframe's by more than `scene_change_threshold` (mean absolute
+        gray-level difference, i.e. a camera cut or zoom) and, optionally, every
+        `refresh_interval` frames. Keyframes are run in batches of `batch_size`, and the
+        other frames reuse the keypoints of their keyframe. Keypoints of periodic refreshes
+        within the same scene can be smoothed with an exponential moving average.
+
+        Parameters:
+        frames (iterable of numpy arrays): The BGR frames of the video, e.g. the generator returned by `read_video`.
+        batch_size (int): The number of keyframes per forward pass.
+        scene_change_threshold (float): The mean absolute difference (0-255) above which the view is considered changed.
+        refresh_interval (int): Re-run the model every that many frames even without a scene change, or None.
+        smoothing (float): Weight of the previous keypoints when smoothing refreshes within a scene (0 disables smoothing).
+
+        Returns:
+        numpy array: A (num_frames, 28) array with the keypoints of every frame.
+        """
+        keyframe_keypoints = []
+        pending_keyframes = []
+        keyframe_is_cut = []
+        frame_keyframes = []
+        reference_signature = None
+        last_keyframe = 0
+
+        for frame_index, frame in enumerate(frames):
+            signature = self.frame_signature(frame)
+            is_cut = (reference_signature is None or
+                      np.abs(signature - reference_signature).mean() > scene_change_threshold)
+            is_refresh = refresh_interval is not None and frame_index - last_keyframe >= refresh_interval
+
+            if is_cut or is_refresh:
+                pending_keyframes.append(frame)
+                keyframe_is_cut.append(is_cut)
+                reference_signature = signature
+                last_keyframe = frame_index
+                if len(pending_keyframes) == batch_size:
+                    keyframe_keypoints.extend(self.predict_batch(pending_keyframes))
+                    pending_keyframes = []
+
+            frame_keyframes.append(len(keyframe_is_cut) - 1)
+
+        if pending_keyframes:
+            keyframe_keypoints.extend(self.predict_batch(pending_keyframes))
+
+        keyframe_keypoints = np.array(keyframe_keypoints).reshape(-1, 28)
+        if smoothing > 0:
+            for k in range(1, len(keyframe_keypoints)):
+                if not keyframe_is_cut[k]:
+                    keyframe_keypoints[k] = smoothing * keyframe_keypoints[k - 1] + (1 - smoothing) * keyframe_keypoints[k]
+
+        return keyframe_keypoints[frame_keyframes]
+
+    def add_to_overlay(self, overlay, keypoints):
+        """Adds the numbered keypoints of one frame to a `FrameOverlay`"""
+        for i in range(0, len(keypoints), 2):
+            overlay.add_point((keypoints[i], keypoints[i+1]), (0, 0, 255), 5, label=str(i//2))
+
     def draw_keypoints(self, image, keypoints):
         # Plot keypoints on the image
-        for i in range(0, len(keypoints), 2):
-            x = int(keypoints[i])
-            y = int(keypoints[i+1])
-            cv2.putText(image, str(i//2), (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
-            cv2.circle(image, (x, y), 5, (0, 0, 255), -1)
-        return image
+        overlay = FrameOverlay()
+        self.add_to_overlay(overlay, keypoints)
+        return overlay.render(image)
     
     def draw_keypoints_on_video(self, video_frames, keypoints):
-        output_video_frames = []
-        for frame in video_frames:
-            frame = self.draw_keypoints(frame, keypoints)
-            output_video_frames.append(frame)
-        return output_video_frames
\ No newline at end of file
+        # Annotate and yield frames one at a time so the video is never held in memory
+        # `keypoints` is either a single set for the whole video or one row per frame (see `predict_video`)
+        keypoints = np.asarray(keypoints)
+        renderer = OverlayRenderer([lambda i, overlay: self.add_to_overlay(overlay, keypoints[i] if keypoints.ndim == 2 else keypoints)])
+        return renderer.render(video_frames)
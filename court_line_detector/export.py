@@ -0,0 +1,107 @@
+# torch is imported inside the functions, so that importing the detector does not load it
+
+# Number of outputs of the keypoint head: 14 keypoints, (x, y) each
+NUM_OUTPUTS = 14 * 2
+
+
+def build_model(model_path, quantizable=False):
+    """
+    Builds the ResNet-50 keypoint model and loads the trained weights.
+
+    The backbone is not initialized with pretrained weights, since every parameter is
+    overwritten by the checkpoint anyway. Without a checkpoint, the model keeps its random
+    (seeded) initialization, which stands in for the trained model in benchmarks.
+
+    Parameters:
+    model_path (str): Path to the trained state dict (e.g. `keypoints_model_1.pth`), or None for random weights.
+    quantizable (bool): Whether to build torchvision's quantization-ready variant of ResNet-50.
+
+    Returns:
+    torch.nn.Module: The FP32 model in eval mode.
+    """
+    import torch
+    from torchvision import models
+    from torchvision.models import quantization
+
+    if model_path is None:
+        torch.manual_seed(0)
+    if quantizable:
+        model = quantization.resnet50(weights=None, quantize=False)
+    else:
+        model = models.resnet50(weights=None)
+    model.fc = torch.nn.Linear(model.fc.in_features, NUM_OUTPUTS)
+    if model_path is not None:
+        model.load_state_dict(torch.load(model_path, map_location='cpu'))
+    model.eval()
+    return model
+
+
+def export_torchscript(model, path=None, input_size=224):
+    """
+    Traces the model to TorchScript and freezes it for inference.
+
+    Parameters:
+    model (torch.nn.Module): The FP32 (or quantized) model in eval mode.
+    path (str): Optional path to save the TorchScript archive to.
+    input_size (int): The height and width of the model input.
+
+    Returns:
+    torch.jit.ScriptModule: The frozen TorchScript module.
+    """
+    import torch
+
+    with torch.no_grad():
+        scripted = torch.jit.trace(model, torch.zeros(1, 3, input_size, input_size))
+        scripted = torch.jit.optimize_for_inference(torch.jit.freeze(scripted))
+    if path is not None:
+        torch.jit.save(scripted, path)
+    return scripted
+
+
+def export_onnx(model, path, input_size=224):
+    """
+    Exports the model to ONNX with a dynamic batch dimension.
+
+    Parameters:
+    model (torch.nn.Module): The FP32 model in eval mode.
+    path (str): The path of the ONNX file to write.
+    input_size (int): The height and width of the model input.
+    """
+    import torch
+
+    torch.onnx.export(model, (torch.zeros(1, 3, input_size, input_size),), path,
+                      input_names=["image"], output_names=["keypoints"],
+                      dynamic_axes={"image": {0: "batch"}, "keypoints": {0: "batch"}},
+                      dynamo=False)
+
+
+def quantize_static(model_path, calibration_batches, engine="fbgemm"):
+    """
+    Builds a statically int8-quantized version of the keypoint model.
+
+    Conv, BatchNorm and ReLU layers are fused, observers are calibrated on
+    `calibration_batches`, and the model is converted to int8 kernels. Calibration
+    should use preprocessed frames of the footage the model will run on.
+
+    Parameters:
+    model_path (str): Path to the trained state dict.
+    calibration_batches (iterable of torch.Tensor): Preprocessed input batches (see `CourtLineDetector.preprocess_batch`).
+    engine (str): The quantized kernel backend, "fbgemm" (x86) or "qnnpack" (ARM).
+
+    Returns:
+    torch.nn.Module: The int8 model.
+    """
+    import torch
+
+    torch.backends.quantized.engine = engine
+    model = build_model(model_path, quantizable=True)
+    model.fuse_model()
+    model.qconfig = torch.ao.quantization.get_default_qconfig(engine)
+    torch.ao.quantization.prepare(model, inplace=True)
+
+    with torch.no_grad():
+        for batch in calibration_batches:
+            model(batch)
+
+    torch.ao.quantization.convert(model, inplace=True)
+    return model
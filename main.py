@@ -1,53 +1,251 @@
-from utils import save_video, read_video
-from trackers import PlayerTracker, BallTracker
-from court_line_detector import CourtLineDetector
-import cv2
+from utils import save_video, read_video, probe_video, DEFAULT_FPS
+from trackers import PlayerTracker, BallTracker, MultiModelDetector, DetectionCache, StreamingBallInterpolator
+from mini_court import MiniCourt
+from pipeline import Pipeline, Stage, process_video_sharded, run_live
+from overlay import FrameOverlay, OverlayRenderer, frame_number_layer
+from analytics import compute_match_stats
+from profiling import get_profiler, enable_profiling
+from collections import deque
+import argparse
+import time
 
-def main():
-    
-    # Read in the input-video frame
-    input_video_path = "data/input_video.mp4"
-    video_frames = read_video(input_video_path)
-    
-    # Detect players
-    player_tracker = PlayerTracker(model_path="yolov8x.pt")
-    ball_tracker = BallTracker(model_path="models/yolov5_last.pt")
-    
-    player_detections = player_tracker.detect_frames(video_frames, 
-                                                     read_from_stub=True, 
-                                                     stub_path="tracker_stubs/player_detections.pkl")
-    ball_detections = ball_tracker.detect_frames(video_frames,
-                                                 read_from_stub=False, 
-                                                 stub_path="tracker_stubs/ball_detections.pkl")
-    
-    ball_detections = ball_tracker.interpolate_ball_positions(ball_detections)
+# Default input, output and model paths of `main`
+INPUT_VIDEO_PATH = "data/input_video.mp4"
+OUTPUT_VIDEO_PATH = "data/output_videos/output_video.mp4"
+STATS_PATH = "data/output_videos/match_stats.csv"
+MODEL_PATHS = {"player": "yolov8x.pt", "ball": "models/yolov5_last.pt", "court": "models/keypoints_model_1.pth"}
+
+def load_models(model_paths=MODEL_PATHS, preload=True):
+    """
+    Loads the player, ball and court models.
+
+    Loading is the slow part of starting up, so the models are meant to be loaded once
+    and reused for every video passed to `process_video`.
+
+    Parameters:
+    model_paths (dict): The "player", "ball" and "court" model paths.
+    preload (bool): Load the models now; otherwise each model (and torch / ultralytics) is only
+                    loaded when first used, e.g. never for videos fully served by a `DetectionCache`.
+
+    Returns:
+    dict: The "player_tracker", "ball_tracker" and "court_line_detector".
+    """
+    # Imported here so that `import main` does not load the detector module
+    from court_line_detector import CourtLineDetector
+
+    models = {
+        "player_tracker": PlayerTracker(model_path=model_paths["player"]),
+        "ball_tracker": BallTracker(model_path=model_paths["ball"]),
+        "court_line_detector": CourtLineDetector(model_path=model_paths["court"]),
+    }
+    if preload:
+        for model in models.values():
+            model.model
+    return models
+
+def process_video(input_video_path, output_video_path, models, render_workers=0, cache=None, stats_path=None):
+    """
+    Detects, annotates and saves one video with already loaded models.
+
+    Frames are streamed from disk on every pass instead of being loaded into memory;
+    only the (small) per-frame detections are kept between passes.
+
+    Parameters:
+    input_video_path (str): The video to process.
+    output_video_path (str): The annotated output video.
+    models (dict): The models returned by `load_models`.
+    render_workers (int): The number of threads annotating frames.
+    cache (DetectionCache): The detection cache, or None.
+    stats_path (str): Where the per-frame player and ball statistics are saved as CSV, or None.
+
+    Returns:
+    dict: The number of frames and the wall time of each step, in seconds.
+    """
+    player_tracker = models["player_tracker"]
+    ball_tracker = models["ball_tracker"]
+    courtLine_detector = models["court_line_detector"]
+    profiler = get_profiler()
+    timings = {}
+    start_time = time.perf_counter()
+    # Frame rate of the output and of the statistics, assumed to be `DEFAULT_FPS` if the container has none
+    fps = probe_video(input_video_path, default_fps=DEFAULT_FPS)["fps"]
     
-    court_model_path = "models/keypoints_model_1.pth"
-    courtLine_detector = CourtLineDetector(model_path=court_model_path)
-    court_keypoints = courtLine_detector.predict(video_frames[0])
+    # The keypoint model only re-runs on camera cuts or zooms; other frames reuse the last keypoints
+    with profiler.stage("process.court"):
+        court_keypoints_per_frame = courtLine_detector.predict_video(read_video(input_video_path))
+        court_keypoints = court_keypoints_per_frame[0]
+    timings["court"] = time.perf_counter() - start_time
     
+    # Players are only searched for in the court area of the first frame, with fresh tracks for this video
+    player_tracker.set_court_region(court_keypoints)
+    player_tracker.reset_tracks()
     
-    # Choose players 
-    player_detections = player_tracker.choose_and_filter_players(court_keypoints, player_detections)
+    # Both models run concurrently on the same decoded frames; frames already
+    # detected by the same model and parameters are read from the cache
+    step_start = time.perf_counter()
+    with profiler.stage("process.detect"), MultiModelDetector(player_tracker, ball_tracker) as detector:
+        player_detections, ball_detections = detector.detect_frames(read_video(input_video_path), cache=cache)
+    timings["detect"] = time.perf_counter() - step_start
     
-    # Draw bounding boxes around players, ball and court lines
-    output_video_frames = player_tracker.draw_bounding_boxes(video_frames, player_detections)
-    output_video_frames = ball_tracker.draw_bounding_boxes(output_video_frames, ball_detections)
-    output_video_frames = courtLine_detector.draw_keypoints_on_video(output_video_frames, court_keypoints)
+    step_start = time.perf_counter()
+    with profiler.stage("process.postprocess"):
+        ball_detections = ball_tracker.interpolate_ball_positions(ball_detections)
+        
+        # Choose players 
+        player_detections = player_tracker.choose_and_filter_players(court_keypoints, player_detections)
+        
+        # Mini court: the static court is rendered once, only the player and ball markers change per frame
+        mini_court = MiniCourt(next(read_video(input_video_path)))
+        player_mini_court_positions = mini_court.project_detections(player_detections, court_keypoints_per_frame)
+        ball_mini_court_positions = mini_court.project_detections(ball_detections, court_keypoints_per_frame, anchor="center")
+    timings["postprocess"] = time.perf_counter() - step_start
     
+    # Player speeds and distances, ball hits and shot speeds, reusing the mini court's cached homographies
+    if stats_path is not None:
+        step_start = time.perf_counter()
+        with profiler.stage("process.analytics"):
+            match_stats = compute_match_stats(player_detections, ball_detections, court_keypoints_per_frame,
+                                              fps=fps, geometry=mini_court.geometry)
+            match_stats.to_csv(stats_path)
+        timings["analytics"] = time.perf_counter() - step_start
     
-    # Draw frame number on top left corner 
-    for i, frame in enumerate(output_video_frames):
-        cv2.putText(frame, f"Frame: {i}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+    # Draw players, ball, court keypoints, mini court and frame numbers
+    # Every layer adds its primitives to one overlay per frame, rendered in place in a single pass
+    # while the frames stream to the encoder
+    step_start = time.perf_counter()
+    renderer = OverlayRenderer([
+        lambda i, overlay: player_tracker.add_to_overlay(overlay, player_detections[i]),
+        lambda i, overlay: ball_tracker.add_to_overlay(overlay, ball_detections[i]),
+        lambda i, overlay: courtLine_detector.add_to_overlay(overlay, court_keypoints_per_frame[i]),
+        lambda i, overlay: mini_court.add_to_overlay(overlay, player_mini_court_positions[i], ball_mini_court_positions[i]),
+        frame_number_layer,
+    ], workers=render_workers)
+    output_video_frames = renderer.render(read_video(input_video_path))
     
-    # output_video_path = "data/output_videos/output_video.avi"
-    # output_video_path_ball = "data/output_videos/output_video_ball.avi"
-    output_video_path = "data/output_videos/output_video.avi"
+    # Keep the frame rate of the input, and encode on a background thread while the next frames are annotated
+    with profiler.stage("process.render"):
+        save_video(output_video_frames, output_video_path, fps=fps, background=True)
+    timings["render"] = time.perf_counter() - step_start
     
-    # Save the output video with player bounding boxes
-    # save_video(output_video_frames, output_video_path)
-    # save_video(output_video_path_ball, output_video_path_ball)
-    save_video(output_video_frames, output_video_path)
+    timings["frames"] = len(court_keypoints_per_frame)
+    timings["total"] = time.perf_counter() - start_time
+    return timings
+
+def main(render_workers=0):
+    models = load_models(MODEL_PATHS)
+    detection_cache = DetectionCache(cache_dir="cache/detections")
+    process_video(INPUT_VIDEO_PATH, OUTPUT_VIDEO_PATH, models, render_workers=render_workers, cache=detection_cache,
+                  stats_path=STATS_PATH)
     
+def main_pipelined(queue_size=8, ball_lookahead=30):
+    """
+    Single-pass variant of `main` where decoding, player detection, ball detection,
+    drawing and encoding run concurrently on their own threads (see `pipeline.Pipeline`).
+
+    Players are chosen on the first frame as in `main`. Ball positions are interpolated
+    with a bounded look-ahead, so frames are held back by at most `2 * ball_lookahead` frames.
+    """
+    input_video_path = INPUT_VIDEO_PATH
+    output_video_path = OUTPUT_VIDEO_PATH
+
+    models = load_models(MODEL_PATHS)
+    player_tracker = models["player_tracker"]
+    ball_tracker = models["ball_tracker"]
+    courtLine_detector = models["court_line_detector"]
+    first_frame = next(read_video(input_video_path))
+    court_keypoints = courtLine_detector.predict(first_frame)
+    player_tracker.set_court_region(court_keypoints)
+    mini_court = MiniCourt(first_frame)
+
+    chosen_players = []
+
+    def detect_players(item):
+        item["players"] = player_tracker.detect_frame(item["frame"])
+        return item
+
+    def detect_ball(item):
+        item["ball"] = ball_tracker.detect_frame(item["frame"])
+        return item
+
+    ball_interpolator = StreamingBallInterpolator(lookahead=ball_lookahead)
+    held_items = deque()
+
+    def release_items(ball_dicts):
+        released = []
+        for ball_dict in ball_dicts:
+            item = held_items.popleft()
+            item["ball"] = ball_dict
+            released.append(item)
+        return released
+
+    def interpolate_ball(item):
+        held_items.append(item)
+        return release_items(ball_interpolator.push(item["ball"]))
+
+    def draw(item):
+        if not chosen_players:
+            chosen_players.extend(player_tracker.choose_players(court_keypoints, item["players"]))
+        players = {track_id: bbox for track_id, bbox in item["players"].items() if track_id in chosen_players}
+
+        overlay = FrameOverlay()
+        player_tracker.add_to_overlay(overlay, players)
+        ball_tracker.add_to_overlay(overlay, item["ball"])
+        courtLine_detector.add_to_overlay(overlay, court_keypoints)
+        mini_court.add_to_overlay(overlay,
+                                  mini_court.project_detections([players], court_keypoints)[0],
+                                  mini_court.project_detections([item["ball"]], court_keypoints, anchor="center")[0])
+        frame_number_layer(item["index"], overlay)
+        overlay.render(item["frame"])
+        return item
+
+    pipeline = Pipeline([Stage("players", detect_players),
+                         Stage("ball", detect_ball),
+                         Stage("interpolate", interpolate_ball, many=True,
+                               flush=lambda: release_items(ball_interpolator.flush())),
+                         Stage("draw", draw)],
+                        queue_size=queue_size)
+
+    items = ({"index": i, "frame": frame} for i, frame in enumerate(read_video(input_video_path)))
+    save_video((item["frame"] for item in pipeline.run(items)), output_video_path,
+               fps=probe_video(input_video_path, default_fps=DEFAULT_FPS)["fps"])
+
+    print(pipeline.format_report())
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pipelined", action="store_true",
+                        help="Run decoding, detection, drawing and encoding concurrently in a single pass")
+    parser.add_argument("--queue-size", type=int, default=8,
+                        help="Maximum number of frames waiting in front of each pipeline stage")
+    parser.add_argument("--shards", type=int, default=0,
+                        help="Split the video into this many overlapping frame ranges processed by a process pool")
+    parser.add_argument("--render-workers", type=int, default=0,
+                        help="Number of threads annotating frames (0 annotates on the main thread)")
+    parser.add_argument("--live", metavar="SOURCE",
+                        help="Annotate a camera index, stream URL or pipe in real time (a file is replayed at its native FPS)")
+    parser.add_argument("--latency-budget", type=float, default=100.0,
+                        help="Target capture-to-output latency of --live, in milliseconds")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="Record per-stage timings and write them to PATH as JSON and to PATH.prom for Prometheus")
+    args = parser.parse_args()
+
+    if args.profile:
+        enable_profiling()
+
+    if args.live is not None:
+        source = int(args.live) if args.live.isdigit() else args.live
+        report = run_live(source, load_models(MODEL_PATHS), OUTPUT_VIDEO_PATH, latency_budget_ms=args.latency_budget)
+        print(report)
+    elif args.shards:
+        timings = process_video_sharded(INPUT_VIDEO_PATH, OUTPUT_VIDEO_PATH, MODEL_PATHS, num_workers=args.shards)
+        print(timings)
+    elif args.pipelined:
+        main_pipelined(queue_size=args.queue_size)
+    else:
+        main(render_workers=args.render_workers)
+
+    if args.profile:
+        profiler = get_profiler()
+        profiler.to_json(args.profile)
+        profiler.to_prometheus(args.profile + ".prom")
+        print(profiler.format_report())
@@ -0,0 +1,6 @@
+# The mini court is only imported on first access (see `utils.lazy_exports`)
+from utils.lazy_imports import lazy_exports
+
+_EXPORTS = {"MiniCourt": ".mini_court"}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
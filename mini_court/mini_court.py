@@ -1,14 +1,14 @@
 import cv2
-import sys
 import numpy as np
-sys.path.append("../")
 import constants
 from utils import convert_pixel_distance_to_meters, convert_meters_distance_to_pixels
+from court_geometry import CourtGeometry, COURT_KEYPOINTS_METERS, box_positions
+from overlay import OverlayRenderer
 
 class MiniCourt():
     def __init__(self, frame):
         self.drawing_rectangle_width = 250  # Set the width of the rectangle to be drawn on the court
-        self.drawing_rectangle_height = 450 # Set the height of the rectangle to be drawn on the court
+        self.drawing_rectangle_height = 500 # Set the height of the rectangle to be drawn on the court (fits the court length at this width)
         self.buffer = 50 # Buffer to be used around the drawing area
         self.padding_count = 20 # Padding for other drawing purposes (possibly for spacing elements)
 
@@ -16,6 +16,8 @@ class MiniCourt():
         self.set_mini_court_position() # Set the position of the mini court based on the canvas background box
         self.set_court_drawing_kepypoints() # Set the key points for drawing the court
         self.set_court_lines() # Set the lines for the court
+        self.geometry = CourtGeometry() # Homographies between the video and the court, cached per keypoint set
+        self.render_background() # Rasterise the static part of the overlay once
         
     def convert_meters_pixels(self, meters):
         return convert_meters_distance_to_pixels(meters, 
@@ -24,52 +26,30 @@ class MiniCourt():
                                                 )
         
     def set_court_drawing_kepypoints(self):
-        drawing_key_points = [0]*28
-
-        # point 0 
-        drawing_key_points[0] , drawing_key_points[1] = int(self.court_start_x), int(self.court_start_y)
-        # point 1
-        drawing_key_points[2] , drawing_key_points[3] = int(self.court_end_x), int(self.court_start_y)
-        # point 2
-        drawing_key_points[4] = int(self.court_start_x)
-        drawing_key_points[5] = self.court_start_y + self.convert_meters_to_pixels(constants.HALF_COURT_LINE_HEIGHT*2)
-        # point 3
-        drawing_key_points[6] = drawing_key_points[0] + self.court_drawing_width
-        drawing_key_points[7] = drawing_key_points[5] 
-        # #point 4
-        drawing_key_points[8] = drawing_key_points[0] +  self.convert_meters_to_pixels(constants.DOUBLE_ALLY_DIFFERENCE)
-        drawing_key_points[9] = drawing_key_points[1] 
-        # #point 5
-        drawing_key_points[10] = drawing_key_points[4] + self.convert_meters_to_pixels(constants.DOUBLE_ALLY_DIFFERENCE)
-        drawing_key_points[11] = drawing_key_points[5] 
-        # #point 6
-        drawing_key_points[12] = drawing_key_points[2] - self.convert_meters_to_pixels(constants.DOUBLE_ALLY_DIFFERENCE)
-        drawing_key_points[13] = drawing_key_points[3] 
-        # #point 7
-        drawing_key_points[14] = drawing_key_points[6] - self.convert_meters_to_pixels(constants.DOUBLE_ALLY_DIFFERENCE)
-        drawing_key_points[15] = drawing_key_points[7] 
-        # #point 8
-        drawing_key_points[16] = drawing_key_points[8] 
-        drawing_key_points[17] = drawing_key_points[9] + self.convert_meters_to_pixels(constants.NO_MANS_LAND_HEIGHT)
-        # # #point 9
-        drawing_key_points[18] = drawing_key_points[16] + self.convert_meters_to_pixels(constants.SINGLE_LINE_WIDTH)
-        drawing_key_points[19] = drawing_key_points[17] 
-        # #point 10
-        drawing_key_points[20] = drawing_key_points[10] 
-        drawing_key_points[21] = drawing_key_points[11] - self.convert_meters_to_pixels(constants.NO_MANS_LAND_HEIGHT)
-        # # #point 11
-        drawing_key_points[22] = drawing_key_points[20] +  self.convert_meters_to_pixels(constants.SINGLE_LINE_WIDTH)
-        drawing_key_points[23] = drawing_key_points[21] 
-        # # #point 12
-        drawing_key_points[24] = int((drawing_key_points[16] + drawing_key_points[18])/2)
-        drawing_key_points[25] = drawing_key_points[17] 
-        # # #point 13
-        drawing_key_points[26] = int((drawing_key_points[20] + drawing_key_points[22])/2)
-        drawing_key_points[27] = drawing_key_points[21] 
-
-        self.drawing_key_points=drawing_key_points
-
-       
+        # The drawing is a scaled top view of the court: keypoint 0 sits at the court start
+        # and every other keypoint at its real position (see `COURT_KEYPOINTS_METERS`)
+        self.pixels_per_meter = self.court_drawing_width / constants.DOUBLE_LINE_WIDTH
+        self.court_origin = (self.court_start_x, self.court_start_y)
+        drawing_key_points = COURT_KEYPOINTS_METERS * self.pixels_per_meter + self.court_origin
+
+        self.drawing_key_points = drawing_key_points.astype(int).ravel().tolist()
+
+    def project_positions(self, positions, court_keypoints, geometry=None):
+        """
+        Projects image positions (e.g. the players' feet or the ball of every frame) into the mini court.
+
+        Parameters:
+        positions (numpy array): Pixel positions of shape (..., 2), or (F, ..., 2) with per-frame keypoints.
+        court_keypoints (numpy array): The court keypoints of the video (28,) or of every frame (F, 28).
+        geometry (CourtGeometry): The geometry whose cached homographies are used, or None for the mini court's own.
+
+        Returns:
+        numpy array: The mini court positions, with the same shape as `positions`.
+        """
+        if geometry is None:
+            geometry = self.geometry
+        return geometry.pixels_to_drawing(positions, court_keypoints, self.court_origin, self.pixels_per_meter)
+
     def set_court_lines(self):
         self.lines = [
             (0, 2),
@@ -92,35 +72,144 @@ class MiniCourt():
         self.court_drawing_width = self.court_end_x - self.court_start_x # Calculate the width of the mini court
 
     def set_canvas_background_box_position(self, frame):
-        frame = frame.copy()
-
         self.end_x = frame.shape[1] - self.buffer  # Calculate the ending x-coordinate (right edge) of the drawing box
         self.end_y = self.buffer + self.drawing_rectangle_height # Calculate the ending y-coordinate (bottom edge) of the drawing box
         self.start_x = self.end_x - self.drawing_rectangle_width # Calculate the starting x-coordinate (left edge) based on end_x and width
         self.start_y = self.end_y - self.drawing_rectangle_height # Calculate the starting y-coordinate (top edge) based on end_y and height
 
-    def draw_background_rectangle(self, frame):
-       # Create an empty canvas with the same shape as the input frame
-       shapes = np.zeros_like(frame, np.uint8)
+    def render_background(self):
+        """
+        Rasterises the static part of the overlay (background, court lines and keypoints) once.
+
+        The result covers only the drawing rectangle: the white background that is blended
+        with the frame, and the court layer with a mask of its opaque pixels.
+        """
+        height = self.end_y - self.start_y
+        width = self.end_x - self.start_x
+        self._background = np.full((height, width, 3), 255, dtype=np.uint8)
+
+        court = self._background.copy()
+        key_points = np.array(self.drawing_key_points).reshape(-1, 2) - (self.start_x, self.start_y)
+        for start, end in self.lines:
+            cv2.line(court, tuple(map(int, key_points[start])), tuple(map(int, key_points[end])), (0, 0, 0), 2)
+
+        # Net, halfway between the baselines
+        net_y = int((key_points[0, 1] + key_points[2, 1]) / 2)
+        cv2.line(court, (int(key_points[0, 0]), net_y), (int(key_points[1, 0]), net_y), (255, 0, 0), 2)
+
+        for x, y in key_points:
+            cv2.circle(court, (int(x), int(y)), 5, (0, 0, 255), -1)
+
+        self._court_layer = court
+        self._court_mask = np.any(court != self._background, axis=2).astype(np.uint8)
+
+    def draw_background_rectangle(self, frame, alpha=0.5):
+        """
+        Blends the background rectangle into the frame, in place.
+
+        Only the rectangle's slice of the frame is touched: no full-frame canvas or mask is allocated.
+
+        Parameters:
+        frame (numpy array): A BGR video frame.
+        alpha (float): The weight of the frame in the blend.
+
+        Returns:
+        numpy array: The same frame.
+        """
+        roi, cached = self._roi(frame)
+        cv2.addWeighted(roi, alpha, self._background[cached], 1 - alpha, 0, dst=roi)
+        return frame
+
+    def draw_court(self, frame, alpha=0.5):
+        """Draws the cached mini court (background, lines and keypoints) on the frame, in place"""
+        self.draw_background_rectangle(frame, alpha)
+        roi, cached = self._roi(frame)
+        cv2.copyTo(self._court_layer[cached], self._court_mask[cached], roi)
+        return frame
+
+    def _roi(self, frame):
+        """Returns the frame slice covered by the drawing rectangle and the matching slice of the cached images"""
+        x1, y1 = max(self.start_x, 0), max(self.start_y, 0)
+        roi = frame[y1:self.end_y, x1:self.end_x]
+        cached = (slice(y1 - self.start_y, y1 - self.start_y + roi.shape[0]),
+                  slice(x1 - self.start_x, x1 - self.start_x + roi.shape[1]))
+        return roi, cached
+
+    def draw_markers(self, frame, positions, color, radius=5):
+        """
+        Draws markers at mini court positions, in place.
+
+        Parameters:
+        frame (numpy array): A BGR video frame.
+        positions (dict or numpy array): Mini court (x, y) positions, e.g. from `project_detections`; NaN positions are skipped.
+        color (tuple): The BGR marker color.
+        radius (int): The marker radius in pixels.
+        """
+        if isinstance(positions, dict):
+            positions = list(positions.values())
+        for x, y in np.asarray(positions, dtype=np.float64).reshape(-1, 2):
+            if np.isfinite(x) and np.isfinite(y):
+                cv2.circle(frame, (int(x), int(y)), radius, color, -1)
+        return frame
+
+    def project_detections(self, detections, court_keypoints, anchor="bottom"):
+        """
+        Projects per-frame detections into the mini court with a single vectorized transform.
+
+        Parameters:
+        detections (list of dict): Per-frame dictionaries mapping IDs to [x1, y1, x2, y2] boxes.
+        court_keypoints (numpy array): The court keypoints of the video (28,) or of every frame (F, 28).
+        anchor (str): The point of each box that is projected, see `box_positions`
+                      ("bottom" for players' feet, "center" for the ball).
+
+        Returns:
+        list of dict: Per-frame dictionaries mapping IDs to mini court (x, y) positions.
+        """
+        frame_indices = [i for i, detection_dict in enumerate(detections) for _ in detection_dict]
+        boxes = np.array([bbox for detection_dict in detections for bbox in detection_dict.values()],
+                         dtype=np.float64).reshape(-1, 4)
+        if not len(boxes):
+            return [{} for _ in detections]
+
+        court_keypoints = np.asarray(court_keypoints, dtype=np.float64)
+        if court_keypoints.ndim == 2:
+            court_keypoints = court_keypoints[frame_indices]
+        positions = self.project_positions(box_positions(boxes, anchor), court_keypoints).tolist()
 
-       # Draw a filled white rectangle on the canvas at the specified coordinates
-       cv2.rectangle(shapes, 
-                    (self.start_x, self.start_y), 
-                    (self.end_x, self.end_y), 
-                    (255, 255, 255),      # White color
-                    cv2.FILLED            # Fill the entire rectangle
-                    )
+        projected = []
+        position_iter = iter(positions)
+        for detection_dict in detections:
+            projected.append({track_id: next(position_iter) for track_id in detection_dict})
+        return projected
 
-       alpha = 0.5  # Set the transparency factor for blending
+    def add_to_overlay(self, overlay, player_positions=None, ball_positions=None):
+        """
+        Adds the mini court and the markers of one frame to a `FrameOverlay`.
 
-       # Create a boolean mask where the rectangle exists
-       mask = shapes.astype(bool)
+        Parameters:
+        overlay (FrameOverlay): The overlay of the frame.
+        player_positions (dict): Mini court player positions of the frame (see `project_detections`), or None.
+        ball_positions (dict): Mini court ball positions of the frame, or None.
+        """
+        overlay.add_layer(self.draw_court)
+        for positions, color in ((player_positions, (0, 255, 0)), (ball_positions, (0, 255, 255))):
+            for position in (positions or {}).values():
+                overlay.add_point(position, color, 5)
 
-       # Blend the original frame with the rectangle using alpha transparency
-       # and apply it only where the mask is true
-       out[mask] = cv2.addWeighted(frame, alpha, shapes, 1 - alpha, 0)[mask]
+    def draw_mini_court(self, video_frames, player_positions=None, ball_positions=None):
+        """
+        Draws the mini court with the players and the ball on each frame.
 
-       # Convert the output from BGR to RGB color space (common for display purposes)
-       out = cv2.cvtColor(out, cv2.COLOR_BGR2RGB)
+        Frames are annotated in place and yielded one at a time, so `video_frames` can be a
+        generator. Per frame, only the rectangle is blended and the moving markers are drawn.
 
-       return out
+        Parameters:
+        video_frames (iterable of numpy arrays): The BGR frames.
+        player_positions (list of dict): Per-frame mini court player positions (see `project_detections`), or None.
+        ball_positions (list of dict): Per-frame mini court ball positions, or None.
+        """
+        renderer = OverlayRenderer([lambda i, overlay: self.add_to_overlay(
+            overlay,
+            player_positions[i] if player_positions is not None else None,
+            ball_positions[i] if ball_positions is not None else None)])
+        return renderer.render(video_frames)
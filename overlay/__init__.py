@@ -0,0 +1 @@
+from .overlay import FrameOverlay, OverlayRenderer, frame_number_layer
@@ -0,0 +1,150 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from profiling import get_profiler
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+class FrameOverlay:
+    """
+    The drawable primitives of one frame: boxes, texts, points and custom layers.
+
+    Primitives are only collected by the `add_*` methods; `render` draws all of them
+    on the frame in one pass, in place, in the order they were added.
+    """
+
+    def __init__(self):
+        self.primitives = []
+
+    def __len__(self):
+        return len(self.primitives)
+
+    def add_box(self, bbox, color, thickness=2, label=None, label_color=None, label_scale=0.9):
+        """
+        Adds a rectangle, optionally with a label above its top-left corner.
+
+        Parameters:
+        bbox (list): The [x1, y1, x2, y2] box.
+        color (tuple): The BGR color of the rectangle.
+        thickness (int): The line thickness.
+        label (str): The text drawn above the box, or None.
+        label_color (tuple): The BGR color of the label (defaults to `color`).
+        label_scale (float): The font scale of the label.
+        """
+        x1, y1, x2, y2 = bbox
+        if x1 != x1 or y1 != y1 or x2 != x2 or y2 != y2:  # Skip NaN boxes (e.g. a ball never detected)
+            return
+        if label is not None:
+            self.add_text(label, (x1, y1 - 10), label_color or color, label_scale, 2)
+        self.primitives.append(("box", (int(x1), int(y1)), (int(x2), int(y2)), color, thickness))
+
+    def add_text(self, text, origin, color, scale=1.0, thickness=2):
+        """Adds a text whose bottom-left corner is at `origin`"""
+        self.primitives.append(("text", str(text), (int(origin[0]), int(origin[1])), color, scale, thickness))
+
+    def add_point(self, point, color, radius=5, label=None, label_scale=0.5):
+        """Adds a filled circle, optionally with a label above it"""
+        x, y = point
+        if x != x or y != y:  # Skip NaN positions
+            return
+        if label is not None:
+            self.add_text(label, (x, y - 10), color, label_scale, 2)
+        self.primitives.append(("point", (int(x), int(y)), radius, color))
+
+    def add_layer(self, draw_fn):
+        """Adds a custom drawing function `draw_fn(frame)` that annotates the frame in place"""
+        self.primitives.append(("layer", draw_fn))
+
+    def render(self, frame):
+        """
+        Draws every primitive on the frame, in place.
+
+        Parameters:
+        frame (numpy array): A BGR frame.
+
+        Returns:
+        numpy array: The same frame.
+        """
+        for primitive in self.primitives:
+            kind = primitive[0]
+            if kind == "box":
+                cv2.rectangle(frame, primitive[1], primitive[2], primitive[3], primitive[4])
+            elif kind == "text":
+                cv2.putText(frame, primitive[1], primitive[2], FONT, primitive[4], primitive[3], primitive[5])
+            elif kind == "point":
+                cv2.circle(frame, primitive[1], primitive[2], primitive[3], -1)
+            else:
+                primitive[1](frame)
+        return frame
+
+
+def frame_number_layer(frame_index, overlay):
+    """Layer drawing the frame number on the top left corner"""
+    overlay.add_text(f"Frame: {frame_index}", (10, 30), (0, 255, 0), 1, 2)
+
+
+class OverlayRenderer:
+    """
+    Annotates a stream of frames in a single pass.
+
+    Each layer is a function `layer(frame_index, overlay)` that adds the primitives of one
+    frame to a `FrameOverlay` (e.g. `PlayerTracker.add_to_overlay` over per-frame detections).
+    For every frame, all layers are collected into one overlay which is rendered in place,
+    so the cost scales with the number of primitives rather than with the number of layers
+    walking the video. With `workers` > 0, frames are rendered on a thread pool (OpenCV
+    drawing releases the GIL) and yielded in order, with at most `max_pending` frames in flight.
+    """
+
+    def __init__(self, layers=(), workers=0, max_pending=None):
+        """
+        Parameters:
+        layers (list of callables): The layers, drawn in order.
+        workers (int): The number of rendering threads, or 0 to render on the calling thread.
+        max_pending (int): The maximum number of frames being rendered at once (defaults to 2 * workers).
+        """
+        self.layers = list(layers)
+        self.workers = workers
+        self.max_pending = max_pending or 2 * workers
+
+    def add_layer(self, layer):
+        self.layers.append(layer)
+        return self
+
+    def overlay(self, frame_index):
+        """Collects the primitives of every layer for one frame"""
+        overlay = FrameOverlay()
+        for layer in self.layers:
+            layer(frame_index, overlay)
+        return overlay
+
+    def render_frame(self, frame_index, frame):
+        """Annotates one frame in place and returns it"""
+        with get_profiler().stage("overlay.render"):
+            return self.overlay(frame_index).render(frame)
+
+    def render(self, frames):
+        """
+        Annotates the frames in place and yields them in order, one at a time.
+
+        Parameters:
+        frames (iterable of numpy arrays): The BGR frames, e.g. the generator returned by `read_video`.
+
+        Yields:
+        numpy array: The annotated frames.
+        """
+        if self.workers <= 0:
+            for frame_index, frame in enumerate(frames):
+                yield self.render_frame(frame_index, frame)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            for frame_index, frame in enumerate(frames):
+                pending.append(executor.submit(self.render_frame, frame_index, frame))
+                if len(pending) >= self.max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
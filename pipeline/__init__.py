@@ -0,0 +1,10 @@
+# Public names are imported from their submodule on first access (see `utils.lazy_exports`)
+from utils.lazy_imports import lazy_exports
+
+_EXPORTS = {
+    "Pipeline": ".pipeline", "Stage": ".pipeline",
+    "process_video_sharded": ".sharded", "plan_shards": ".sharded", "reconcile_track_ids": ".sharded",
+    "LatestFrameGrabber": ".live", "LiveProcessor": ".live", "run_live": ".live",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
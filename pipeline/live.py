@@ -0,0 +1,283 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class LatestFrameGrabber:
+    """
+    Reads a live source on a background thread and keeps only its latest frame.
+
+    Frames that are not picked up before the next one arrives are dropped, so a slow
+    consumer always works on the most recent frame instead of falling further behind.
+    Files are replayed at their native frame rate (`realtime=True`) to stand in for a
+    camera; cameras, stream URLs and pipes are read as fast as they deliver frames.
+    """
+
+    def __init__(self, source, realtime=None):
+        """
+        Parameters:
+        source (int or str): A camera index, a stream URL (e.g. rtsp://...), a pipe or a video file.
+        realtime (bool): Pace reading at the source FPS; defaults to True for local files.
+        """
+        self.source = source
+        self.capture = cv2.VideoCapture(source)
+        if not self.capture.isOpened():
+            raise IOError(f"Could not open video source {source!r}")
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        if realtime is None:
+            realtime = isinstance(source, str) and "://" not in source
+        self.realtime = realtime
+
+        self.captured = 0  # Frames read from the source
+        self.dropped = 0  # Frames replaced by a newer one before being picked up
+        self._latest = None
+        self._finished = False
+        self._condition = threading.Condition()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._read_loop, name="frame-grabber", daemon=True)
+        self._thread.start()
+
+    def _read_loop(self):
+        start_time = time.perf_counter()
+        try:
+            while not self._stopping.is_set():
+                if self.realtime:
+                    # Wait until the frame would have been captured by a live camera
+                    delay = start_time + self.captured / self.fps - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                ret, frame = self.capture.read()
+                if not ret:
+                    break
+                with self._condition:
+                    if self._latest is not None:
+                        self.dropped += 1
+                    self._latest = (self.captured, time.perf_counter(), frame)
+                    self.captured += 1
+                    self._condition.notify()
+        finally:
+            self.capture.release()
+            with self._condition:
+                self._finished = True
+                self._condition.notify()
+
+    def read(self):
+        """
+        Waits for the next frame.
+
+        Returns:
+        tuple: (frame index, capture time from `time.perf_counter`, frame), or None at the end of the source.
+        """
+        with self._condition:
+            while self._latest is None and not self._finished:
+                self._condition.wait()
+            latest, self._latest = self._latest, None
+            return latest
+
+    def stop(self):
+        self._stopping.set()
+        self._thread.join()
+
+
+class LiveProcessor:
+    """
+    Runs player, ball and court detection on a live source under a per-frame latency budget.
+
+    Only the latest frame is processed (see `LatestFrameGrabber`), and frames already older
+    than the budget when picked up are dropped. Work is skipped adaptively to stay within
+    the budget, based on a moving average of the recent frame latencies:
+      - court keypoints are only re-predicted on a scene change or every `court_refresh` seconds;
+        the player detection region is only moved on a scene change, which also starts new tracks;
+      - when frames run over budget, the ball detector only runs every few frames and the
+        ball position is predicted by a Kalman filter in between.
+    The two players are chosen again whenever the court keypoints are updated, and when none
+    of the chosen tracks has been seen for `player_timeout` processed frames.
+    Every processed frame is annotated and emitted with its detections and latency.
+    """
+
+    def __init__(self, player_tracker, ball_tracker, court_line_detector, latency_budget_ms=100.0,
+                 court_refresh=5.0, scene_change_threshold=12.0, max_ball_skip=4, player_timeout=30):
+        """
+        Parameters:
+        player_tracker (PlayerTracker): The player tracker.
+        ball_tracker (BallTracker): The ball tracker.
+        court_line_detector (CourtLineDetector): The court keypoint detector.
+        latency_budget_ms (float): The target latency from capture to emitted frame.
+        court_refresh (float): The maximum age of the court keypoints, in seconds.
+        scene_change_threshold (float): See `CourtLineDetector.predict_video`.
+        max_ball_skip (int): The maximum number of consecutive frames without ball detection.
+        player_timeout (int): The number of processed frames without any chosen player before they are chosen again.
+        """
+        from trackers import BallKalmanFilter
+
+        self.player_tracker = player_tracker
+        self.ball_tracker = ball_tracker
+        self.court_line_detector = court_line_detector
+        self.latency_budget = latency_budget_ms / 1000
+        self.court_refresh = court_refresh
+        self.scene_change_threshold = scene_change_threshold
+        self.max_ball_skip = max_ball_skip
+        self.player_timeout = player_timeout
+        self.ball_filter = BallKalmanFilter()
+        self.latencies = []
+        self.stale = 0
+        self.ball_skipped = 0
+        self.court_updates = 0
+
+    def run(self, grabber):
+        """
+        Processes the frames of a grabber until its source ends.
+
+        Parameters:
+        grabber (LatestFrameGrabber): The live source.
+
+        Yields:
+        dict: For every processed frame, its "index", annotated "frame", "players",
+              "ball", "court_keypoints" and end-to-end "latency" (seconds).
+        """
+        from overlay import FrameOverlay, frame_number_layer
+        from mini_court import MiniCourt
+
+        mini_court = None
+        court_keypoints = None
+        court_signature = None
+        court_time = 0.0
+        chosen_players = []
+        players_missing = 0
+        ball_box_size = None
+        ball_skip = 0
+        smoothed_latency = 0.0
+
+        while True:
+            grabbed = grabber.read()
+            if grabbed is None:
+                return
+            frame_index, capture_time, frame = grabbed
+            if time.perf_counter() - capture_time > self.latency_budget:
+                self.stale += 1
+                continue
+
+            # Court keypoints: re-predicted on a scene change or when they are too old
+            signature = self.court_line_detector.frame_signature(frame)
+            scene_change = (court_keypoints is None or
+                            np.abs(signature - court_signature).mean() > self.scene_change_threshold)
+            if scene_change or capture_time - court_time > self.court_refresh:
+                court_keypoints = self.court_line_detector.predict(frame)
+                court_signature, court_time = signature, capture_time
+                if scene_change:
+                    # Track IDs are only consistent within a fixed region (see `PlayerTracker.set_court_region`)
+                    self.player_tracker.set_court_region(court_keypoints)
+                    self.player_tracker.reset_tracks()
+                chosen_players = []
+                self.court_updates += 1
+            if mini_court is None:
+                mini_court = MiniCourt(frame)
+
+            players = self.player_tracker.detect_frame(frame)
+            if players_missing >= self.player_timeout:
+                chosen_players = []
+            if not chosen_players and players:
+                chosen_players = self.player_tracker.choose_players(court_keypoints, players)
+            players = {track_id: bbox for track_id, bbox in players.items() if track_id in chosen_players}
+            players_missing = 0 if players else players_missing + 1
+
+            # Ball: skip the detector while over budget, as long as the Kalman filter has a track
+            over_budget = smoothed_latency > self.latency_budget
+            if over_budget and ball_box_size is not None and ball_skip < self.max_ball_skip:
+                center = self.ball_filter.predict()
+                ball = {1: [center[0] - ball_box_size[0] / 2, center[1] - ball_box_size[1] / 2,
+                            center[0] + ball_box_size[0] / 2, center[1] + ball_box_size[1] / 2]}
+                ball_skip += 1
+                self.ball_skipped += 1
+            else:
+                ball = self.ball_tracker.detect_frame(frame)
+                ball_skip = 0
+                if 1 in ball:
+                    bbox = np.asarray(ball[1], dtype=float)
+                    center, ball_box_size = (bbox[:2] + bbox[2:]) / 2, bbox[2:] - bbox[:2]
+                    if self.ball_filter.state is None:
+                        self.ball_filter.initiate(center)
+                    else:
+                        self.ball_filter.predict()
+                        self.ball_filter.update(center)
+                else:
+                    ball_box_size = None
+                    self.ball_filter.state = None
+
+            overlay = FrameOverlay()
+            self.player_tracker.add_to_overlay(overlay, players)
+            self.ball_tracker.add_to_overlay(overlay, ball)
+            self.court_line_detector.add_to_overlay(overlay, court_keypoints)
+            mini_court.add_to_overlay(overlay,
+                                      mini_court.project_detections([players], court_keypoints)[0],
+                                      mini_court.project_detections([ball], court_keypoints, anchor="center")[0])
+            frame_number_layer(frame_index, overlay)
+            overlay.render(frame)
+
+            latency = time.perf_counter() - capture_time
+            self.latencies.append(latency)
+            smoothed_latency = 0.8 * smoothed_latency + 0.2 * latency if smoothed_latency else latency
+            yield {"index": frame_index, "frame": frame, "players": players, "ball": ball,
+                   "court_keypoints": court_keypoints, "latency": latency}
+
+    def report(self, grabber):
+        """Returns the latency percentiles (ms) and the share of captured frames that were not processed"""
+        latencies = 1000 * np.array(self.latencies) if self.latencies else np.zeros(1)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]).tolist()
+        captured = max(grabber.captured, 1)
+        return {
+            "captured": grabber.captured,
+            "processed": len(self.latencies),
+            "dropped": grabber.dropped + self.stale,
+            "drop_rate": (grabber.dropped + self.stale) / captured,
+            "latency_p50_ms": p50,
+            "latency_p95_ms": p95,
+            "latency_p99_ms": p99,
+            "ball_detections_skipped": self.ball_skipped,
+            "court_updates": self.court_updates,
+        }
+
+
+def run_live(source, models, output_video_path=None, latency_budget_ms=100.0, realtime=None, on_frame=None):
+    """
+    Annotates a live source in real time until it ends.
+
+    Parameters:
+    source (int or str): A camera index, a stream URL, a pipe or a video file (replayed at its native FPS).
+    models (dict): The models returned by `main.load_models`.
+    output_video_path (str): Where the annotated frames are saved at the source FPS, or None.
+    latency_budget_ms (float): The target latency from capture to emitted frame.
+    realtime (bool): See `LatestFrameGrabber`.
+    on_frame (callable): Called with every emitted item (see `LiveProcessor.run`), e.g. to display or publish it.
+
+    Returns:
+    dict: The latency and frame drop report (see `LiveProcessor.report`).
+    """
+    from utils import VideoWriter
+
+    models["player_tracker"].reset_tracks()
+    grabber = LatestFrameGrabber(source, realtime=realtime)
+    processor = LiveProcessor(models["player_tracker"], models["ball_tracker"], models["court_line_detector"],
+                              latency_budget_ms=latency_budget_ms)
+    writer = None
+    previous_index, previous_frame = -1, None
+    try:
+        for item in processor.run(grabber):
+            if output_video_path is not None:
+                if writer is None:
+                    writer = VideoWriter(output_video_path, fps=grabber.fps, background=True)
+                # Fill the slots of dropped frames with the previous frame (the first one at the start),
+                # so the video keeps the timing of the source
+                for _ in range(item["index"] - previous_index - 1):
+                    writer.write(item["frame"] if previous_frame is None else previous_frame)
+                writer.write(item["frame"])
+                previous_index, previous_frame = item["index"], item["frame"]
+            if on_frame is not None:
+                on_frame(item)
+    finally:
+        grabber.stop()
+        if writer is not None:
+            writer.close()
+    return processor.report(grabber)
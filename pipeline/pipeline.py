@@ -0,0 +1,258 @@
+import queue
+import threading
+import time
+
+from profiling import get_profiler
+
+# Marker put on a queue once the stage upstream of it has finished
+_END_OF_STREAM = object()
+
+# How often blocked threads wake up to check whether the pipeline is shutting down
+_POLL_INTERVAL = 0.1
+
+
+class Stage:
+    """
+    A named step of a `Pipeline` that runs on its own worker thread.
+
+    The stage applies `fn` to every item coming from the previous stage and forwards
+    the returned item downstream; returning `None` drops the item. Since a stage runs
+    on a single thread, `fn` sees the items in order and may keep state (e.g. a tracker).
+
+    Stages that hold items back (e.g. to look ahead) set `many=True`: `fn` then returns
+    a list of zero or more items to forward, and `flush` returns the items still held
+    once the input is exhausted.
+    """
+
+    def __init__(self, name, fn, many=False, flush=None):
+        """
+        Parameters:
+        name (str): The name of the stage, used in the report.
+        fn (callable): Function taking an item and returning the processed item (or `None`),
+                       or a list of items if `many` is true.
+        many (bool): Whether `fn` returns a list of items.
+        flush (callable): Function returning the list of items left at the end of the input.
+        """
+        self.name = name
+        self.fn = fn
+        self.many = many
+        self.flush = flush
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Resets the throughput and queue statistics of the stage"""
+        self.items = 0               # Number of items processed
+        self.busy_time = 0.0         # Seconds spent inside `fn`
+        self.starved_time = 0.0      # Seconds spent waiting for input
+        self.blocked_time = 0.0      # Seconds spent waiting for room in the output queue (backpressure)
+        self.queue_samples = 0       # Number of samples of the input queue size
+        self.queue_size_total = 0    # Sum of the sampled input queue sizes
+        self.queue_size_max = 0      # Largest sampled input queue size
+
+    def record_queue_size(self, size):
+        self.queue_samples += 1
+        self.queue_size_total += size
+        self.queue_size_max = max(self.queue_size_max, size)
+
+    def stats(self, wall_time):
+        """
+        Returns the statistics of the stage.
+
+        Parameters:
+        wall_time (float): The wall-clock duration of the whole run in seconds.
+
+        Returns:
+        dict: Items processed, throughput over the run, throughput while busy (the stage's
+              capacity), time shares and mean/max occupancy of the stage's input queue.
+        """
+        return {
+            "items": self.items,
+            "fps": self.items / wall_time if wall_time > 0 else 0.0,
+            "capacity_fps": self.items / self.busy_time if self.busy_time > 0 else float("inf"),
+            "busy": self.busy_time / wall_time if wall_time > 0 else 0.0,
+            "starved": self.starved_time / wall_time if wall_time > 0 else 0.0,
+            "blocked": self.blocked_time / wall_time if wall_time > 0 else 0.0,
+            "queue_mean": self.queue_size_total / self.queue_samples if self.queue_samples else 0.0,
+            "queue_max": self.queue_size_max,
+        }
+
+
+class Pipeline:
+    """
+    Runs a sequence of stages concurrently, connected by bounded queues.
+
+    Decoding, every stage and the consumer of the output run at the same time on
+    different threads. OpenCV and PyTorch release the GIL in their heavy calls, so
+    the stages overlap in practice. The queues are bounded, so a slow stage applies
+    backpressure: upstream stages block instead of buffering the whole video.
+
+    Example:
+        pipeline = Pipeline([Stage("players", detect_players), Stage("draw", draw)])
+        save_video((item["frame"] for item in pipeline.run(read_video(path))), output_path, fps=probe_video(path)["fps"])
+        print(pipeline.format_report())
+    """
+
+    def __init__(self, stages, queue_size=8):
+        """
+        Parameters:
+        stages (list of Stage): The stages, in processing order.
+        queue_size (int): The maximum number of items waiting in front of each stage.
+        """
+        self.stages = [Stage("decode", None)] + list(stages) + [Stage("output", None)]
+        self.queue_size = queue_size
+        self.wall_time = 0.0
+        self._stop_event = threading.Event()
+        self._errors = []
+
+    def run(self, source):
+        """
+        Runs the pipeline over `source` and yields the processed items in order.
+
+        Iterating over `source` (e.g. decoding with `read_video`) happens on its own
+        thread. The time the caller spends between two items (e.g. encoding) is
+        reported as the "output" stage. Stopping the iteration early, or an exception
+        in any stage, shuts all the worker threads down; the exception is re-raised here.
+
+        Parameters:
+        source (iterable): The input items, e.g. frames.
+
+        Yields:
+        The items returned by the last stage.
+        """
+        for stage in self.stages:
+            stage.reset_stats()
+        self._stop_event.clear()
+        self._errors = []
+
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages[1:]]
+        threads = [threading.Thread(target=self._run_source, args=(source, queues[0]), name="decode", daemon=True)]
+        for stage, input_queue, output_queue in zip(self.stages[1:-1], queues, queues[1:]):
+            threads.append(threading.Thread(target=self._run_stage, args=(stage, input_queue, output_queue),
+                                            name=stage.name, daemon=True))
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        output_stage = self.stages[-1]
+        try:
+            while True:
+                wait_start = time.perf_counter()
+                output_stage.record_queue_size(queues[-1].qsize())
+                item = self._get(queues[-1])
+                output_stage.starved_time += time.perf_counter() - wait_start
+                if item is _END_OF_STREAM:
+                    break
+
+                busy_start = time.perf_counter()
+                yield item
+                output_stage.busy_time += time.perf_counter() - busy_start
+                output_stage.items += 1
+        finally:
+            self._stop_event.set()
+            for thread in threads:
+                thread.join()
+            self.wall_time = time.perf_counter() - start
+
+        if self._errors:
+            raise self._errors[0]
+
+    def stop(self):
+        """Asks all the stages to stop; `run` then finishes without processing the remaining items"""
+        self._stop_event.set()
+
+    def report(self):
+        """
+        Returns the statistics of the last run.
+
+        Returns:
+        dict: The wall-clock time of the run and the statistics of every stage (see `Stage.stats`).
+        """
+        return {
+            "wall_time": self.wall_time,
+            "stages": {stage.name: stage.stats(self.wall_time) for stage in self.stages},
+        }
+
+    def format_report(self):
+        """Returns the statistics of the last run as a table; the bottleneck is the stage with the highest busy share"""
+        report = self.report()
+        lines = [f"Pipeline wall time: {report['wall_time']:.2f}s",
+                 f"{'stage':<12} {'items':>7} {'fps':>8} {'cap fps':>8} {'busy':>6} {'starved':>8} {'blocked':>8} {'queue':>11}"]
+        for name, stats in report["stages"].items():
+            lines.append(f"{name:<12} {stats['items']:>7} {stats['fps']:>8.1f} {stats['capacity_fps']:>8.1f} "
+                         f"{stats['busy']:>6.0%} {stats['starved']:>8.0%} {stats['blocked']:>8.0%} "
+                         f"{stats['queue_mean']:>5.1f}/{stats['queue_max']:<5}")
+        return "\n".join(lines)
+
+    def _run_source(self, source, output_queue):
+        stage = self.stages[0]
+        try:
+            iterator = iter(source)
+            while not self._stop_event.is_set():
+                busy_start = time.perf_counter()
+                item = next(iterator, _END_OF_STREAM)
+                stage.busy_time += time.perf_counter() - busy_start
+                if item is _END_OF_STREAM:
+                    break
+                stage.items += 1
+                self._put(stage, output_queue, item)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put(stage, output_queue, _END_OF_STREAM)
+
+    def _run_stage(self, stage, input_queue, output_queue):
+        try:
+            while True:
+                wait_start = time.perf_counter()
+                stage.record_queue_size(input_queue.qsize())
+                item = self._get(input_queue)
+                stage.starved_time += time.perf_counter() - wait_start
+                if item is _END_OF_STREAM:
+                    break
+
+                busy_start = time.perf_counter()
+                with get_profiler().stage(f"pipeline.{stage.name}"):
+                    outputs = stage.fn(item)
+                stage.busy_time += time.perf_counter() - busy_start
+                stage.items += 1
+
+                if not stage.many:
+                    outputs = [] if outputs is None else [outputs]
+                for output in outputs:
+                    self._put(stage, output_queue, output)
+
+            if stage.flush is not None and not self._stop_event.is_set():
+                for output in stage.flush():
+                    self._put(stage, output_queue, output)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put(stage, output_queue, _END_OF_STREAM)
+
+    def _get(self, input_queue):
+        # Returns the end-of-stream marker as soon as the pipeline is stopped
+        while not self._stop_event.is_set():
+            try:
+                return input_queue.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        return _END_OF_STREAM
+
+    def _put(self, stage, output_queue, item):
+        wait_start = time.perf_counter()
+        while True:
+            # The end-of-stream marker is always delivered, even when stopping
+            if self._stop_event.is_set() and item is not _END_OF_STREAM:
+                break
+            try:
+                output_queue.put(item, timeout=_POLL_INTERVAL)
+                break
+            except queue.Full:
+                if self._stop_event.is_set():
+                    break
+        stage.blocked_time += time.perf_counter() - wait_start
+
+    def _fail(self, error):
+        self._errors.append(error)
+        self._stop_event.set()
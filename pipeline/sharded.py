@@ -0,0 +1,262 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils import read_video, save_video, probe_video, concatenate_videos, measure_ious, DEFAULT_FPS
+
+# A range of frames processed by one worker: frames [start, stop) are detected, and
+# frames [core_start, core_stop) are kept in the merged result (None = end of the video)
+Shard = namedtuple("Shard", ["index", "start", "stop", "core_start", "core_stop"])
+
+# Models of the current worker process, loaded once by `_init_worker`
+_worker_models = {}
+
+
+def plan_shards(num_frames, num_shards, overlap):
+    """
+    Splits a video into consecutive core ranges, each extended by `overlap` frames on both sides.
+
+    Neighbouring shards therefore detect `2 * overlap` frames in common, which gives each
+    tracker time to settle before its core range and is used to match track IDs.
+
+    Parameters:
+    num_frames (int): The number of frames of the video.
+    num_shards (int): The number of shards (fewer if the video is too short).
+    overlap (int): The number of frames added on each side of a core range.
+
+    Returns:
+    list of Shard: The shards, in frame order.
+    """
+    num_shards = max(1, min(num_shards, num_frames // max(2 * overlap, 1) or 1))
+    bounds = np.linspace(0, num_frames, num_shards + 1).astype(int)
+    shards = []
+    for index in range(num_shards):
+        last = index == num_shards - 1
+        shards.append(Shard(index,
+                            start=int(max(bounds[index] - overlap, 0)),
+                            stop=None if last else int(min(bounds[index + 1] + overlap, num_frames)),
+                            core_start=int(bounds[index]),
+                            core_stop=None if last else int(bounds[index + 1])))
+    return shards
+
+
+def match_track_ids(previous_detections, current_detections, iou_threshold=0.5):
+    """
+    Matches the track IDs of two trackers that processed the same frames.
+
+    Every detection is paired with its best-overlapping detection of the other tracker in
+    the same frame; each pair with an IoU of at least `iou_threshold` is a vote, and IDs
+    are matched one-to-one by decreasing number of votes.
+
+    Parameters:
+    previous_detections (list of dict): The detections of the first tracker, one dict per common frame.
+    current_detections (list of dict): The detections of the second tracker on the same frames.
+    iou_threshold (float): The minimum IoU for two boxes to vote for the same object.
+
+    Returns:
+    dict: A mapping from track IDs of the second tracker to track IDs of the first.
+    """
+    votes = Counter()
+    for previous_dict, current_dict in zip(previous_detections, current_detections):
+        if not previous_dict or not current_dict:
+            continue
+        previous_ids, current_ids = list(previous_dict), list(current_dict)
+        ious = measure_ious(list(current_dict.values()), list(previous_dict.values()))
+        best = ious.argmax(axis=1)
+        for row, column in enumerate(best):
+            if ious[row, column] >= iou_threshold:
+                votes[(current_ids[row], previous_ids[column])] += 1
+
+    mapping = {}
+    matched_previous = set()
+    for (current_id, previous_id), _ in votes.most_common():
+        if current_id not in mapping and previous_id not in matched_previous:
+            mapping[current_id] = previous_id
+            matched_previous.add(previous_id)
+    return mapping
+
+
+def reconcile_track_ids(shards, shard_detections, iou_threshold=0.5):
+    """
+    Renumbers the track IDs of every shard so that the same object keeps one ID across shards.
+
+    Shards are processed in order; the IDs of each shard are matched against the (already
+    renumbered) previous shard on their common frames, and unmatched tracks get new IDs.
+
+    Parameters:
+    shards (list of Shard): The shards (see `plan_shards`).
+    shard_detections (list of list of dict): The detections of every frame of every shard.
+    iou_threshold (float): See `match_track_ids`.
+
+    Returns:
+    list of list of dict: The detections with reconciled IDs.
+    """
+    reconciled = [shard_detections[0]]
+    next_id = 1 + max((track_id for detections in shard_detections[0] for track_id in detections), default=0)
+
+    for shard, detections in zip(shards[1:], shard_detections[1:]):
+        previous_shard, previous_detections = shards[shard.index - 1], reconciled[-1]
+        common = range(shard.start, previous_shard.stop)
+        mapping = match_track_ids([previous_detections[frame - previous_shard.start] for frame in common],
+                                  [detections[frame - shard.start] for frame in common],
+                                  iou_threshold)
+
+        for track_id in sorted({track_id for detection_dict in detections for track_id in detection_dict}):
+            if track_id not in mapping:
+                mapping[track_id] = next_id
+                next_id += 1
+        reconciled.append([{mapping[track_id]: bbox for track_id, bbox in detection_dict.items()}
+                           for detection_dict in detections])
+    return reconciled
+
+
+def merge_shards(shards, shard_values):
+    """Concatenates the per-frame values of the core range of every shard"""
+    merged = []
+    for shard, values in zip(shards, shard_values):
+        core_stop = None if shard.core_stop is None else shard.core_stop - shard.start
+        merged.extend(values[shard.core_start - shard.start:core_stop])
+    return merged
+
+
+def _init_worker(model_paths, threads_per_worker):
+    """Loads the models once per worker process"""
+    # Keep each process on its share of the cores instead of oversubscribing the machine
+    import cv2
+    import torch
+    torch.set_num_threads(threads_per_worker)
+    cv2.setNumThreads(threads_per_worker)
+
+    from main import load_models
+    _worker_models.update(load_models(model_paths))
+
+
+def _detect_shard(input_video_path, shard, court_keypoints, batch_size):
+    """Runs court, player and ball detection on the frames of one shard"""
+    start_time = time.perf_counter()
+    models = _worker_models
+    models["player_tracker"].reset_tracks()  # A fresh tracker state for every shard
+    models["player_tracker"].set_court_region(court_keypoints)
+
+    frames = lambda: read_video(input_video_path, start=shard.start, stop=shard.stop)
+    court_keypoints_per_frame = models["court_line_detector"].predict_video(frames())
+    player_detections = models["player_tracker"].detect_frames(frames(), batch_size=batch_size)
+    ball_detections = models["ball_tracker"].detect_frames(frames(), batch_size=batch_size)
+    return court_keypoints_per_frame, player_detections, ball_detections, time.perf_counter() - start_time
+
+
+def _render_shard(input_video_path, segment_path, shard, fps, player_detections, ball_detections,
+                  court_keypoints_per_frame, player_mini_court_positions, ball_mini_court_positions):
+    """Draws the core range of one shard into its own video segment"""
+    from mini_court import MiniCourt
+    from overlay import OverlayRenderer, frame_number_layer
+
+    start_time = time.perf_counter()
+    models = _worker_models
+    frames = lambda: read_video(input_video_path, start=shard.core_start, stop=shard.core_stop)
+    mini_court = MiniCourt(next(frames()))
+
+    renderer = OverlayRenderer([
+        lambda i, overlay: models["player_tracker"].add_to_overlay(overlay, player_detections[i]),
+        lambda i, overlay: models["ball_tracker"].add_to_overlay(overlay, ball_detections[i]),
+        lambda i, overlay: models["court_line_detector"].add_to_overlay(overlay, court_keypoints_per_frame[i]),
+        lambda i, overlay: mini_court.add_to_overlay(overlay, player_mini_court_positions[i], ball_mini_court_positions[i]),
+        lambda i, overlay: frame_number_layer(shard.core_start + i, overlay),
+    ])
+    save_video(renderer.render(frames()), segment_path, fps=fps)
+    return time.perf_counter() - start_time
+
+
+def process_video_sharded(input_video_path, output_video_path, model_paths, num_workers=None, overlap=30,
+                          batch_size=1, threads_per_worker=None):
+    """
+    Processes one video on a pool of processes, each handling an overlapping range of frames.
+
+    1. The court keypoints of the first frame are predicted once, to choose the players and
+       restrict player detection to the court in every shard.
+    2. Each worker detects the court, players and ball on its shard (see `plan_shards`).
+    3. Track IDs are reconciled across shards on their common frames
+       (`reconcile_track_ids`), the core ranges are merged, the players are chosen and the ball
+       is interpolated over the whole video, so shard boundaries leave no gaps.
+    4. Each worker draws its core range into a video segment, and the segments are concatenated.
+
+    Parameters:
+    input_video_path (str): The video to process.
+    output_video_path (str): The annotated output video.
+    model_paths (dict): The "player", "ball" and "court" model paths.
+    num_workers (int): The number of processes (and shards), defaulting to the number of cores.
+    overlap (int): The number of frames added on each side of a shard.
+    batch_size (int): The detection batch size of each worker.
+    threads_per_worker (int): The torch/OpenCV threads per process, defaulting to cores / workers.
+
+    Returns:
+    dict: The wall time of each phase and the per-shard detection and rendering times, in seconds.
+    """
+    from trackers import PlayerTracker, BallTracker
+    from court_line_detector import CourtLineDetector
+    from mini_court import MiniCourt
+
+    num_workers = num_workers or os.cpu_count()
+    threads_per_worker = threads_per_worker or max(1, os.cpu_count() // num_workers)
+    timings = {}
+    start_time = time.perf_counter()
+
+    info = probe_video(input_video_path, default_fps=DEFAULT_FPS)
+    first_frame = next(read_video(input_video_path))
+    shards = plan_shards(info["frame_count"], num_workers, overlap)
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=context, initializer=_init_worker,
+                             initargs=(model_paths, threads_per_worker)) as executor:
+        # The parent only needs the models for the first frame's keypoints and the player selection
+        player_tracker = PlayerTracker(model_path=model_paths["player"])
+        ball_tracker = BallTracker(model_path=model_paths["ball"])
+        court_keypoints = CourtLineDetector(model_path=model_paths["court"]).predict(first_frame)
+
+        phase_start = time.perf_counter()
+        results = list(executor.map(_detect_shard, [input_video_path] * len(shards), shards,
+                                    [court_keypoints] * len(shards), [batch_size] * len(shards)))
+        timings["detect"] = time.perf_counter() - phase_start
+        timings["detect_shards"] = [result[3] for result in results]
+
+        phase_start = time.perf_counter()
+        court_keypoints_per_frame = np.array(merge_shards(shards, [result[0] for result in results]))
+        player_detections = merge_shards(shards, reconcile_track_ids(shards, [result[1] for result in results]))
+        ball_detections = merge_shards(shards, [result[2] for result in results])
+
+        player_detections = player_tracker.choose_and_filter_players(court_keypoints, player_detections)
+        ball_detections = ball_tracker.interpolate_ball_positions(ball_detections)
+
+        mini_court = MiniCourt(first_frame)
+        player_positions = mini_court.project_detections(player_detections, court_keypoints_per_frame)
+        ball_positions = mini_court.project_detections(ball_detections, court_keypoints_per_frame, anchor="center")
+        timings["reconcile"] = time.perf_counter() - phase_start
+
+        phase_start = time.perf_counter()
+        segment_dir = tempfile.mkdtemp(prefix="segments_", dir=os.path.dirname(os.path.abspath(output_video_path)))
+        try:
+            extension = os.path.splitext(output_video_path)[1]
+            segment_paths = [os.path.join(segment_dir, f"segment_{shard.index:04d}{extension}") for shard in shards]
+            futures = []
+            for shard, segment_path in zip(shards, segment_paths):
+                core = slice(shard.core_start, shard.core_stop)
+                futures.append(executor.submit(_render_shard, input_video_path, segment_path, shard, info["fps"],
+                                               player_detections[core], ball_detections[core],
+                                               court_keypoints_per_frame[core], player_positions[core], ball_positions[core]))
+            timings["render_shards"] = [future.result() for future in futures]
+            timings["render"] = time.perf_counter() - phase_start
+
+            phase_start = time.perf_counter()
+            concatenate_videos(segment_paths, output_video_path, fps=info["fps"])
+            timings["concatenate"] = time.perf_counter() - phase_start
+        finally:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+
+    timings["total"] = time.perf_counter() - start_time
+    return timings
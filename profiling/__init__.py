@@ -0,0 +1 @@
+from .profiler import Profiler, StageStats, get_profiler, enable_profiling, max_rss_bytes, LATENCY_BUCKETS
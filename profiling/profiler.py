@@ -0,0 +1,306 @@
+import bisect
+import contextlib
+import json
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; memory high-water marks are then left out
+    resource = None
+
+# Upper bounds of the latency histogram buckets, in seconds (Prometheus-style, cumulative on export)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# The phases reported by ultralytics in `Results.speed`, in milliseconds per image
+MODEL_PHASES = ("preprocess", "inference", "postprocess")
+
+# Shared by every disabled `stage` call, so profiling costs one attribute check when off
+_DISABLED_STAGE = contextlib.nullcontext()
+
+
+def max_rss_bytes():
+    """Returns the peak resident memory of the process so far, in bytes, or None if unknown"""
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux (and in bytes on macOS, where this overestimates)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class StageStats:
+    """Wall time, CPU time, latency histogram and memory high-water mark of one named stage"""
+
+    def __init__(self):
+        self.count = 0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.max_latency = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # The last bucket counts latencies above all bounds
+        self.max_rss = None  # Peak process memory when the stage last finished
+        self.rss_growth = 0  # How much the stage raised the peak process memory
+
+    def record(self, wall_time, cpu_time, rss_before=None, rss_after=None):
+        self.count += 1
+        self.wall_time += wall_time
+        self.cpu_time += cpu_time
+        self.max_latency = max(self.max_latency, wall_time)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, wall_time)] += 1
+        if rss_after is not None:
+            self.max_rss = rss_after
+            self.rss_growth += rss_after - rss_before
+
+    def quantile(self, q):
+        """Estimates a latency quantile from the histogram (the upper bound of its bucket), in seconds"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS, self.buckets):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return min(bound, self.max_latency)
+        return self.max_latency
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "wall_seconds": self.wall_time,
+            "cpu_seconds": self.cpu_time,
+            "mean_ms": 1000 * self.wall_time / self.count if self.count else 0.0,
+            "p50_ms": 1000 * self.quantile(0.5),
+            "p95_ms": 1000 * self.quantile(0.95),
+            "p99_ms": 1000 * self.quantile(0.99),
+            "max_ms": 1000 * self.max_latency,
+            "histogram": {"buckets": list(LATENCY_BUCKETS), "counts": list(self.buckets)},
+            "max_rss_bytes": self.max_rss,
+            "rss_growth_bytes": self.rss_growth,
+        }
+
+
+class Profiler:
+    """
+    Collects per-stage timings and per-model pre/inference/post-processing splits.
+
+    Stages are timed with `with profiler.stage("name"):`. Wall time is measured with
+    `time.perf_counter` and CPU time with `time.thread_time`, i.e. the CPU used by the
+    calling thread only, so stages running concurrently on several threads are not
+    charged for each other. Every call also lands in a latency histogram, and the peak
+    process memory is sampled around it.
+
+    When the profiler is disabled, `stage` returns a shared no-op context and
+    `record_model_speed` returns immediately, so instrumented code can stay in place.
+    The profiler is thread-safe.
+    """
+
+    def __init__(self, enabled=False, track_memory=True):
+        """
+        Parameters:
+        enabled (bool): Whether stages are recorded.
+        track_memory (bool): Whether the peak process memory is sampled around every stage.
+        """
+        self.enabled = enabled
+        self.track_memory = track_memory and resource is not None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clears everything recorded so far"""
+        with self._lock:
+            self.stages = {}
+            self.models = {}
+            self.start_time = time.perf_counter()
+
+    def stage(self, name):
+        """
+        Returns a context manager that records the block it wraps under `name`.
+
+        Parameters:
+        name (str): The stage name, e.g. "player.detect"; dots group related stages.
+        """
+        if not self.enabled:
+            return _DISABLED_STAGE
+        return self._timed_stage(name)
+
+    @contextlib.contextmanager
+    def _timed_stage(self, name):
+        rss_before = max_rss_bytes() if self.track_memory else None
+        cpu_start = time.thread_time()
+        wall_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - wall_start
+            cpu_time = time.thread_time() - cpu_start
+            rss_after = max_rss_bytes() if self.track_memory else None
+            with self._lock:
+                stats = self.stages.get(name)
+                if stats is None:
+                    stats = self.stages[name] = StageStats()
+                stats.record(wall_time, cpu_time, rss_before, rss_after)
+
+    def profile_iter(self, name, iterable):
+        """
+        Times every step of an iterator (e.g. frame decoding in `read_video`) as a stage.
+
+        Parameters:
+        name (str): The stage name.
+        iterable (iterable): The items to produce.
+
+        Yields:
+        The items of `iterable`.
+        """
+        if not self.enabled:
+            yield from iterable
+            return
+        iterator = iter(iterable)
+        while True:
+            with self._timed_stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def record_model_speed(self, model, results=None, **speed):
+        """
+        Adds the pre/inference/post-processing split of a model call.
+
+        Parameters:
+        model (str): The model name, e.g. "player".
+        results (list of ultralytics Results): Results whose `speed` (ms per image) is added, or None.
+        **speed: Milliseconds per phase ("preprocess", "inference", "postprocess") for models
+                 that are not run through ultralytics, covering all `images` of the call.
+        """
+        if not self.enabled:
+            return
+        if results is not None:
+            images = len(results)
+            totals = {phase: sum(result.speed.get(phase) or 0.0 for result in results) for phase in MODEL_PHASES}
+        else:
+            images = speed.pop("images", 1)
+            totals = {phase: speed.get(phase, 0.0) for phase in MODEL_PHASES}
+        with self._lock:
+            model_stats = self.models.get(model)
+            if model_stats is None:
+                model_stats = self.models[model] = dict.fromkeys(("calls", "images") + MODEL_PHASES, 0)
+            model_stats["calls"] += 1
+            model_stats["images"] += images
+            for phase in MODEL_PHASES:
+                model_stats[phase] += totals[phase]
+
+    def to_dict(self):
+        """
+        Returns everything recorded so far.
+
+        Returns:
+        dict: The "elapsed_seconds" since the last reset, the "max_rss_bytes" of the process,
+              per-stage "stages" statistics and per-model "models" mean milliseconds per image.
+        """
+        with self._lock:
+            stages = {name: stats.to_dict() for name, stats in sorted(self.stages.items())}
+            models = {}
+            for name, model_stats in sorted(self.models.items()):
+                images = max(model_stats["images"], 1)
+                models[name] = {"calls": model_stats["calls"], "images": model_stats["images"]}
+                models[name].update({f"{phase}_ms": model_stats[phase] / images for phase in MODEL_PHASES})
+        return {
+            "elapsed_seconds": time.perf_counter() - self.start_time,
+            "max_rss_bytes": max_rss_bytes(),
+            "stages": stages,
+            "models": models,
+        }
+
+    def to_json(self, path=None):
+        """Returns the report as JSON, and writes it to `path` if given"""
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def to_prometheus(self, path=None, prefix="tennis"):
+        """
+        Returns the report in the Prometheus text exposition format, and writes it to `path` if given.
+
+        Stage latencies are exported as histograms labelled by stage, CPU time as counters,
+        and the model phases as mean milliseconds per image.
+        """
+        report = self.to_dict()
+        lines = [f"# TYPE {prefix}_stage_seconds histogram"]
+        for name, stats in report["stages"].items():
+            cumulative = 0
+            for bound, bucket_count in zip(stats["histogram"]["buckets"], stats["histogram"]["counts"]):
+                cumulative += bucket_count
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {stats["count"]}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {stats["wall_seconds"]}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+
+        lines.append(f"# TYPE {prefix}_stage_cpu_seconds_total counter")
+        for name, stats in report["stages"].items():
+            lines.append(f'{prefix}_stage_cpu_seconds_total{{stage="{name}"}} {stats["cpu_seconds"]}')
+
+        lines.append(f"# TYPE {prefix}_stage_rss_growth_bytes gauge")
+        for name, stats in report["stages"].items():
+            lines.append(f'{prefix}_stage_rss_growth_bytes{{stage="{name}"}} {stats["rss_growth_bytes"]}')
+
+        lines.append(f"# TYPE {prefix}_model_phase_milliseconds gauge")
+        for name, model_stats in report["models"].items():
+            for phase in MODEL_PHASES:
+                lines.append(f'{prefix}_model_phase_milliseconds{{model="{name}",phase="{phase}"}} {model_stats[phase + "_ms"]}')
+        lines.append(f"# TYPE {prefix}_model_images_total counter")
+        for name, model_stats in report["models"].items():
+            lines.append(f'{prefix}_model_images_total{{model="{name}"}} {model_stats["images"]}')
+
+        if report["max_rss_bytes"] is not None:
+            lines.append(f"# TYPE {prefix}_max_rss_bytes gauge")
+            lines.append(f"{prefix}_max_rss_bytes {report['max_rss_bytes']}")
+
+        text = "\n".join(lines) + "\n"
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def format_report(self):
+        """Returns a human-readable table of the stages and model phases"""
+        report = self.to_dict()
+        lines = [f"{'stage':<24} {'calls':>7} {'wall s':>8} {'cpu s':>8} {'mean ms':>8} {'p95 ms':>8} {'max ms':>8} {'rss +MB':>8}"]
+        for name, stats in report["stages"].items():
+            lines.append(f"{name:<24} {stats['count']:>7} {stats['wall_seconds']:>8.2f} {stats['cpu_seconds']:>8.2f} "
+                         f"{stats['mean_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['max_ms']:>8.1f} "
+                         f"{stats['rss_growth_bytes'] / 2 ** 20:>8.1f}")
+        if report["models"]:
+            lines.append(f"{'model':<24} {'images':>7} {'pre ms':>8} {'infer ms':>8} {'post ms':>8}")
+            for name, model_stats in report["models"].items():
+                lines.append(f"{name:<24} {model_stats['images']:>7} {model_stats['preprocess_ms']:>8.1f} "
+                             f"{model_stats['inference_ms']:>8.1f} {model_stats['postprocess_ms']:>8.1f}")
+        if report["max_rss_bytes"] is not None:
+            lines.append(f"peak memory: {report['max_rss_bytes'] / 2 ** 20:.0f} MB")
+        return "\n".join(lines)
+
+
+# The process-wide profiler used by the instrumented code, disabled by default
+_profiler = Profiler()
+
+
+def get_profiler():
+    """Returns the process-wide profiler used by the instrumented code"""
+    return _profiler
+
+
+def enable_profiling(enabled=True, reset=True):
+    """
+    Turns the process-wide profiler on or off.
+
+    Parameters:
+    enabled (bool): Whether to record stages.
+    reset (bool): Whether to clear what was recorded before.
+
+    Returns:
+    Profiler: The process-wide profiler.
+    """
+    if reset:
+        _profiler.reset()
+    _profiler.enabled = enabled
+    return _profiler
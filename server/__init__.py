@@ -0,0 +1,12 @@
+# Public names are imported from their submodule on first access (see `utils.lazy_exports`),
+# so a client does not load the server's dependencies
+from utils.lazy_imports import lazy_exports
+
+_EXPORTS = {
+    "InferenceServer": ".server",
+    "InferenceClient": ".client", "RemotePlayerTracker": ".client",
+    "RemoteBallTracker": ".client", "RemoteCourtLineDetector": ".client",
+    "DynamicBatcher": ".batcher",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
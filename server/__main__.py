@@ -0,0 +1,41 @@
+"""
+Runs the inference server until interrupted.
+
+Usage (from the repository root):
+    python -m server --port 8765 --max-batch-size 8 --max-latency-ms 20
+"""
+import argparse
+
+from .server import InferenceServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-latency-ms", type=float, default=20.0)
+    parser.add_argument("--player-model", default=None)
+    parser.add_argument("--ball-model", default=None)
+    parser.add_argument("--court-model", default=None)
+    args = parser.parse_args()
+
+    from main import MODEL_PATHS
+    model_paths = dict(MODEL_PATHS)
+    for key, path in (("player", args.player_model), ("ball", args.ball_model), ("court", args.court_model)):
+        if path is not None:
+            model_paths[key] = path
+
+    server = InferenceServer(model_paths, host=args.host, port=args.port,
+                             max_batch_size=args.max_batch_size, max_latency_ms=args.max_latency_ms)
+    print(f"Serving on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
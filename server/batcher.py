@@ -0,0 +1,115 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+# How often the idle batching thread wakes up to check whether it is stopping
+_POLL_INTERVAL = 0.1
+
+
+class DynamicBatcher:
+    """
+    Groups the frames submitted by concurrent clients into model batches under a latency budget.
+
+    A single thread owns the model: it takes the oldest pending frame, waits at most
+    `max_latency` seconds (from that frame's arrival) for more frames, and runs
+    `run_batch` on up to `max_batch_size` frames. Frames are processed in arrival order,
+    so the frames of one client request stay in order.
+    """
+
+    def __init__(self, name, run_batch, max_batch_size=8, max_latency=0.02):
+        """
+        Parameters:
+        name (str): The name of the model, used in the metrics.
+        run_batch (callable): Function mapping a list of payloads to the list of their results.
+        max_batch_size (int): The maximum number of frames per model call.
+        max_latency (float): The maximum time a frame waits for a batch to fill, in seconds.
+        """
+        self.name = name
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self._queue = queue.Queue()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._frames = 0
+        self._errors = 0
+        self._wait_time = 0.0
+        self._inference_time = 0.0
+        self._thread = threading.Thread(target=self._loop, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, payloads):
+        """
+        Queues payloads (e.g. frames) for the model.
+
+        Returns:
+        list of Future: One future per payload, resolved with its result.
+        """
+        futures = []
+        for payload in payloads:
+            future = Future()
+            self._queue.put((time.perf_counter(), payload, future))
+            futures.append(future)
+        return futures
+
+    def __call__(self, payloads, timeout=None):
+        """Submits payloads and waits for their results"""
+        return [future.result(timeout) for future in self.submit(payloads)]
+
+    def stop(self):
+        self._stopping.set()
+        self._thread.join()
+
+    def metrics(self):
+        """Returns the queue depth, batch size distribution and timings of the model"""
+        with self._lock:
+            batches = sum(self._batch_sizes.values())
+            return {
+                "queue_depth": self._queue.qsize(),
+                "frames": self._frames,
+                "batches": batches,
+                "errors": self._errors,
+                "mean_batch_size": self._frames / batches if batches else 0.0,
+                "batch_sizes": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+                "mean_wait_ms": 1000 * self._wait_time / self._frames if self._frames else 0.0,
+                "mean_inference_ms_per_batch": 1000 * self._inference_time / batches if batches else 0.0,
+            }
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+
+            # Fill the batch until it is full or the oldest frame has waited long enough
+            batch = [first]
+            deadline = first[0] + self.max_latency
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            start_time = time.perf_counter()
+            try:
+                results = self.run_batch([payload for _, payload, _ in batch])
+                for (_, _, future), result in zip(batch, results):
+                    future.set_result(result)
+                failed = False
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                failed = True
+            end_time = time.perf_counter()
+
+            with self._lock:
+                self._batch_sizes[len(batch)] += 1
+                self._frames += len(batch)
+                self._errors += failed
+                self._wait_time += sum(start_time - enqueued for enqueued, _, _ in batch)
+                self._inference_time += end_time - start_time
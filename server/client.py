@@ -0,0 +1,140 @@
+import json
+import uuid
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import cv2
+import numpy as np
+
+from utils import batch_frames
+
+
+class InferenceClient:
+    """A thin HTTP client of `InferenceServer`"""
+
+    def __init__(self, url="http://127.0.0.1:8765", session=None, encoding="raw", timeout=120):
+        """
+        Parameters:
+        url (str): The server address.
+        session (str): The player tracking session, defaulting to a new unique ID.
+        encoding (str): "raw" to send uncompressed frames (fastest on the same machine), or
+                        "image" to send JPEG frames (less bandwidth, slightly different detections).
+        timeout (float): The request timeout, in seconds.
+        """
+        self.url = url.rstrip("/")
+        self.session = session or uuid.uuid4().hex
+        self.encoding = encoding
+        self.timeout = timeout
+
+    def _request(self, path, frames=None, payload=None):
+        headers = {}
+        body = b""
+        if payload is not None:
+            headers["Content-Type"] = "application/json"
+            body = json.dumps(payload).encode()
+        elif frames:
+            if self.encoding == "image":
+                encoded = [cv2.imencode(".jpg", frame)[1].tobytes() for frame in frames]
+                headers["X-Encoding"] = "image"
+                headers["X-Frame-Lengths"] = ",".join(str(len(data)) for data in encoded)
+                body = b"".join(encoded)
+            else:
+                stacked = np.ascontiguousarray(np.stack(frames), dtype=np.uint8)
+                headers["X-Frame-Shape"] = ",".join(map(str, stacked.shape[1:]))
+                headers["X-Frame-Count"] = str(len(frames))
+                body = stacked.tobytes()
+
+        post = frames is not None or payload is not None
+        request = Request(self.url + path, data=body if post else None, headers=headers,
+                          method="POST" if post else "GET")
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read())
+        except HTTPError as e:
+            # Errors are replied with a JSON {"error": message} body; report the server's message
+            try:
+                message = json.loads(e.read())["error"]
+            except (ValueError, KeyError, TypeError):
+                raise e from None
+            raise RuntimeError(f"{self.url}{path} failed with HTTP {e.code}: {message}") from None
+        if "error" in payload:
+            raise RuntimeError(payload["error"])
+        return payload
+
+    def detect_players(self, frames):
+        """Returns the tracked players of consecutive frames of this session (track ID -> box per frame)"""
+        results = self._request(f"/players?session={self.session}", list(frames))["results"]
+        return [{int(track_id): bbox for track_id, bbox in player_dict.items()} for player_dict in results]
+
+    def detect_ball(self, frames):
+        """Returns the ball detections of frames (key 1 -> box per frame)"""
+        results = self._request("/ball", list(frames))["results"]
+        return [{int(key): bbox for key, bbox in ball_dict.items()} for ball_dict in results]
+
+    def predict_court(self, frames):
+        """Returns the (N, 28) court keypoints of frames"""
+        return np.array(self._request("/court", list(frames))["results"]).reshape(-1, 28)
+
+    def set_court_region(self, court_keypoints, margin=0.15, vertical_margin=0.3):
+        """Restricts player detection of this session to the court (see `PlayerTracker.set_court_region`)"""
+        if court_keypoints is not None:
+            court_keypoints = np.asarray(court_keypoints, dtype=np.float64).ravel().tolist()
+        self._request(f"/region?session={self.session}",
+                      payload={"court_keypoints": court_keypoints, "margin": margin, "vertical_margin": vertical_margin})
+
+    def reset_session(self):
+        self._request(f"/reset?session={self.session}", [])
+
+    def metrics(self):
+        return self._request("/metrics")
+
+
+class RemotePlayerTracker:
+    """Mirrors `PlayerTracker.detect_frames` / `detect_frame` on an `InferenceServer`"""
+
+    def __init__(self, client=None, **client_args):
+        self.client = client or InferenceClient(**client_args)
+
+    def detect_frames(self, frames, batch_size=8):
+        player_detections = []
+        for frame_batch in batch_frames(frames, batch_size):
+            player_detections.extend(self.client.detect_players(frame_batch))
+        return player_detections
+
+    def detect_frame(self, frame):
+        return self.client.detect_players([frame])[0]
+
+    def set_court_region(self, court_keypoints, margin=0.15, vertical_margin=0.3):
+        self.client.set_court_region(court_keypoints, margin=margin, vertical_margin=vertical_margin)
+
+    def reset_tracks(self):
+        self.client.reset_session()
+
+
+class RemoteBallTracker:
+    """Mirrors `BallTracker.detect_frames` / `detect_frame` on an `InferenceServer`"""
+
+    def __init__(self, client=None, **client_args):
+        self.client = client or InferenceClient(**client_args)
+
+    def detect_frames(self, frames, batch_size=8):
+        ball_detections = []
+        for frame_batch in batch_frames(frames, batch_size):
+            ball_detections.extend(self.client.detect_ball(frame_batch))
+        return ball_detections
+
+    def detect_frame(self, frame):
+        return self.client.detect_ball([frame])[0]
+
+
+class RemoteCourtLineDetector:
+    """Mirrors `CourtLineDetector.predict` / `predict_batch` on an `InferenceServer`"""
+
+    def __init__(self, client=None, **client_args):
+        self.client = client or InferenceClient(**client_args)
+
+    def predict(self, image):
+        return self.client.predict_court([image])[0]
+
+    def predict_batch(self, images):
+        return self.client.predict_court(images)
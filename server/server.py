@@ -0,0 +1,233 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import cv2
+import numpy as np
+
+from .batcher import DynamicBatcher
+
+# Sessions (player trackers) unused for longer than this are dropped, in seconds
+SESSION_TIMEOUT = 600
+
+
+def decode_frames(headers, body):
+    """
+    Decodes the frames of a request body.
+
+    Raw frames are sent back to back with an "X-Frame-Shape: height,width,channels" header
+    and an "X-Frame-Count" header; JPEG/PNG frames with "X-Encoding: image" and the byte
+    length of every frame in "X-Frame-Lengths: n1,n2,...".
+    """
+    if headers.get("X-Encoding", "raw") == "image":
+        frames, offset = [], 0
+        for length in map(int, headers["X-Frame-Lengths"].split(",")):
+            frames.append(cv2.imdecode(np.frombuffer(body, np.uint8, length, offset), cv2.IMREAD_COLOR))
+            offset += length
+        return frames
+
+    shape = tuple(int(size) for size in headers["X-Frame-Shape"].split(","))
+    count = int(headers.get("X-Frame-Count", 1))
+    return list(np.frombuffer(body, dtype=np.uint8).reshape((count,) + shape))
+
+
+class InferenceServer:
+    """
+    A long-running HTTP server holding the player, ball and court models once in memory.
+
+    Frames from concurrent clients are grouped into batches by one `DynamicBatcher` per
+    model. Player detections are tracked per client session: every session is a
+    `PlayerTracker.new_session` with its own court region and tracker, updated in frame
+    order after the shared, batched detection, so sessions get the same track IDs and
+    boxes as a local `PlayerTracker`.
+
+    Endpoints (frames are posted as described in `decode_frames`):
+        POST /players?session=<id>  player detections per frame, as in `PlayerTracker.detect_frames`
+        POST /ball                  ball detections per frame, as in `BallTracker.detect_frames`
+        POST /court                 court keypoints per frame, as in `CourtLineDetector.predict_batch`
+        POST /region?session=<id>   set the court region of a session, as in `PlayerTracker.set_court_region`,
+                                    from a JSON {"court_keypoints": [...], "margin": ..., "vertical_margin": ...} body
+        POST /reset?session=<id>    drop the tracks of a session
+        GET  /metrics               queue depth, batch sizes and timings of every model
+        GET  /health
+    """
+
+    def __init__(self, model_paths=None, models=None, host="127.0.0.1", port=8765, max_batch_size=8,
+                 max_latency_ms=20.0):
+        """
+        Parameters:
+        model_paths (dict): The "player", "ball" and "court" model paths (defaults to `main.MODEL_PATHS`).
+        models (dict): Already loaded models (see `main.load_models`), instead of `model_paths`.
+        host (str): The address to listen on.
+        port (int): The port to listen on (0 picks a free port).
+        max_batch_size (int): The maximum number of frames per model call.
+        max_latency_ms (float): The maximum time a frame waits for its batch to fill.
+        """
+        if models is None:
+            from main import load_models, MODEL_PATHS
+            models = load_models(model_paths or MODEL_PATHS)
+        self.player_tracker = models["player_tracker"]
+        self.ball_tracker = models["ball_tracker"]
+        self.court_line_detector = models["court_line_detector"]
+
+        self._sessions = {}  # Session ID -> [player tracker session, last use time]
+        self._sessions_lock = threading.Lock()  # Also guards `_requests`
+        self._requests = 0
+        self._start_time = time.time()
+
+        max_latency = max_latency_ms / 1000
+        self.batchers = {
+            "players": DynamicBatcher("players", self._detect_players, max_batch_size, max_latency),
+            "ball": DynamicBatcher("ball", self.ball_tracker.detect_batch, max_batch_size, max_latency),
+            "court": DynamicBatcher("court", lambda frames: list(self.court_line_detector.predict_batch(frames)),
+                                    max_batch_size, max_latency),
+        }
+
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serves requests on a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="inference-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for batcher in self.batchers.values():
+            batcher.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def metrics(self):
+        with self._sessions_lock:
+            sessions = len(self._sessions)
+            requests = self._requests
+        return {
+            "uptime_seconds": time.time() - self._start_time,
+            "requests": requests,
+            "sessions": sessions,
+            "models": {name: batcher.metrics() for name, batcher in self.batchers.items()},
+        }
+
+    def reset_session(self, session_id):
+        """Drops the tracks of a session, keeping its court region"""
+        with self._sessions_lock:
+            if session_id in self._sessions:
+                # Replaced rather than reset, since the batcher thread may be using the tracker
+                self._sessions[session_id][0] = self._sessions[session_id][0].new_session()
+
+    def set_court_region(self, session_id, court_keypoints, **region_args):
+        """
+        Restricts the player detection of a session to the court (see `PlayerTracker.set_court_region`).
+
+        The session starts new tracks, since track IDs are only consistent within a fixed region.
+        """
+        session = self._session(session_id, time.time()).new_session()
+        session.set_court_region(court_keypoints, **region_args)
+        with self._sessions_lock:
+            self._sessions[session_id] = [session, time.time()]
+
+    def _session(self, session_id, now):
+        with self._sessions_lock:
+            # Drop sessions whose clients went away
+            for stale_id in [key for key, (_, last_use) in self._sessions.items() if now - last_use > SESSION_TIMEOUT]:
+                del self._sessions[stale_id]
+            if session_id not in self._sessions:
+                self._sessions[session_id] = [self.player_tracker.new_session(), now]
+            session = self._sessions[session_id]
+            session[1] = now
+            return session[0]
+
+    def _detect_players(self, payloads):
+        """Detects people in frames of several sessions at once, then tracks each frame in its session"""
+        now = time.time()
+        sessions = [self._session(session_id, now) for session_id, _ in payloads]
+
+        # One model call per frame size and court region, which fix the crop and input size
+        groups = {}
+        for i, ((_, frame), session) in enumerate(zip(payloads, sessions)):
+            groups.setdefault((frame.shape, session.court_region(frame.shape)), []).append(i)
+        raw_detections = [None] * len(payloads)
+        for indexes in groups.values():
+            frames = [payloads[i][1] for i in indexes]
+            for i, detections in zip(indexes, sessions[indexes[0]].detect_raw(frames)):
+                raw_detections[i] = detections
+
+        # Payloads of a session are in frame order, so each tracker sees its frames in order
+        return [session.associate(frame, detections)
+                for (_, frame), session, detections in zip(payloads, sessions, raw_detections)]
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass  # Keep the console quiet under load
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path == "/metrics":
+                    self._reply(200, server.metrics())
+                elif path == "/health":
+                    self._reply(200, {"status": "ok"})
+                else:
+                    self._reply(404, {"error": f"Unknown endpoint {path}"})
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                session_id = parse_qs(url.query).get("session", ["default"])[0]
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with server._sessions_lock:
+                    server._requests += 1
+                try:
+                    if url.path == "/reset":
+                        server.reset_session(session_id)
+                        self._reply(200, {"status": "ok"})
+                        return
+                    if url.path == "/region":
+                        server.set_court_region(session_id, **json.loads(body))
+                        self._reply(200, {"status": "ok"})
+                        return
+
+                    frames = decode_frames(self.headers, body)
+                    if url.path == "/players":
+                        results = server.batchers["players"]([(session_id, frame) for frame in frames])
+                    elif url.path == "/ball":
+                        results = server.batchers["ball"](frames)
+                    elif url.path == "/court":
+                        results = [keypoints.tolist() for keypoints in server.batchers["court"](frames)]
+                    else:
+                        self._reply(404, {"error": f"Unknown endpoint {url.path}"})
+                        return
+                    self._reply(200, {"results": results})
+                except Exception as e:
+                    self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+
+        return Handler
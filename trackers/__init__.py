@@ -1,2 +1,15 @@
-from .player_tracker import PlayerTracker
-from .ball_tracker import BallTracker
+# Public names are imported from their submodule on first access (see `utils.lazy_exports`),
+# so e.g. the ball interpolation can be used without loading ultralytics
+from utils.lazy_imports import lazy_exports
+
+_EXPORTS = {
+    "PlayerTracker": ".player_tracker",
+    "BallTracker": ".ball_tracker",
+    "MultiModelDetector": ".multi_model_detector",
+    "DetectionCache": ".detection_cache",
+    "StreamingBallInterpolator": ".ball_interpolation",
+    "BallKalmanFilter": ".ball_motion",
+    "BallMotionPredictor": ".ball_motion",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
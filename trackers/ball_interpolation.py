@@ -0,0 +1,211 @@
+from collections import deque
+
+import numpy as np
+
+
+def boxes_from_detections(ball_detections):
+    """
+    Converts per-frame ball detections into an array with one row per frame.
+
+    Parameters:
+    ball_detections (list of dict): Per-frame dictionaries mapping key `1` to [x1, y1, x2, y2].
+
+    Returns:
+    numpy array: An (N, 4) float array, with NaN rows for frames without a detection.
+    """
+    missing = (np.nan,) * 4
+    return np.array([ball_dict.get(1, missing) for ball_dict in ball_detections], dtype=np.float64).reshape(-1, 4)
+
+
+def interpolate_boxes(boxes, frame_indices=None):
+    """
+    Fills the missing rows of a box array.
+
+    Gaps between detections are interpolated linearly; frames before the first or after
+    the last detection take its value, as `DataFrame.interpolate().bfill()` does.
+
+    Parameters:
+    boxes (numpy array): An (N, 4) array with NaN rows for missing detections.
+    frame_indices (numpy array): The frame index of each row, if the rows are not consecutive frames.
+
+    Returns:
+    numpy array: A new (N, 4) array without missing rows (unchanged if there is no detection at all).
+    """
+    valid = np.flatnonzero(~np.isnan(boxes).any(axis=1))
+    if len(valid) == 0 or len(valid) == len(boxes):
+        return boxes.copy()
+
+    frames = np.arange(len(boxes)) if frame_indices is None else np.asarray(frame_indices)
+    filled = np.empty_like(boxes)
+    for column in range(boxes.shape[1]):
+        filled[:, column] = np.interp(frames, frames[valid], boxes[valid, column])
+    return filled
+
+
+def reject_outliers(boxes, max_speed=None, max_acceleration=None, protected=0, frame_indices=None):
+    """
+    Removes detections that jump away from the trajectory, such as isolated false positives.
+
+    The ball center's velocity is computed between consecutive detections (over the
+    frames between them). A detection is rejected when it is reached and left at more
+    than `max_speed` pixels/frame (a spike). At the ends of the array, only the available
+    side is checked.
+
+    A single bad detection raises the change of velocity through its two neighbours as
+    well, so for `max_acceleration` (pixels/frame²), only the detection of each run of
+    too high accelerations that deviates most from its neighbours is rejected, and the
+    accelerations are checked again without it until none exceeds the threshold.
+
+    Parameters:
+    boxes (numpy array): An (N, 4) array with NaN rows for missing detections.
+    max_speed (float): The maximum plausible speed in pixels per frame, or None to skip the test.
+    max_acceleration (float): The maximum plausible acceleration in pixels per frame², or None to skip the test.
+    protected (int): The number of leading rows that are never rejected (already accepted context).
+    frame_indices (numpy array): The frame index of each row, if the rows are not consecutive frames.
+
+    Returns:
+    numpy array: A copy of `boxes` with the rejected detections set to NaN.
+    """
+    boxes = boxes.copy()
+    valid = np.flatnonzero(~np.isnan(boxes).any(axis=1))
+    if len(valid) < 2 or (max_speed is None and max_acceleration is None):
+        return boxes
+
+    frames = valid if frame_indices is None else np.asarray(frame_indices)[valid]
+    centers = (boxes[valid, :2] + boxes[valid, 2:]) / 2
+    gaps = np.diff(frames).astype(float)
+    velocities = np.diff(centers, axis=0) / gaps[:, None]
+    speeds = np.linalg.norm(velocities, axis=1)
+
+    # Speed into and out of every detection; NaN where there is no neighbouring detection
+    speed_in = np.concatenate([[np.nan], speeds])
+    speed_out = np.concatenate([speeds, [np.nan]])
+
+    outliers = np.zeros(len(valid), dtype=bool)
+    if max_speed is not None:
+        too_fast_in = np.isnan(speed_in) | (speed_in > max_speed)
+        too_fast_out = np.isnan(speed_out) | (speed_out > max_speed)
+        outliers |= too_fast_in & too_fast_out
+    outliers &= valid >= protected
+
+    if max_acceleration is not None:
+        kept = np.flatnonzero(~outliers)
+        while len(kept) > 2:
+            rejected = _acceleration_outliers(frames[kept], centers[kept], max_acceleration, valid[kept] >= protected)
+            if len(rejected) == 0:
+                break
+            outliers[kept[rejected]] = True
+            kept = np.delete(kept, rejected)
+
+    boxes[valid[outliers]] = np.nan
+    return boxes
+
+
+def _acceleration_outliers(frames, centers, max_acceleration, rejectable):
+    """
+    Returns the positions of the detections to reject for one pass of the acceleration test.
+
+    Every run of consecutive detections where the acceleration exceeds `max_acceleration`
+    involves the run and its two neighbours. Of those, the detection farthest from the
+    trajectory is returned, unless it may not be rejected (then the run is accepted). The
+    trajectory is the line through the two nearest detections outside them: one on each
+    side, or two on the same side at the ends.
+    """
+    gaps = np.diff(frames).astype(float)
+    velocities = np.diff(centers, axis=0) / gaps[:, None]
+    accelerations = np.linalg.norm(np.diff(velocities, axis=0), axis=1) / ((gaps[:-1] + gaps[1:]) / 2)
+    too_fast = np.concatenate([[False], accelerations > max_acceleration, [False]])
+
+    edges = np.diff(too_fast.astype(np.int8))
+    rejected = []
+    for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) + 2):
+        # Detections start..end-1 are involved in the run of too high accelerations
+        if start >= 1 and end < len(frames):
+            first, second = start - 1, end
+        elif start >= 2:
+            first, second = start - 2, start - 1
+        elif end + 1 < len(frames):
+            first, second = end, end + 1
+        else:
+            continue
+
+        candidates = np.arange(start, end)
+        weights = ((frames[candidates] - frames[first]) / (frames[second] - frames[first]))[:, None]
+        predicted = centers[first] + weights * (centers[second] - centers[first])
+        candidate = candidates[np.argmax(np.linalg.norm(centers[candidates] - predicted, axis=1))]
+        if rejectable[candidate]:
+            rejected.append(candidate)
+    return np.array(rejected, dtype=int)
+
+
+class StreamingBallInterpolator:
+    """
+    Incremental version of `BallTracker.interpolate_ball_positions` for streaming pipelines.
+
+    Frames are pushed one at a time and released once `lookahead` later frames are
+    known, so memory and latency are bounded by `2 * lookahead` frames. Gaps shorter
+    than the look-ahead are interpolated as in the offline version; longer gaps hold
+    the last known position. The last accepted detections are kept as context, so
+    interpolation and outlier rejection are continuous across windows.
+    """
+
+    def __init__(self, lookahead=30, max_speed=None, max_acceleration=None):
+        """
+        Parameters:
+        lookahead (int): The number of future frames used to fill a frame.
+        max_speed (float): Outlier threshold in pixels per frame (see `reject_outliers`).
+        max_acceleration (float): Outlier threshold in pixels per frame² (see `reject_outliers`).
+        """
+        self.lookahead = lookahead
+        self.max_speed = max_speed
+        self.max_acceleration = max_acceleration
+        self._pending = []              # Boxes of the frames not released yet (NaN if missing)
+        self._context = deque(maxlen=2)  # (frame offset, box) of the last accepted detections
+        self._released = 0              # Number of frames released so far
+
+    def push(self, ball_dict):
+        """
+        Adds the detection of the next frame.
+
+        Parameters:
+        ball_dict (dict): The detection of the frame, mapping key `1` to [x1, y1, x2, y2] (empty if none).
+
+        Returns:
+        list of dict: The frames released by this call, in order, in the same format
+                      (empty for frames before the first detection is known).
+        """
+        self._pending.append(ball_dict[1] if 1 in ball_dict else [np.nan] * 4)
+        if len(self._pending) < 2 * self.lookahead:
+            return []
+        return self._release(self.lookahead)
+
+    def flush(self):
+        """
+        Releases all the remaining frames, e.g. at the end of the video.
+
+        Returns:
+        list of dict: The remaining frames, in order.
+        """
+        return self._release(len(self._pending))
+
+    def _release(self, count):
+        if count == 0:
+            return []
+
+        # Window of the accepted context detections followed by the pending frames
+        protected = len(self._context)
+        frame_indices = np.concatenate([[frame for frame, _ in self._context],
+                                        np.arange(self._released, self._released + len(self._pending))])
+        window = np.array([box for _, box in self._context] + self._pending, dtype=float).reshape(-1, 4)
+
+        window = reject_outliers(window, self.max_speed, self.max_acceleration,
+                                 protected=protected, frame_indices=frame_indices)
+        filled = interpolate_boxes(window, frame_indices)[protected:protected + count]
+
+        # Remember the last accepted detections of the released frames as context
+        for offset in np.flatnonzero(~np.isnan(window[protected:protected + count]).any(axis=1)):
+            self._context.append((self._released + int(offset), window[protected + offset].copy()))
+
+        self._pending = self._pending[count:]
+        self._released += count
+        return [{1: box} if not np.isnan(box).any() else {} for box in filled.tolist()]
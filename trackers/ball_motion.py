@@ -0,0 +1,160 @@
+import numpy as np
+
+
+class BallKalmanFilter:
+    """
+    Constant-velocity Kalman filter on the ball center.
+
+    The state is [x, y, vx, vy] in pixels and pixels per frame; measurements are
+    detected box centers.
+    """
+
+    def __init__(self, process_noise=4.0, measurement_noise=2.0):
+        """
+        Parameters:
+        process_noise (float): Standard deviation of the unmodelled acceleration, in pixels per frame².
+        measurement_noise (float): Standard deviation of the detected center, in pixels.
+        """
+        self.transition = np.array([[1, 0, 1, 0],
+                                    [0, 1, 0, 1],
+                                    [0, 0, 1, 0],
+                                    [0, 0, 0, 1]], dtype=float)
+        self.observation = np.eye(2, 4)
+        # Discrete white-noise acceleration model
+        noise_gain = np.array([[0.5, 0], [0, 0.5], [1, 0], [0, 1]])
+        self.process_covariance = noise_gain @ noise_gain.T * process_noise ** 2
+        self.measurement_covariance = np.eye(2) * measurement_noise ** 2
+        self.state = None
+        self.covariance = None
+
+    def initiate(self, center):
+        """Starts a new track at `center` with unknown velocity"""
+        self.state = np.array([center[0], center[1], 0.0, 0.0])
+        self.covariance = np.diag([self.measurement_covariance[0, 0], self.measurement_covariance[1, 1], 400.0, 400.0])
+
+    def predict(self):
+        """
+        Advances the state by one frame.
+
+        Returns:
+        numpy array: The predicted [x, y] center.
+        """
+        self.state = self.transition @ self.state
+        self.covariance = self.transition @ self.covariance @ self.transition.T + self.process_covariance
+        return self.state[:2]
+
+    def update(self, center):
+        """Corrects the state with a detected [x, y] center"""
+        innovation = np.asarray(center, dtype=float) - self.observation @ self.state
+        innovation_covariance = self.observation @ self.covariance @ self.observation.T + self.measurement_covariance
+        gain = self.covariance @ self.observation.T @ np.linalg.inv(innovation_covariance)
+        self.state = self.state + gain @ innovation
+        self.covariance = (np.eye(4) - gain @ self.observation) @ self.covariance
+
+    @property
+    def position_std(self):
+        """The standard deviation of the predicted position, in pixels (largest axis)"""
+        return float(np.sqrt(np.max(np.diag(self.covariance)[:2])))
+
+
+class BallMotionPredictor:
+    """
+    Schedules ball detector calls with a Kalman filter to cut per-frame detection cost.
+
+    While the ball is tracked, the detector only runs on a region of interest around the
+    predicted position (sized by `roi_size` plus three standard deviations of the
+    prediction), and optionally only every `detect_every` frames, emitting the predicted
+    box in between. After `max_missed` frames without a detection the track is
+    considered lost and the detector falls back to full frames.
+    """
+
+    def __init__(self, roi_size=320, detect_every=1, max_missed=3, process_noise=4.0, measurement_noise=2.0):
+        """
+        Parameters:
+        roi_size (int): The minimum side of the search region, in pixels.
+        detect_every (int): Run the detector every that many frames while tracking (1 = every frame).
+        max_missed (int): The number of consecutive misses after which the track is lost.
+        process_noise (float): See `BallKalmanFilter`.
+        measurement_noise (float): See `BallKalmanFilter`.
+        """
+        self.roi_size = roi_size
+        self.detect_every = detect_every
+        self.max_missed = max_missed
+        self.kalman_filter = BallKalmanFilter(process_noise, measurement_noise)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {"frames": 0, "full_frame_calls": 0, "roi_calls": 0, "skipped": 0, "pixel_fraction": 0.0}
+
+    def track(self, frames, detect_fn, frame_size=None):
+        """
+        Detects the ball across a video, calling `detect_fn` as little as possible.
+
+        Parameters:
+        frames (iterable): The video frames; only passed through to `detect_fn`.
+        detect_fn (callable): Function `(frame, roi)` returning the ball dict of the frame
+                              (key `1` to [x1, y1, x2, y2] in full-frame coordinates, empty if none),
+                              where `roi` is an (x1, y1, x2, y2) region to search, or None for the full frame.
+        frame_size (tuple): The (width, height) of the frames, if `frames` are not arrays.
+
+        Yields:
+        dict: The ball detection of each frame (predicted boxes on skipped frames).
+        """
+        tracking = False
+        missed = 0
+        box_size = None
+        self.reset_stats()
+
+        for frame_index, frame in enumerate(frames):
+            width, height = frame_size if frame_size is not None else (frame.shape[1], frame.shape[0])
+            self.stats["frames"] += 1
+
+            if tracking:
+                center = self.kalman_filter.predict()
+                if missed == 0 and frame_index % self.detect_every != 0:
+                    self.stats["skipped"] += 1
+                    yield {1: _box_around(center, box_size)}
+                    continue
+
+                half_side = max(self.roi_size / 2, 3 * self.kalman_filter.position_std + box_size.max())
+                roi = (int(max(center[0] - half_side, 0)), int(max(center[1] - half_side, 0)),
+                       int(min(center[0] + half_side, width)), int(min(center[1] + half_side, height)))
+                if roi[2] <= roi[0] or roi[3] <= roi[1]:
+                    roi = None
+            else:
+                roi = None
+
+            if roi is None:
+                self.stats["full_frame_calls"] += 1
+                self.stats["pixel_fraction"] += 1.0
+            else:
+                self.stats["roi_calls"] += 1
+                self.stats["pixel_fraction"] += (roi[2] - roi[0]) * (roi[3] - roi[1]) / float(width * height)
+
+            ball_dict = detect_fn(frame, roi)
+            if 1 in ball_dict:
+                bbox = np.asarray(ball_dict[1], dtype=float)
+                detected_center = (bbox[:2] + bbox[2:]) / 2
+                box_size = bbox[2:] - bbox[:2]
+                if tracking:
+                    self.kalman_filter.update(detected_center)
+                else:
+                    self.kalman_filter.initiate(detected_center)
+                    tracking = True
+                missed = 0
+            elif tracking:
+                missed += 1
+                if missed > self.max_missed:
+                    tracking = False
+
+            yield ball_dict
+
+    def summary(self):
+        """Returns the detector cost of the last run relative to full-frame detection on every frame"""
+        frames = max(self.stats["frames"], 1)
+        return dict(self.stats, relative_cost=self.stats["pixel_fraction"] / frames)
+
+
+def _box_around(center, size):
+    return [float(center[0] - size[0] / 2), float(center[1] - size[1] / 2),
+            float(center[0] + size[0] / 2), float(center[1] + size[1] / 2)]
@@ -1,7 +1,10 @@
-from ultralytics import YOLO  # Import YOLO model from Ultralytics
-import cv2  # Import OpenCV
+import math
 import pickle as pkl  # Import pickle for saving/loading data
-import pandas as pd 
+
+from utils import batch_frames
+from overlay import OverlayRenderer
+from profiling import get_profiler
+from .ball_interpolation import boxes_from_detections, interpolate_boxes, reject_outliers
 
 class BallTracker:
     """
@@ -12,12 +15,25 @@ class BallTracker:
         """
         Initializes the PlayerTracker with a given YOLO model.
 
+        The model (and ultralytics) is only loaded when it is first used, see `model`.
+
         Parameters:
         model_path (str): Path to the YOLO model file.
         """
-        self.model = YOLO(model_path)  # Load the YOLO model
+        self.model_path = model_path
+        self._model = None
+        self.conf = 0.15  # Minimum confidence of ball detections
+        self.imgsz = 640  # Model input size for full frames
+
+    @property
+    def model(self):
+        """The YOLO model, loaded on first access"""
+        if self._model is None:
+            from ultralytics import YOLO  # Import YOLO model from Ultralytics
+            self._model = YOLO(self.model_path)  # Load the YOLO model
+        return self._model
         
-    def interpolate_ball_positions(self, ball_positions):
+    def interpolate_ball_positions(self, ball_positions, max_speed=None, max_acceleration=None):
         """
         Interpolates missing ball positions in a sequence of bounding boxes.
 
@@ -34,37 +50,53 @@ class BallTracker:
             ]
 
         The function performs the following steps:
-            1. Extracts the bounding box list for each frame using key `1`.
-            2. Converts the list of bounding boxes into a Pandas DataFrame with columns ["x1", "y1", "x2", "y2"].
-            3. Interpolates any missing values in the DataFrame.
-            4. Uses backfill to replace any remaining missing values.
-            5. Converts the DataFrame back into a list of dictionaries in the original format.
+            1. Stacks the bounding boxes into an (N, 4) NumPy array, with NaN rows for missing frames.
+            2. Optionally rejects outliers, i.e. detections reached and left faster than
+               `max_speed` or with an acceleration above `max_acceleration` (see `reject_outliers`).
+            3. Interpolates the missing rows linearly; frames before the first (after the last)
+               detection take its value.
+            4. Converts the array back into a list of dictionaries in the original format.
+
+        For streaming pipelines, see `StreamingBallInterpolator`, which does the same over a
+        bounded look-ahead window.
 
         Parameters:
             ball_positions (list of dict): A list where each element is a dictionary with key `1` 
                                         mapping to a list of four bounding box coordinates.
+            max_speed (float): Outlier threshold in pixels per frame, or None.
+            max_acceleration (float): Outlier threshold in pixels per frame², or None.
 
         Returns:
             list of dict: A list of dictionaries containing the interpolated bounding box coordinates.
         """
-        # Extract bounding box lists using key 1
-        ball_positions = [x.get(1, []) for x in ball_positions]
-        
-        # Convert the list into a Pandas DataFrame with specified column names
-        df_ball_positions = pd.DataFrame(ball_positions, columns=["x1", "y1", "x2", "y2"])
-        
-        # Interpolate missing values and backfill any remaining missing data
-        df_ball_positions = df_ball_positions.interpolate()
-        df_ball_positions = df_ball_positions.bfill()
+        boxes = boxes_from_detections(ball_positions)
+        boxes = reject_outliers(boxes, max_speed, max_acceleration)
+        boxes = interpolate_boxes(boxes)
         
-        # Convert the DataFrame back into the original list of dictionaries format
-        ball_positions = [{1: x} for x in df_ball_positions.to_numpy().tolist()]
+        # Convert the array back into the original list of dictionaries format
+        ball_positions = [{1: x} for x in boxes.tolist()]
         
         return ball_positions
 
         
-    def detect_frames(self, frames, read_from_stub=False, stub_path=None):
+    def detect_frames(self, frames, read_from_stub=False, stub_path=None, batch_size=1, cache=None, motion_predictor=None):
         """Detects and tracks players across an entire video
+
+        `frames` can be any iterable (e.g. the generator returned by `read_video`);
+        only the per-frame detections are kept in memory.
+
+        With `batch_size` > 1, frames are sent to the model `batch_size` at a time
+        (see `detect_batch`), which amortizes the per-call overhead of the model.
+
+        With a `DetectionCache`, frames already detected by the same model with the
+        same parameters (in this or any other video) are read from the cache and only
+        the remaining frames are sent to the model. `read_from_stub` / `stub_path` are
+        kept for existing stub files but do not check which video or model they hold.
+
+        With a `BallMotionPredictor`, frames are processed one at a time and the model
+        only searches a region around the Kalman-predicted ball position (or is skipped),
+        falling back to full frames when the track is lost; `batch_size` and `cache`
+        are ignored in that mode.
         """
         ball_detections = []
         
@@ -74,9 +106,19 @@ class BallTracker:
                 ball_detections = pkl.load(f)
             return ball_detections
         
-        for frame in frames:
-            player_dict = self.detect_frame(frame)
-            ball_detections.append(player_dict)
+        if motion_predictor is not None:
+            ball_detections = list(motion_predictor.track(frames, self.detect_region))
+        elif cache is not None:
+            return cache.detect_frames(self.cache_namespace(cache), frames, 
+                                       lambda batch: self.detect_frames(batch, batch_size=batch_size), 
+                                       batch_size=batch_size)
+        elif batch_size > 1:
+            for frame_batch in batch_frames(frames, batch_size):
+                ball_detections.extend(self.detect_batch(frame_batch))
+        else:
+            for frame in frames:
+                player_dict = self.detect_frame(frame)
+                ball_detections.append(player_dict)
             
         if stub_path is not None:
             # Save the player detections to a pickle file
@@ -86,6 +128,10 @@ class BallTracker:
         return ball_detections
             
 
+    def cache_namespace(self, cache):
+        """Returns the namespace of this model and its inference parameters in a `DetectionCache`"""
+        return cache.namespace(self.model_path, {"task": "predict", "conf": self.conf})
+
     def detect_frame(self, frame):
         """
         Detects and tracks players in a given video frame.
@@ -99,7 +145,70 @@ class BallTracker:
 
         # Perform object detection and tracking on the frame
         # `persist=True` ensures the tracking information is maintained across frames
-        results = self.model.predict(frame, conf=0.15)[0]  
+        with get_profiler().stage("ball.detect"):
+            results = self.model.predict(frame, conf=self.conf)[0]
+        get_profiler().record_model_speed("ball", [results])
+
+        return self.parse_results(results)
+
+    def detect_region(self, frame, roi=None):
+        """
+        Detects the ball in a region of a video frame.
+
+        The crop is sent to the model at the scale the full frame would have had (rounded
+        up to the model stride), so the ball has the same size in pixels as in full-frame
+        detection and smaller regions are proportionally cheaper.
+
+        Parameters:
+        frame (numpy array): A single video frame.
+        roi (tuple): The (x1, y1, x2, y2) region to search, or None for the full frame.
+
+        Returns:
+        dict: A dictionary mapping key `1` to the ball's bounding box in full-frame coordinates.
+        """
+        if roi is None:
+            return self.detect_frame(frame)
+
+        x1, y1, x2, y2 = roi
+        stride = 32
+        scale = self.imgsz / max(frame.shape[:2])
+        imgsz = max(math.ceil(max(x2 - x1, y2 - y1) * scale / stride), 1) * stride
+        with get_profiler().stage("ball.detect_region"):
+            results = self.model.predict(frame[y1:y2, x1:x2], conf=self.conf, imgsz=imgsz)[0]
+        get_profiler().record_model_speed("ball", [results])
+
+        ball_dict = self.parse_results(results)
+        if 1 in ball_dict:
+            bbox = ball_dict[1]
+            ball_dict[1] = [bbox[0] + x1, bbox[1] + y1, bbox[2] + x1, bbox[3] + y1]
+        return ball_dict
+
+    def detect_batch(self, frames):
+        """
+        Detects the ball in a batch of video frames with a single model call.
+
+        Parameters:
+        frames (list of numpy arrays): Video frames.
+
+        Returns:
+        list of dict: One dictionary per frame mapping key `1` to the ball's bounding box.
+        """
+        with get_profiler().stage("ball.detect_batch"):
+            results = self.model.predict(frames, conf=self.conf)
+        get_profiler().record_model_speed("ball", results)
+
+        return [self.parse_results(frame_results) for frame_results in results]
+
+    def parse_results(self, results):
+        """
+        Converts the model results of a single frame into the per-frame detection format.
+
+        Parameters:
+        results (ultralytics.engine.results.Results): The detection results of one frame.
+
+        Returns:
+        dict: A dictionary mapping key `1` to the ball's bounding box, empty if no ball was found.
+        """
 
         # Dictionary to store detected players (track ID as key, bounding box as value)
         ball_dict = {}
@@ -111,16 +220,17 @@ class BallTracker:
 
         return ball_dict  # Return dictionary containing detected players
     
+    def add_to_overlay(self, overlay, ball_dict):
+        """Adds the box of the ball of one frame to a `FrameOverlay`"""
+        for track_id, bbox in ball_dict.items():
+            overlay.add_box(bbox, (0, 255, 0), label=f"Ball {track_id}", label_color=(0, 0, 255))
+
     def draw_bounding_boxes(self, video_frames, ball_detections):
-        """Draw bounding boxes around detected players in each frame of the video"""
-        output_video_frames = []
-        
-        for frame, ball_dict in zip(video_frames, ball_detections):
-            # Draw bounding boxes around detected players
-            for track_id, bbox in ball_dict.items():
-                x_min, y_min, x_max, y_max = bbox
-                cv2.putText(frame, f"Ball {track_id}", (int(bbox[0]), int(bbox[1] - 10)), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2) # Draw the player ID
-                cv2.rectangle(frame, (int(x_min), int(y_min)), (int(x_max), int(y_max)), (0, 255, 0), 2) # Draw a blue rectangle around the player AND 2 
-            output_video_frames.append(frame)
-            
-        return output_video_frames
\ No newline at end of file
+        """Draw bounding boxes around the detected ball in each frame of the video.
+
+        Frames are annotated in place and yielded one at a time, so `video_frames`
+        can be a generator. To draw several annotations in a single pass, add
+        `add_to_overlay` as a layer of an `OverlayRenderer` instead.
+        """
+        renderer = OverlayRenderer([lambda i, overlay: self.add_to_overlay(overlay, ball_detections[i])])
+        return renderer.render(video_frames)
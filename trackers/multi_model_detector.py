@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import batch_frames
+from .detection_cache import hash_frame
+
+
+class MultiModelDetector:
+    """
+    Runs the player and ball models concurrently over a single decode of the video.
+
+    Each batch of frames is handed to both trackers on a two-thread pool, and the next
+    batch is decoded while they run. PyTorch releases the GIL during inference, so the
+    detection time gets close to that of the slower model instead of the sum of both.
+    """
+
+    def __init__(self, player_tracker, ball_tracker):
+        """
+        Parameters:
+        player_tracker (PlayerTracker): The tracker used to detect players.
+        ball_tracker (BallTracker): The tracker used to detect the ball.
+        """
+        self.player_tracker = player_tracker
+        self.ball_tracker = ball_tracker
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="detector")
+
+    def detect_frames(self, frames, batch_size=1, cache=None):
+        """
+        Detects players and the ball across an entire video.
+
+        Both models see the batches in frame order, so player track IDs stay consistent.
+
+        Parameters:
+        frames (iterable of numpy arrays): The video frames, e.g. the generator returned by `read_video`.
+        batch_size (int): The number of frames sent to each model per call.
+        cache (DetectionCache): Optional cache of detections shared by both models.
+
+        Returns:
+        tuple: (player_detections, ball_detections), in the same list-of-dict format as
+               `PlayerTracker.detect_frames` and `BallTracker.detect_frames`.
+        """
+        player_detections = []
+        ball_detections = []
+
+        if cache is not None:
+            ball_namespace = self.ball_tracker.cache_namespace(cache)
+
+        batches = batch_frames(frames, batch_size)
+        batch = next(batches, None)
+        while batch is not None:
+            if cache is None:
+                player_future = self.executor.submit(self.player_tracker.detect_frames, batch, batch_size=batch_size)
+                ball_future = self.executor.submit(self.ball_tracker.detect_frames, batch, batch_size=batch_size)
+            else:
+                # Hash each frame once for both models; new entries are written in large chunks at the end
+                frame_hashes = [hash_frame(frame) for frame in batch]
+                player_future = self.executor.submit(self.player_tracker.detect_cached, batch, cache,
+                                                     frame_hashes=frame_hashes)
+                ball_future = self.executor.submit(cache.detect_frames, ball_namespace, batch,
+                                                   lambda frames: self.ball_tracker.detect_frames(frames, batch_size=batch_size),
+                                                   batch_size=batch_size, frame_hashes=frame_hashes, flush=False)
+
+            # Decode the next batch while both models are busy with the current one
+            batch = next(batches, None)
+
+            player_detections.extend(player_future.result())
+            ball_detections.extend(ball_future.result())
+
+        if cache is not None:
+            cache.flush()
+
+        return player_detections, ball_detections
+
+    def close(self):
+        """Shuts the worker threads down"""
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
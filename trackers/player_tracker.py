@@ -1,11 +1,10 @@
-from ultralytics import YOLO  # Import YOLO model from Ultralytics
-import cv2  # Import OpenCV
+import copy
 import pickle as pkl # Import pickle for saving/loading data
+import numpy as np
 
-import sys
-sys.path.append("../")  # Add parent directory to the system path
-
-from utils import measure_distance, get_center_of_bbox
+from utils import measure_distances, batch_frames, DetectionTable
+from overlay import OverlayRenderer
+from profiling import get_profiler
 
 
 class PlayerTracker:
@@ -17,48 +16,211 @@ class PlayerTracker:
         """
         Initializes the PlayerTracker with a given YOLO model.
 
+        The model (and ultralytics) is only loaded when it is first used, see `model`.
+
         Parameters:
         model_path (str): Path to the YOLO model file.
         """
-        self.model = YOLO(model_path)  # Load the YOLO model
+        self.model_path = model_path
+        self._model = None
+        self._tracker = None
+        self.tracker_config = "botsort.yaml"  # Ultralytics tracker configuration, as used by `model.track`
+        self.conf = 0.1  # Minimum confidence of the detections fed to the tracker
+        self.imgsz = 640  # Model input size for full frames
+        self.court_keypoints = None  # Set by `set_court_region` to restrict detection to the court
+        self.court_margins = None
+
+    @property
+    def model(self):
+        """The YOLO model, loaded on first access"""
+        if self._model is None:
+            from ultralytics import YOLO  # Import YOLO model from Ultralytics
+            self._model = YOLO(self.model_path)  # Load the YOLO model
+        return self._model
+
+    @property
+    def tracker(self):
+        """The tracker associating detections across frames, created on first access"""
+        if self._tracker is None:
+            from ultralytics.trackers.track import TRACKER_MAP
+            from ultralytics.utils import YAML, IterableSimpleNamespace
+            from ultralytics.utils.checks import check_yaml
+
+            config = IterableSimpleNamespace(**YAML.load(check_yaml(self.tracker_config)))
+            self._tracker = TRACKER_MAP[config.tracker_type](args=config)
+        return self._tracker
+
+    def new_session(self):
+        """
+        Returns a tracker sharing this model, with a copy of its court region and its own track state.
+
+        Sessions detect and track exactly like this tracker, e.g. one per client of an `InferenceServer`.
+        """
+        self.model  # Load the model once, for every session
+        session = copy.copy(self)
+        session._tracker = None
+        return session
+
+    def set_court_region(self, court_keypoints, margin=0.15, vertical_margin=0.3):
+        """
+        Restricts detection to an expanded bounding region of the court.
+
+        Frames are cropped to the bounding box of the court keypoints, widened by `margin`
+        of the court width on each side and by `vertical_margin` of the court height above
+        and below (so that the far player's body above the baseline and the near player
+        behind it are kept). The crop is sent to the model at the scale the full frame would
+        have had, so fewer pixels go through the model, only "person" boxes are kept in
+        NMS, and spectators and officials outside the region are never detected. Boxes are
+        mapped back to full-frame coordinates.
+
+        The region is fixed for the whole video so that track IDs stay consistent.
+
+        Parameters:
+        court_keypoints (list or numpy array): The flat [x0, y0, x1, y1, ...] court keypoints, or None to detect on full frames.
+        margin (float): The horizontal expansion, as a fraction of the court width.
+        vertical_margin (float): The vertical expansion, as a fraction of the court height.
+        """
+        if court_keypoints is None:
+            self.court_keypoints = None
+            return
+        self.court_keypoints = np.asarray(court_keypoints, dtype=np.float64).reshape(-1, 2)
+        self.court_margins = (margin, vertical_margin)
+
+    def court_region(self, frame_shape):
+        """
+        Returns the (x1, y1, x2, y2) region detected in frames of shape `frame_shape`,
+        or None when detection runs on full frames (see `set_court_region`).
+        """
+        if self.court_keypoints is None:
+            return None
+
+        height, width = frame_shape[:2]
+        margin, vertical_margin = self.court_margins
+        (x1, y1), (x2, y2) = self.court_keypoints.min(axis=0), self.court_keypoints.max(axis=0)
+        dx, dy = margin * (x2 - x1), vertical_margin * (y2 - y1)
+        region = (int(max(x1 - dx, 0)), int(max(y1 - dy, 0)),
+                  int(min(np.ceil(x2 + dx), width)), int(min(np.ceil(y2 + dy), height)))
+        if region[2] <= region[0] or region[3] <= region[1]:
+            return None
+        return region
+
+    def crop_to_court(self, frames):
+        """
+        Crops frames of the same size to the court region.
+
+        Parameters:
+        frames (list of numpy arrays): Video frames.
+
+        Returns:
+        tuple: The cropped frames (views), the (x, y) offset of the crop and the extra model arguments.
+        """
+        region = self.court_region(frames[0].shape)
+        if region is None:
+            return frames, (0, 0), {}
+
+        x1, y1, x2, y2 = region
+        # Keep the pixel scale of the full frame: smaller crops get a proportionally smaller input
+        scale = self.imgsz / max(frames[0].shape[:2])
+        imgsz = int(np.ceil(max(x2 - x1, y2 - y1) * scale / 32)) * 32
+        return [frame[y1:y2, x1:x2] for frame in frames], (x1, y1), {"imgsz": imgsz}
         
     def choose_players(self, court_keypoints, player_dict):
-        distances = []
-        
-        for track_id, bbox in player_dict.items():
-            player_center = get_center_of_bbox(bbox)
-            
-            min_distance = float('inf')
-            for i in range(0, len(court_keypoints), 2):
-                court_keypoint = (court_keypoints[i], court_keypoints[i+1])
-                distance = measure_distance(player_center, court_keypoint)
-                
-                if distance < min_distance:
-                    min_distance = distance
-            # Append the track ID and the minimum distance to the list
-            distances.append((track_id, min_distance))
-            
-        # Sort the distances in ascending order
-        distances.sort(key=lambda x: x[1])
-        
+        """Chooses the two players closest to the court keypoints in a single frame.
+
+        The distances from every track to every keypoint are computed in one
+        broadcasted operation.
+
+        Parameters:
+        court_keypoints (list or numpy array): The flat [x0, y0, x1, y1, ...] court keypoints.
+        player_dict (dict): A dictionary mapping track IDs to bounding boxes.
+
+        Returns:
+        list: The track IDs of the chosen players.
+        """
+        track_ids = list(player_dict)
+        boxes = np.array(list(player_dict.values()), dtype=np.float64).reshape(-1, 4)
+        centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+
+        # Minimum distance from each track to any of the court keypoints
+        min_distances = measure_distances(centers, court_keypoints).min(axis=1)
+
         # Choose the first two players based on the minimum distance
-        chosen_players = [distances[0][0], distances[1][0]]
+        chosen_players = [track_ids[i] for i in np.argsort(min_distances, kind='stable')[:2]]
         return chosen_players
             
         
-    def choose_and_filter_players(self, court_keypoints, player_detections):
+    def choose_and_filter_players(self, court_keypoints, player_detections, reselect_window=None):
         """Chooses and filters nearest players based on their positions relative to the court keypoints.
+
+        By default the players are chosen on the first frame and kept for the whole video.
+        With `reselect_window`, the video is split into windows of that many frames and the
+        players are re-chosen in each window as the two tracks with the smallest mean distance
+        to the court keypoints, which follows players whose tracks are lost and re-acquired.
+
+        Parameters:
+        court_keypoints (list or numpy array): The flat [x0, y0, x1, y1, ...] court keypoints.
+        player_detections (list of dict or DetectionTable): The detections of every frame.
+        reselect_window (int): The number of frames per selection window, or None to select on the first frame only.
+
+        Returns:
+        list of dict or DetectionTable: The detections of the chosen players, in the same format as `player_detections`.
         """
-        player_detections_first_frame = player_detections[0]
-        chosen_player = self.choose_players(court_keypoints, player_detections_first_frame)
-        filtered_player_detections = []
-        for player_dict in player_detections:
-            filtered_player_dict = {track_id: bbox for track_id, bbox in player_dict.items() if track_id in chosen_player}
-            filtered_player_detections.append(filtered_player_dict)
-        return filtered_player_detections
+        if reselect_window is None and not isinstance(player_detections, DetectionTable):
+            chosen_player = self.choose_players(court_keypoints, player_detections[0])
+            return [{track_id: bbox for track_id, bbox in player_dict.items() if track_id in chosen_player}
+                    for player_dict in player_detections]
+
+        table = player_detections
+        if not isinstance(table, DetectionTable):
+            table = DetectionTable.from_dicts(player_detections)
+
+        if reselect_window is None:
+            track_ids, boxes = table.frame(table.first_frame)
+            chosen_players = self.choose_players(court_keypoints, dict(zip(track_ids.tolist(), boxes)))
+            filtered_table = table.select_tracks(chosen_players)
+        else:
+            # Minimum distance from every detection to the keypoints, in chunks to bound memory
+            centers = table.centers()
+            min_distances = np.empty(table.num_detections)
+            for start in range(0, table.num_detections, 1 << 20):
+                min_distances[start:start + (1 << 20)] = measure_distances(centers[start:start + (1 << 20)],
+                                                                            court_keypoints).min(axis=1)
+
+            # Mean distance of every (window, track) pair
+            windows = (table.frame_index - table.first_frame) // reselect_window
+            min_track_id = int(table.track_id.min()) if table.num_detections else 0
+            track_span = int(table.track_id.max()) - min_track_id + 1 if table.num_detections else 1
+            keys = windows * track_span + (table.track_id - min_track_id)
+            unique_keys, inverse = np.unique(keys, return_inverse=True)
+            mean_distances = np.bincount(inverse, weights=min_distances) / np.bincount(inverse)
+
+            # Rank the tracks of each window by mean distance and keep the first two
+            key_windows = unique_keys // track_span
+            order = np.lexsort((mean_distances, key_windows))
+            rank = np.arange(len(order)) - np.searchsorted(key_windows[order], key_windows[order])
+            chosen_keys = np.zeros(len(unique_keys), dtype=bool)
+            chosen_keys[order[rank < 2]] = True
+            filtered_table = table.filter(chosen_keys[inverse])
+
+        if isinstance(player_detections, DetectionTable):
+            return filtered_table
+        return filtered_table.to_dicts()
         
-    def detect_frames(self, frames, read_from_stub=False, stub_path=None):
+    def detect_frames(self, frames, read_from_stub=False, stub_path=None, batch_size=1, cache=None):
         """Detects and tracks players across an entire video
+
+        `frames` can be any iterable (e.g. the generator returned by `read_video`);
+        only the per-frame detections are kept in memory.
+
+        With `batch_size` > 1, frames are sent to the model `batch_size` at a time
+        (see `detect_batch`), which amortizes the per-call overhead of the model.
+
+        With a `DetectionCache`, frames already detected by the same model with the
+        same parameters (in this or any other video) are read from the cache and only
+        the remaining frames are sent to the model. `read_from_stub` / `stub_path` are
+        kept for existing stub files but do not check which video or model they hold.
+
+        After `set_court_region`, only the court area of each frame is sent to the model.
         """
         player_detections = []
         
@@ -68,9 +230,19 @@ class PlayerTracker:
                 player_detections = pkl.load(f)
             return player_detections
         
-        for frame in frames:
-            player_dict = self.detect_frame(frame)
-            player_detections.append(player_dict)
+        if cache is not None:
+            for frame_batch in batch_frames(frames, batch_size):
+                player_detections.extend(self.detect_cached(frame_batch, cache))
+            cache.flush()
+            return player_detections
+
+        if batch_size > 1:
+            for frame_batch in batch_frames(frames, batch_size):
+                player_detections.extend(self.detect_batch(frame_batch))
+        else:
+            for frame in frames:
+                player_dict = self.detect_frame(frame)
+                player_detections.append(player_dict)
             
         if stub_path is not None:
             # Save the player detections to a pickle file
@@ -80,6 +252,57 @@ class PlayerTracker:
         return player_detections
             
 
+    def reset_tracks(self):
+        """Forgets the tracker state, so that the next frame starts new tracks (e.g. for a new video)"""
+        if self._tracker is not None:
+            self._tracker.reset()
+
+    def cache_namespace(self, cache):
+        """
+        Returns the namespace of this model and its inference parameters in a `DetectionCache`.
+
+        The cache holds the raw detections of `detect_raw`, before tracking: track IDs depend
+        on every previous frame, so they are assigned again on each run (see `detect_cached`).
+        """
+        params = {"task": "detect_raw", "conf": self.conf}
+        if self.court_keypoints is not None:
+            params["court_keypoints"] = np.round(self.court_keypoints).tolist()
+            params["court_margins"] = list(self.court_margins)
+        return cache.namespace(self.model_path, params)
+
+    def detect_cached(self, frames, cache, frame_hashes=None, flush=False):
+        """
+        Detects and tracks players in consecutive frames, reading raw detections from a `DetectionCache`.
+
+        Only the frames missing from the cache are sent to the model, in a single call. Every
+        frame, cached or not, then goes through the tracker in frame order, so track IDs are
+        the same as without the cache.
+
+        Parameters:
+        frames (list of numpy arrays): Consecutive video frames.
+        cache (DetectionCache): The cache of raw detections.
+        frame_hashes (list of bytes): The hashes of `frames`, if already computed (see `hash_frame`).
+        flush (bool): Whether to write the new detections to disk before returning (see `DetectionCache.store`).
+
+        Returns:
+        list of dict: One dictionary per frame mapping track IDs to bounding box coordinates.
+        """
+        from .detection_cache import hash_frame
+
+        namespace = self.cache_namespace(cache)
+        if frame_hashes is None:
+            frame_hashes = [hash_frame(frame) for frame in frames]
+        raw_detections = cache.lookup(namespace, frame_hashes)
+
+        missing = [i for i, detections in enumerate(raw_detections) if detections is None]
+        if missing:
+            new_detections = self.detect_raw([frames[i] for i in missing])
+            for i, detections in zip(missing, new_detections):
+                raw_detections[i] = detections
+            cache.store(namespace, [frame_hashes[i] for i in missing], new_detections, flush=flush)
+
+        return [self.associate(frame, detections) for frame, detections in zip(frames, raw_detections)]
+
     def detect_frame(self, frame):
         """
         Detects and tracks players in a given video frame.
@@ -90,43 +313,81 @@ class PlayerTracker:
         Returns:
         dict: A dictionary mapping track IDs to bounding box coordinates for detected players.
         """
+        return self.associate(frame, self.detect_raw([frame])[0])
+
+    def detect_batch(self, frames):
+        """
+        Detects and tracks players in a batch of consecutive video frames with a single model call.
+
+        The tracker processes the detections of the batch in frame order and keeps its state
+        between calls, so track IDs stay consistent across batches.
+
+        Parameters:
+        frames (list of numpy arrays): Consecutive video frames.
+
+        Returns:
+        list of dict: One dictionary per frame mapping track IDs to bounding box coordinates.
+        """
+        return [self.associate(frame, detections) for frame, detections in zip(frames, self.detect_raw(frames))]
 
-        # Perform object detection and tracking on the frame
-        # `persist=True` ensures the tracking information is maintained across frames
-        results = self.model.track(frame, persist=True)[0]  
+    def detect_raw(self, frames):
+        """
+        Detects people in frames of the same size, without tracking.
 
-        # Retrieve object class names from the model results
-        id_name_dict = results.names  
+        Only "person" boxes are kept in NMS, so the tracker never sees other objects.
 
-        # Dictionary to store detected players (track ID as key, bounding box as value)
-        player_dict = {}
+        Parameters:
+        frames (list of numpy arrays): Video frames.
 
-        # Iterate over all detected bounding boxes in the frame
-        for box in results.boxes:
-            track_id = int(box.id.tolist()[0])  # Extract the tracking ID of the detected object
-            result = box.xyxy[0].tolist()  # Get bounding box coordinates in [x_min, y_min, x_max, y_max] format
+        Returns:
+        list of dict: One dictionary per frame mapping detection indexes to
+                      [x1, y1, x2, y2, confidence, class], in the coordinates of the court crop.
+        """
+        with get_profiler().stage("player.detect"):
+            crops, _, region_args = self.crop_to_court(frames)
+            person_classes = [class_id for class_id, name in self.model.names.items() if name == "person"]
+            results = self.model.predict(crops, conf=self.conf, classes=person_classes or None, verbose=False,
+                                         **region_args)
+        get_profiler().record_model_speed("player", results)
+
+        return [dict(enumerate(box for box in frame_results.boxes.data.cpu().numpy().tolist() if int(box[5]) in person_classes))
+                for frame_results in results]
 
-            # Extract class ID and convert to class name
-            object_cls_id = box.cls.tolist()[0]  
-            object_cls_name = id_name_dict[object_cls_id]  
+    def associate(self, frame, raw_detections):
+        """
+        Updates the tracker with the raw detections of the next frame.
+
+        This is the same update as ultralytics' `model.track`, on detections that may come from the cache.
 
-            # Check if the detected object is a "person"
-            if object_cls_name == "person":
-                player_dict[track_id] = result  # Store the player’s bounding box with its tracking ID
+        Parameters:
+        frame (numpy array): The video frame.
+        raw_detections (dict): The detections of the frame, as returned by `detect_raw`.
+
+        Returns:
+        dict: A dictionary mapping track IDs to bounding box coordinates for detected players.
+        """
+        from ultralytics.engine.results import Boxes
+
+        with get_profiler().stage("player.track"):
+            (crop,), offset, _ = self.crop_to_court([frame])
+            boxes = np.array(list(raw_detections.values()), dtype=np.float32).reshape(-1, 6)
+            tracks = self.tracker.update(Boxes(boxes, crop.shape[:2]), crop)
+
+        # Tracks are [x1, y1, x2, y2, track ID, confidence, class, detection index]
+        return {int(track[4]): [track[0] + offset[0], track[1] + offset[1], track[2] + offset[0], track[3] + offset[1]]
+                for track in tracks.tolist()}
+
+    def add_to_overlay(self, overlay, player_dict):
+        """Adds the boxes and IDs of the players of one frame to a `FrameOverlay`"""
+        for track_id, bbox in player_dict.items():
+            overlay.add_box(bbox, (0, 0, 255), label=f"Player {track_id}")
 
-        return player_dict  # Return dictionary containing detected players
-    
     def draw_bounding_boxes(self, video_frames, player_detections):
-        """Draw bounding boxes around detected players in each frame of the video"""
-        output_video_frames = []
-        
-        for frame, player_dict in zip(video_frames, player_detections):
-            # Draw bounding boxes around detected players
-            for track_id, bbox in player_dict.items():
-                x_min, y_min, x_max, y_max = bbox
-                cv2.putText(frame, f"Player {track_id}", (int(bbox[0]), int(bbox[1] - 10)), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2) # Draw the player ID
-                
-                cv2.rectangle(frame, (int(x_min), int(y_min)), (int(x_max), int(y_max)), (0, 0, 255), 2) # Draw a blue rectangle around the player AND 2 
-            output_video_frames.append(frame)
-            
-        return output_video_frames
\ No newline at end of file
+        """Draw bounding boxes around detected players in each frame of the video.
+
+        Frames are annotated in place and yielded one at a time, so `video_frames`
+        can be a generator. To draw several annotations in a single pass, add
+        `add_to_overlay` as a layer of an `OverlayRenderer` instead.
+        """
+        renderer = OverlayRenderer([lambda i, overlay: self.add_to_overlay(overlay, player_detections[i])])
+        return renderer.render(video_frames)
@@ -1,3 +1,16 @@
-from .video_utils import read_video, save_video
-from .bbox_utils import get_center_of_bbox, measure_distance
-from .conversions import convert_meters_distance_to_pixels, convert_pixel_distance_to_meters
\ No newline at end of file
+# Public names are imported from their submodule on first access (see `lazy_exports`),
+# so e.g. the bounding box helpers can be used without loading OpenCV
+from .lazy_imports import lazy_exports
+
+_EXPORTS = {
+    "read_video": ".video_utils", "save_video": ".video_utils", "batch_frames": ".video_utils",
+    "VideoReader": ".video_io", "VideoWriter": ".video_io", "probe_video": ".video_io",
+    "DEFAULT_FPS": ".video_io", "ffmpeg_available": ".video_io", "concatenate_videos": ".video_io",
+    "get_center_of_bbox": ".bbox_utils", "measure_distance": ".bbox_utils",
+    "measure_distances": ".bbox_utils", "measure_ious": ".bbox_utils",
+    "convert_meters_distance_to_pixels": ".conversions", "convert_pixel_distance_to_meters": ".conversions",
+    "DetectionTable": ".detection_table",
+    "lazy_exports": ".lazy_imports",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
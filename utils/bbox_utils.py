@@ -25,4 +25,41 @@ def measure_distance(point1, point2):
     Returns:
         float: The Euclidean distance between the two points.
     """
-    return np.linalg.norm(np.array(point1) - np.array(point2))
\ No newline at end of file
+    return np.linalg.norm(np.array(point1) - np.array(point2))
+
+def measure_distances(points1, points2):
+    """
+    Calculate the Euclidean distance between every pair of points of two arrays in one vectorized operation.
+
+    Parameters:
+        points1 (array-like): An (N, 2) array of x and y coordinates.
+        points2 (array-like): An (M, 2) array of x and y coordinates.
+
+    Returns:
+        numpy array: An (N, M) array where element [i, j] is the distance between points1[i] and points2[j].
+    """
+    points1 = np.asarray(points1, dtype=np.float64).reshape(-1, 2)
+    points2 = np.asarray(points2, dtype=np.float64).reshape(-1, 2)
+    differences = points1[:, None, :] - points2[None, :, :]
+    return np.sqrt(np.einsum('ijk,ijk->ij', differences, differences))
+
+def measure_ious(boxes1, boxes2):
+    """
+    Calculate the intersection over union of every pair of boxes of two arrays in one vectorized operation.
+
+    Parameters:
+        boxes1 (array-like): An (N, 4) array of boxes in the format [x1, y1, x2, y2].
+        boxes2 (array-like): An (M, 4) array of boxes in the same format.
+
+    Returns:
+        numpy array: An (N, M) array where element [i, j] is the IoU of boxes1[i] and boxes2[j].
+    """
+    boxes1 = np.asarray(boxes1, dtype=np.float64).reshape(-1, 4)
+    boxes2 = np.asarray(boxes2, dtype=np.float64).reshape(-1, 4)
+    top_left = np.maximum(boxes1[:, None, :2], boxes2[None, :, :2])
+    bottom_right = np.minimum(boxes1[:, None, 2:], boxes2[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area1 = np.prod(boxes1[:, 2:] - boxes1[:, :2], axis=1)
+    area2 = np.prod(boxes2[:, 2:] - boxes2[:, :2], axis=1)
+    union = area1[:, None] + area2[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
@@ -0,0 +1,206 @@
+import json
+import os
+
+import numpy as np
+
+# Names and dtypes of the per-detection columns of a `DetectionTable`
+COLUMNS = {
+    "frame_index": np.int64,
+    "track_id": np.int64,
+    "class_id": np.int16,
+    "confidence": np.float32,
+    "boxes": np.float32,
+}
+
+
+class DetectionTable:
+    """
+    A columnar table of detections for a range of frames.
+
+    Every detection is a row across NumPy columns: `frame_index`, `track_id`, `class_id`,
+    `confidence` and `boxes` (an (N, 4) array of [x1, y1, x2, y2]). Rows are sorted by
+    frame, and `offsets` holds, for the i-th frame of the table, the rows
+    `offsets[i]:offsets[i + 1]`. The table covers frames `first_frame` to
+    `first_frame + len(table) - 1`, including frames without detections.
+
+    Compared with the list-of-dicts format returned by `detect_frames` (see `from_dicts`
+    and `to_dicts`), the table holds a few arrays instead of millions of small Python
+    objects, filters with vectorized operations, slices frame ranges without copying
+    and can be memory-mapped from disk.
+    """
+
+    def __init__(self, frame_index, track_id, class_id, confidence, boxes, offsets, first_frame=0):
+        self.frame_index = frame_index
+        self.track_id = track_id
+        self.class_id = class_id
+        self.confidence = confidence
+        self.boxes = boxes
+        self.offsets = offsets
+        self.first_frame = first_frame
+
+    @classmethod
+    def from_dicts(cls, detections, first_frame=0):
+        """
+        Builds a table from the list-of-dicts format returned by `detect_frames`.
+
+        The dicts do not carry classes or confidences, so `class_id` is -1 and
+        `confidence` is NaN for every row.
+
+        Parameters:
+        detections (list of dict): Per-frame dictionaries mapping track IDs to [x1, y1, x2, y2].
+        first_frame (int): The frame index of the first element of `detections`.
+
+        Returns:
+        DetectionTable: The table of all the detections.
+        """
+        counts = np.fromiter((len(frame_detections) for frame_detections in detections),
+                             dtype=np.int64, count=len(detections))
+        offsets = np.zeros(len(detections) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        num_rows = int(offsets[-1])
+
+        track_id = np.fromiter((track_id for frame_detections in detections for track_id in frame_detections),
+                               dtype=np.int64, count=num_rows)
+        boxes = np.array([bbox for frame_detections in detections for bbox in frame_detections.values()],
+                         dtype=np.float32).reshape(num_rows, 4)
+
+        return cls(frame_index=np.repeat(np.arange(first_frame, first_frame + len(detections)), counts),
+                   track_id=track_id,
+                   class_id=np.full(num_rows, -1, dtype=np.int16),
+                   confidence=np.full(num_rows, np.nan, dtype=np.float32),
+                   boxes=boxes,
+                   offsets=offsets,
+                   first_frame=first_frame)
+
+    def to_dicts(self):
+        """
+        Converts the table to the list-of-dicts format returned by `detect_frames`.
+
+        Returns:
+        list of dict: Per-frame dictionaries mapping track IDs to [x1, y1, x2, y2].
+        """
+        track_ids = self.track_id.tolist()
+        boxes = self.boxes.tolist()
+        offsets = self.offsets.tolist()
+        return [dict(zip(track_ids[start:end], boxes[start:end])) for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def __len__(self):
+        """Returns the number of frames covered by the table"""
+        return len(self.offsets) - 1
+
+    @property
+    def num_detections(self):
+        return len(self.track_id)
+
+    def frame(self, frame_index):
+        """
+        Returns the rows of a single frame as views into the table.
+
+        Parameters:
+        frame_index (int): The (absolute) index of the frame.
+
+        Returns:
+        tuple: (track_ids, boxes) of the detections in the frame.
+        """
+        i = frame_index - self.first_frame
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.track_id[start:end], self.boxes[start:end]
+
+    def frame_range(self, start, stop):
+        """
+        Returns the table restricted to frames `start` to `stop - 1`, without copying any column.
+
+        Parameters:
+        start (int): The (absolute) index of the first frame.
+        stop (int): The (absolute) index after the last frame.
+
+        Returns:
+        DetectionTable: A table whose columns are views into this one.
+        """
+        start = max(start, self.first_frame)
+        stop = min(stop, self.first_frame + len(self))
+        stop = max(stop, start)
+        offsets = self.offsets[start - self.first_frame:stop - self.first_frame + 1]
+        rows = slice(int(offsets[0]), int(offsets[-1]))
+        return DetectionTable(frame_index=self.frame_index[rows],
+                              track_id=self.track_id[rows],
+                              class_id=self.class_id[rows],
+                              confidence=self.confidence[rows],
+                              boxes=self.boxes[rows],
+                              offsets=offsets - offsets[0],
+                              first_frame=start)
+
+    def filter(self, mask):
+        """
+        Returns the table restricted to the rows where `mask` is true.
+
+        Parameters:
+        mask (numpy array): A boolean array with one element per detection.
+
+        Returns:
+        DetectionTable: A table with the selected rows, covering the same frames.
+        """
+        frame_index = self.frame_index[mask]
+        counts = np.bincount(frame_index - self.first_frame, minlength=len(self))
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return DetectionTable(frame_index=frame_index,
+                              track_id=self.track_id[mask],
+                              class_id=self.class_id[mask],
+                              confidence=self.confidence[mask],
+                              boxes=self.boxes[mask],
+                              offsets=offsets,
+                              first_frame=self.first_frame)
+
+    def select_tracks(self, track_ids):
+        """
+        Returns the table restricted to the given track IDs.
+
+        Parameters:
+        track_ids (list of int): The track IDs to keep.
+
+        Returns:
+        DetectionTable: A table with the detections of the given tracks only.
+        """
+        return self.filter(np.isin(self.track_id, track_ids))
+
+    def centers(self):
+        """
+        Returns the center of every bounding box.
+
+        Returns:
+        numpy array: An (N, 2) array of [x, y] centers.
+        """
+        return (self.boxes[:, :2] + self.boxes[:, 2:]) / 2
+
+    def save(self, path):
+        """
+        Saves the table as a directory of `.npy` files that `load` can memory-map.
+
+        Parameters:
+        path (str): The directory to write to.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name in list(COLUMNS) + ["offsets"]:
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+        with open(os.path.join(path, "meta.json"), 'w') as f:
+            json.dump({"first_frame": int(self.first_frame)}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Loads a table saved with `save`.
+
+        Parameters:
+        path (str): The directory the table was saved to.
+        mmap (bool): Whether to memory-map the columns instead of reading them into memory.
+
+        Returns:
+        DetectionTable: The loaded table.
+        """
+        mmap_mode = 'r' if mmap else None
+        columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+                   for name in list(COLUMNS) + ["offsets"]}
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        return cls(first_frame=meta["first_frame"], **columns)
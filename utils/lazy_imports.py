@@ -0,0 +1,33 @@
+import importlib
+import sys
+
+
+def lazy_exports(package_name, exports):
+    """
+    Builds the module-level `__getattr__` and `__dir__` (PEP 562) of a package whose public
+    names are only imported from their submodule when first accessed.
+
+    Importing the package then costs nothing beyond the package itself; a submodule and its
+    dependencies (e.g. torch or ultralytics) are loaded by the first `from package import Name`
+    that needs them. The imported value is stored on the package, so later accesses are plain
+    attribute lookups.
+
+    Parameters:
+    package_name (str): The `__name__` of the package.
+    exports (dict): Maps every public name to the relative name of its submodule, e.g. {"PlayerTracker": ".player_tracker"}.
+
+    Returns:
+    tuple: The `__getattr__` and `__dir__` functions of the package.
+    """
+    def __getattr__(name):
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package_name), name)
+        setattr(sys.modules[package_name], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package_name])) | set(exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,286 @@
+import os
+import queue
+import shutil
+import subprocess
+import threading
+
+import cv2
+
+# Default codec per output container, for the OpenCV and ffmpeg backends
+OPENCV_CODECS = {".avi": "MJPG", ".mp4": "mp4v", ".mov": "mp4v", ".mkv": "XVID"}
+FFMPEG_CODECS = {".avi": "mpeg4", ".mp4": "libx264", ".mov": "libx264", ".mkv": "libx264"}
+
+# Codecs only available through ffmpeg
+FFMPEG_ONLY_CODECS = ("libx264", "libx265", "h264", "hevc", "libvpx-vp9", "h264_nvenc", "hevc_nvenc")
+
+# Frame rate assumed for videos whose container does not report one (see `probe_video`)
+DEFAULT_FPS = 30.0
+
+_END_OF_STREAM = object()
+
+
+def ffmpeg_available():
+    """Returns whether an `ffmpeg` executable is on the PATH"""
+    return shutil.which("ffmpeg") is not None
+
+
+def probe_video(input_video_path, default_fps=None):
+    """
+    Reads the metadata of a video file.
+
+    Parameters:
+    input_video_path (str): The file path of the video.
+    default_fps (float): The "fps" returned when the container does not report a frame rate, e.g. `DEFAULT_FPS`.
+
+    Returns:
+    dict: The "width", "height", "fps", "frame_count" (an estimate for some containers) and "codec" (FourCC) of the video.
+    """
+    cap = cv2.VideoCapture(input_video_path)
+    try:
+        if not cap.isOpened():
+            raise IOError(f"Could not open video {input_video_path!r}")
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        return {
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": cap.get(cv2.CAP_PROP_FPS) or default_fps,
+            "frame_count": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+            "codec": "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00"),
+        }
+    finally:
+        cap.release()
+
+
+class VideoReader:
+    """
+    Decodes a range of frames of a video, optionally keeping only every `step`-th frame.
+
+    The reader seeks to `start` instead of decoding the frames before it, and skipped
+    frames are only grabbed (demuxed) and never converted to images. Iterating yields the
+    frames one at a time; `frame_indices` gives the source index of each yielded frame.
+    """
+
+    # Skips longer than this many frames seek instead of grabbing every frame in between
+    SEEK_THRESHOLD = 64
+
+    def __init__(self, input_video_path, start=0, stop=None, step=1):
+        """
+        Parameters:
+        input_video_path (str): The file path of the video.
+        start (int): The index of the first frame.
+        stop (int): The index after the last frame, or None for the end of the video.
+        step (int): Keep every `step`-th frame.
+        """
+        if step < 1:
+            raise ValueError(f"step must be at least 1, got {step}")
+        self.input_video_path = input_video_path
+        self.start = start
+        self.stop = stop
+        self.step = step
+        self.info = probe_video(input_video_path)
+
+    @property
+    def fps(self):
+        """The frame rate of the yielded frames"""
+        return self.info["fps"] / self.step if self.info["fps"] else None
+
+    def frame_indices(self):
+        """Returns the range of source frame indices the reader yields (bounded by the reported frame count)"""
+        stop = self.info["frame_count"] if self.stop is None else min(self.stop, self.info["frame_count"])
+        return range(self.start, stop, self.step)
+
+    def __iter__(self):
+        cap = cv2.VideoCapture(self.input_video_path)
+        try:
+            if self.start > 0:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, self.start)
+            frame_index = self.start
+
+            while cap.isOpened() and (self.stop is None or frame_index < self.stop):
+                ret, frame = cap.read()
+
+                # Stop at the end of the video (or on a read error)
+                if not ret:
+                    break
+                yield frame
+
+                # Skip to the next kept frame without decoding the frames in between
+                frame_index += self.step
+                if self.step > self.SEEK_THRESHOLD:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+                else:
+                    for _ in range(self.step - 1):
+                        if not cap.grab():
+                            return
+        finally:
+            # Release the VideoCapture to finalize, even if the consumer stops early
+            cap.release()
+
+
+class VideoWriter:
+    """
+    Encodes frames into a video file with OpenCV or an ffmpeg pipe.
+
+    The writer is opened lazily from the size of the first frame. With `background=True`,
+    frames are encoded on a separate thread fed by a bounded queue, so encoding overlaps
+    with the production of the next frames; written frames must then not be modified by
+    the caller. Errors of the encoder thread are raised by the next `write` or by `close`.
+    """
+
+    def __init__(self, output_video_path, fps, codec=None, backend="auto", crf=23, background=False, queue_size=16):
+        """
+        Parameters:
+        output_video_path (str): The file path where the video will be saved.
+        fps (float): The frame rate of the output, required so that videos are never silently retimed.
+        codec (str): The codec: an OpenCV FourCC (e.g. "MJPG", "mp4v", "avc1") or an ffmpeg encoder
+                     (e.g. "libx264"); defaults by file extension (see `OPENCV_CODECS` and `FFMPEG_CODECS`).
+        backend (str): "opencv", "ffmpeg", or "auto" to use ffmpeg when it is installed and either the
+                       codec requires it or no codec was given for an .mp4/.mov/.mkv file.
+        crf (int): The constant rate factor (quality) of the ffmpeg x264/x265 encoders.
+        background (bool): Encode on a background thread.
+        queue_size (int): The maximum number of frames waiting for the background thread.
+        """
+        extension = os.path.splitext(output_video_path)[1].lower()
+        if backend == "auto":
+            if codec in FFMPEG_ONLY_CODECS:
+                backend = "ffmpeg"
+            elif codec is None and extension != ".avi" and ffmpeg_available():
+                backend = "ffmpeg"
+            else:
+                backend = "opencv"
+        if backend not in ("opencv", "ffmpeg"):
+            raise ValueError(f"Unknown backend {backend!r}, expected 'opencv', 'ffmpeg' or 'auto'")
+        if backend == "ffmpeg" and not ffmpeg_available():
+            raise RuntimeError("The ffmpeg backend requires an ffmpeg executable on the PATH")
+
+        if not fps:
+            raise ValueError(f"VideoWriter needs the frame rate of {output_video_path!r}, got fps={fps!r}")
+
+        defaults = FFMPEG_CODECS if backend == "ffmpeg" else OPENCV_CODECS
+        self.output_video_path = output_video_path
+        self.fps = fps
+        self.codec = codec or defaults.get(extension, "mp4v" if backend == "opencv" else "libx264")
+        self.backend = backend
+        self.crf = crf
+        self.frame_count = 0
+        self._writer = None
+        self._process = None
+
+        self._queue = None
+        self._thread = None
+        self._error = None
+        if background:
+            self._queue = queue.Queue(maxsize=queue_size)
+            self._thread = threading.Thread(target=self._encode_loop, name="video-writer", daemon=True)
+            self._thread.start()
+
+    def _open(self, frame):
+        height, width = frame.shape[:2]
+        directory = os.path.dirname(self.output_video_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if self.backend == "opencv":
+            self._writer = cv2.VideoWriter(self.output_video_path, cv2.VideoWriter_fourcc(*self.codec),
+                                           self.fps, (width, height))
+            if not self._writer.isOpened():
+                raise IOError(f"OpenCV could not open a {self.codec!r} writer for {self.output_video_path!r}")
+            return
+
+        command = ["ffmpeg", "-y", "-loglevel", "error",
+                   "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", str(self.fps),
+                   "-i", "-", "-c:v", self.codec]
+        if self.codec in ("libx264", "libx265"):
+            command += ["-preset", "veryfast", "-crf", str(self.crf)]
+        command += ["-pix_fmt", "yuv420p", self.output_video_path]
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def _encode(self, frame):
+        if self._writer is None and self._process is None:
+            self._open(frame)
+        if self._writer is not None:
+            self._writer.write(frame)
+        else:
+            self._process.stdin.write(frame.tobytes())
+        self.frame_count += 1
+
+    def _encode_loop(self):
+        while True:
+            frame = self._queue.get()
+            if frame is _END_OF_STREAM:
+                return
+            if self._error is None:
+                try:
+                    self._encode(frame)
+                except Exception as e:
+                    # Keep draining the queue so producers never block; the error is raised on their side
+                    self._error = e
+
+    def write(self, frame):
+        """Encodes (or queues) one BGR frame"""
+        if self._error is not None:
+            raise self._error
+        if self._queue is None:
+            self._encode(frame)
+        else:
+            self._queue.put(frame)
+
+    def close(self):
+        """Flushes the pending frames and finalizes the video file"""
+        if self._thread is not None:
+            self._queue.put(_END_OF_STREAM)
+            self._thread.join()
+            self._thread = None
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+        if self._process is not None:
+            self._process.stdin.close()
+            if self._process.wait() != 0 and self._error is None:
+                self._error = IOError(f"ffmpeg failed to encode {self.output_video_path!r}")
+            self._process = None
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def concatenate_videos(input_video_paths, output_video_path, fps=None, codec=None, backend="auto"):
+    """
+    Concatenates video segments with the same size and codec into one file.
+
+    With ffmpeg installed the segments are joined without re-encoding (concat demuxer);
+    otherwise they are decoded and re-encoded with a `VideoWriter`.
+
+    Parameters:
+    input_video_paths (list of str): The segments, in order.
+    output_video_path (str): The file path of the joined video.
+    fps (float): The frame rate of the output when re-encoding (defaults to the first segment's, or `DEFAULT_FPS`).
+    codec (str): The codec when re-encoding (see `VideoWriter`).
+    backend (str): The `VideoWriter` backend when re-encoding.
+    """
+    directory = os.path.dirname(output_video_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    if ffmpeg_available():
+        list_path = output_video_path + ".segments.txt"
+        with open(list_path, "w") as f:
+            for path in input_video_paths:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+        try:
+            subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                            "-i", list_path, "-c", "copy", output_video_path], check=True)
+        finally:
+            os.remove(list_path)
+        return
+
+    fps = fps or probe_video(input_video_paths[0], default_fps=DEFAULT_FPS)["fps"]
+    with VideoWriter(output_video_path, fps=fps, codec=codec, backend=backend) as writer:
+        for path in input_video_paths:
+            for frame in VideoReader(path):
+                writer.write(frame)
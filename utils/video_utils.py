@@ -1,68 +1,69 @@
-import cv2
+from itertools import islice
 
-def read_video(input_video_path):
-    """
-    Reads a video file and returns a list of frames.
+from profiling import get_profiler
 
-    Parameters:
-    input_video_path (str): The file path of the video to be read.
+from .video_io import VideoReader, VideoWriter
 
-    Returns:
-    list of numpy arrays: A list of frames (images) read from the video.
+def read_video(input_video_path, start=0, stop=None, step=1):
     """
+    Reads a video file and yields its frames one at a time.
 
-    # Initialize the VideoCapture object
-    cap = cv2.VideoCapture(input_video_path)
+    Frames are decoded lazily, so only the frame currently being processed is
+    held in memory regardless of the length of the video.
 
-    # Initialize the list to store the frames
-    video_frames = []
-
-    # Loop through the video frames
-    while cap.isOpened():
-        # Read the next frame
-        ret, frame = cap.read()
-
-        # If the frame was read successfully, add it to the list
-        if ret:
-            video_frames.append(frame)
-        else:
-            break
-
-    # Release the VideoCapture to finalize
-    cap.release()
+    Parameters:
+    input_video_path (str): The file path of the video to be read.
+    start (int): The index of the first frame; earlier frames are skipped by seeking.
+    stop (int): The index after the last frame, or None to read to the end.
+    step (int): Yield every `step`-th frame; skipped frames are not decoded.
 
-    return video_frames
+    Yields:
+    numpy array: The next frame (image) read from the video.
+    """
+    yield from get_profiler().profile_iter("video.read", VideoReader(input_video_path, start=start, stop=stop, step=step))
 
-def save_video(output_video_frames, output_video_path):
+def save_video(output_video_frames, output_video_path, fps=None, codec=None, backend="auto", background=False):
     """
     Saves a sequence of frames as a video file.
 
+    Frames are written as they arrive, so `output_video_frames` can be a
+    generator and is never materialized as a list.
+
     Parameters:
-    output_video_frames (list of numpy arrays): A list of frames (images) to be written as a video.
+    output_video_frames (iterable of numpy arrays): The frames (images) to be written as a video.
     output_video_path (str): The file path where the video will be saved.
+    fps (float): The frame rate of the output, e.g. `probe_video(input_video_path, default_fps=DEFAULT_FPS)["fps"]`
+                 to keep the source rate. It is required, so that videos are never silently retimed.
+    codec (str): The codec, defaulting by file extension (MJPG for .avi; see `VideoWriter`).
+    backend (str): "opencv", "ffmpeg" or "auto" (see `VideoWriter`).
+    background (bool): Encode on a background thread while the next frames are produced.
 
     Returns:
     None
     """
+    with VideoWriter(output_video_path, fps=fps, codec=codec, backend=backend, background=background) as out:
+        profiler = get_profiler()
+        for frame in output_video_frames:
+            with profiler.stage("video.write"):
+                out.write(frame)
 
-    # Define the codec for the output video (MJPG - Motion JPEG)
-    fourcc = cv2.VideoWriter_fourcc(*'MJPG')
-
-    # Initialize the VideoWriter object
-    # - output_video_path: File path to save the video
-    # - fourcc: Video codec
-    # - 25.0: Frame rate (FPS)
-    # - (width, height): Resolution of the video, derived from the first frame
-    out = cv2.VideoWriter(
-        output_video_path, 
-        fourcc, 
-        25.0, 
-        (output_video_frames[0].shape[1], output_video_frames[0].shape[0])
-    )
+def batch_frames(frames, batch_size):
+    """
+    Groups a sequence of frames into lists of at most `batch_size` frames.
 
-    # Loop through each frame in the list and write it to the video file
-    for frame in output_video_frames:
-        out.write(frame)
+    Parameters:
+    frames (iterable of numpy arrays): The frames to be grouped, e.g. the generator returned by `read_video`.
+    batch_size (int): The maximum number of frames per batch.
 
-    # Release the VideoWriter to finalize and save the video file
-    out.release()
\ No newline at end of file
+    Yields:
+    list of numpy arrays: The next batch of frames; the last batch may be shorter.
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
+    frames = iter(frames)
+    while True:
+        batch = list(islice(frames, batch_size))
+        if not batch:
+            return
+        yield batch